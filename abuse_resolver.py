@@ -0,0 +1,282 @@
+# abuse_resolver.py
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+    """Request budget: `capacity` tokens refilled evenly over `period` seconds."""
+
+    def __init__(self, capacity, period=86400.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self):
+        with self._lock:
+            self._refill()
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+    def clamp(self, remaining):
+        """Trust the server's remaining-quota header when it is lower than ours."""
+        with self._lock:
+            self._refill()  # otherwise the next take() adds back time earned before the answer
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class AbuseResolver:
+    """
+    AbuseIPDB lookups kept off the packet path:
+    - get(ip) never blocks: it returns a cached score (0..1) or None and
+      schedules a background lookup on a miss
+    - lookups run on a small thread pool sharing one pooled requests.Session
+    - concurrent misses for the same IP are coalesced into one request
+    - results are kept in memory and in a SQLite TTL cache (cache_path),
+      so restarts do not spend quota again
+    - a token bucket spreads daily_budget requests over the day; HTTP 429 /
+      X-RateLimit-Remaining pause or shrink the budget, 5xx and network
+      errors back off exponentially
+    - other 4xx answers say nothing about the service's health: the IP is
+      negative-cached for reject_ttl seconds instead, and 401/403 (bad or
+      revoked key) stop lookups until restart
+    - on_result(ip, score) is called after each fresh result (e.g. to drop
+      a provisional verdict from the VerdictCache)
+    - after close(), get() and resolve() only answer from the cache
+    """
+
+    DEFAULT_URL = "https://api.abuseipdb.com/api/v2/check"
+
+    def __init__(self, api_key, base_url=DEFAULT_URL, cache_path="abuse_cache.db", ttl=24 * 3600,
+                 daily_budget=1000, workers=4, max_pending=256, timeout=6, on_result=None,
+                 max_entries=100000, reject_ttl=3600):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.reject_ttl = reject_ttl
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.max_entries = max_entries
+        self.on_result = on_result
+        self.budget = TokenBucket(daily_budget)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Key": api_key, "Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aura-abuse")
+
+        self._lock = threading.Lock()
+        self._results = {}    # ip -> (score, expires)
+        self._rejected = {}   # ip -> expires, for IPs the API answered 4xx for
+        self._inflight = {}   # ip -> Future
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._disabled = None  # reason once the API refused our key
+        self._closed = False
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "requests": 0, "errors": 0,
+                         "rate_limited": 0, "budget_skips": 0, "queue_skips": 0, "rejected": 0,
+                         "rejected_hits": 0}
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if cache_path:
+            self._open_cache()
+
+    # -------------------------------
+    # persistent cache
+    # -------------------------------
+    def _open_cache(self):
+        try:
+            self._db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS abuse_cache "
+                             "(ip TEXT PRIMARY KEY, score REAL NOT NULL, expires REAL NOT NULL)")
+            now = time.time()
+            with self._db:
+                self._db.execute("DELETE FROM abuse_cache WHERE expires <= ?", (now,))
+            for ip, score, expires in self._db.execute("SELECT ip, score, expires FROM abuse_cache"):
+                self._results[ip] = (score, expires)
+            if self._results:
+                print(f"[INTEL] Loaded {len(self._results)} cached AbuseIPDB results.")
+        except sqlite3.Error as e:
+            print(f"[INTEL] AbuseIPDB cache unavailable ({e}); results kept in memory only.")
+            self._db = None
+
+    def _persist(self, ip, score, expires):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock, self._db:
+                self._db.execute("INSERT OR REPLACE INTO abuse_cache VALUES (?, ?, ?)", (ip, score, expires))
+        except sqlite3.Error as e:
+            print(f"[INTEL] Failed to persist AbuseIPDB result: {e}")
+
+    # -------------------------------
+    # lookups
+    # -------------------------------
+    def get(self, ip):
+        """Return the cached score for ip, or None (a lookup is scheduled if possible)."""
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(ip)
+            if cached is not None and cached[1] > now:
+                self.counters["hits"] += 1
+                return cached[0]
+            self.counters["misses"] += 1
+            self._schedule(ip, now)
+        return None
+
+    def pending(self, ip):
+        """True while a lookup for ip is in flight (on_result will fire when it lands)."""
+        with self._lock:
+            return ip in self._inflight
+
+    def resolve(self, ip):
+        """Return a Future for ip's score (cached results resolve immediately)."""
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(ip)
+            if cached is None or cached[1] <= now:
+                future = self._schedule(ip, now, force=True)
+                if future is not None:
+                    return future
+                cached = (None, 0.0)
+        future = Future()
+        future.set_result(cached[0])
+        return future
+
+    def _schedule(self, ip, now, force=False):
+        """Start (or join) a lookup for ip. Caller holds _lock."""
+        future = self._inflight.get(ip)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return future
+        if self._closed or self._disabled:
+            return None
+        rejected = self._rejected.get(ip)
+        if rejected is not None:
+            if rejected > now:
+                self.counters["rejected_hits"] += 1
+                return None
+            del self._rejected[ip]
+        if not force:
+            if now < self._paused_until:
+                return None
+            if len(self._inflight) >= self.max_pending:
+                self.counters["queue_skips"] += 1
+                return None
+            if not self.budget.take():
+                self.counters["budget_skips"] += 1
+                return None
+        future = self._pool.submit(self._fetch, ip)
+        self._inflight[ip] = future
+        return future
+
+    def _fetch(self, ip):
+        score = expires = None
+        try:
+            with self._lock:
+                self.counters["requests"] += 1
+            r = self.session.get(self.base_url, params={"ipAddress": ip, "maxAgeInDays": "90"},
+                                 timeout=self.timeout)
+            remaining = r.headers.get("X-RateLimit-Remaining")
+            if remaining is not None and remaining.isdigit():
+                self.budget.clamp(int(remaining))
+            if r.status_code == 200:
+                raw = r.json().get("data", {}).get("abuseConfidenceScore", 0)
+                score = round(min(1.0, max(0.0, raw / 100.0)), 2)
+                with self._lock:
+                    self._backoff = 0.0
+            elif r.status_code == 429:
+                retry = r.headers.get("Retry-After", "")
+                with self._lock:
+                    self.counters["rate_limited"] += 1
+                self._pause(float(retry) if retry.isdigit() else 3600.0)
+            elif r.status_code >= 500:
+                self._fail(f"HTTP {r.status_code}")
+            else:
+                self._reject(ip, r.status_code)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(ip, None)
+                if score is not None:
+                    expires = time.time() + self.ttl
+                    self._results.pop(ip, None)
+                    self._results[ip] = (score, expires)
+                    if len(self._results) > self.max_entries:
+                        # oldest result first (dict keeps insertion order)
+                        self._results.pop(next(iter(self._results)))
+        if score is not None:
+            self._persist(ip, score, expires)
+            if self.on_result is not None:
+                try:
+                    self.on_result(ip, score)
+                except Exception as e:
+                    print(f"[INTEL] AbuseIPDB result callback failed: {e}")
+        return score
+
+    def _reject(self, ip, status):
+        """A 4xx answer: no backoff, but do not ask about ip (or anything, on 401/403) again."""
+        with self._lock:
+            self.counters["errors"] += 1
+            self.counters["rejected"] += 1
+            if status in (401, 403):
+                self._disabled = f"HTTP {status}"
+            else:
+                self._rejected.pop(ip, None)
+                self._rejected[ip] = time.time() + self.reject_ttl
+                if len(self._rejected) > self.max_entries:
+                    self._rejected.pop(next(iter(self._rejected)))
+        if status in (401, 403):
+            print(f"[INTEL] AbuseIPDB refused the API key (HTTP {status}); lookups disabled.")
+        else:
+            print(f"[INTEL] AbuseIPDB rejected lookup for {ip}: HTTP {status}")
+
+    def _pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+
+    def _fail(self, reason):
+        with self._lock:
+            self.counters["errors"] += 1
+            self._backoff = backoff = min(300.0, self._backoff * 2 or 5.0)
+            self._paused_until = max(self._paused_until, time.time() + backoff)
+        print(f"[INTEL] AbuseIPDB lookup failed: {reason} (pausing {backoff:.0f}s)")
+
+    # -------------------------------
+    # housekeeping
+    # -------------------------------
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, cached=len(self._results), inflight=len(self._inflight),
+                        disabled=self._disabled,
+                        budget_tokens=int(self.budget.tokens),
+                        paused_for=max(0.0, round(self._paused_until - time.time(), 1)))
+
+    def close(self):
+        with self._lock:
+            self._closed = True  # later misses answer None instead of hitting the closed pool
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+                self._db = None
@@ -1,71 +1,593 @@
 # anomaly_detection.py
-import random
+import json
 import math
+import os
+import threading
 import time
 
+import numpy as np
+
+
+def _subnet(ip):
+    """/24 key for IPv4 addresses, None for anything else."""
+    if ":" in ip:
+        return None
+    return ip.rpartition(".")[0]
+
+
+def _port_bucket(port, proto):
+    """Map (port, proto) to one of 256 sketch buckets (multiplicative hash; ints or arrays)."""
+    return (((port + (proto << 16)) * 2654435761) & 0xFFFFFFFF) >> 24
+
+
+def _pack_strings(values):
+    return np.frombuffer("\n".join(values).encode(), dtype=np.uint8)
+
+
+def _unpack_strings(blob):
+    text = blob.tobytes().decode()
+    return text.split("\n") if text else []
+
+
 class BehavioralAnomalyDetector:
     """
-    Behavioral anomaly detector that assigns a dynamic threat score
-    based on deviations in observed IP activity patterns.
+    Behavioral anomaly detector that assigns a threat score from how far an
+    IP's packet inter-arrival time deviates from its own learned baseline.
+    - per-IP state lives in NumPy columns (count, EWMA interval, EWMA
+      variance, last_seen) indexed through an ip -> slot dict
+    - scoring is deterministic: z-score of the current interval against the
+      EWMA baseline (faster than usual = riskier) plus a burst bonus
+    - the baseline adapts quickly while learning and slowly afterwards
+    - IPs idle for idle_timeout are evicted and their slots reused
+    - score_many() scores a whole batch of (ip, timestamp) in one vectorized call
+    - with snapshot_path the per-IP columns and per-/24 baselines are saved
+      every snapshot_interval seconds (.npz, written on a background thread)
+      and loaded at start-up; new IPs are seeded from their /24's baseline
+    - profile_path (network_profile.json) supplies precomputed normal_ports,
+      kept as a 65536-bit bitset
+    - port_score() adds port features in O(1) per packet: a per-IP 256-bit
+      linear-counting sketch of distinct service ports in the last
+      FANOUT_WINDOW seconds (port scans) and a bonus for services outside
+      normal_ports (unusual-service traffic)
+    A loaded snapshot or profile skips the learning window entirely.
     Works standalone or with real-time packet monitoring.
     """
 
-    def __init__(self):
-        self.ip_activity = {}
+    ALPHA_LEARNING = 0.2     # EWMA weight while learning
+    ALPHA_MONITORING = 0.02  # slow drift once the baseline is established
+    PRIOR_INTERVAL = 1.5     # seconds, baseline for a never-seen IP
+    PRIOR_STD = 1.0
+    MIN_STD = 0.05           # floor so a perfectly regular IP does not explode z
+    MAX_INTERVAL = 60.0      # longer gaps are clamped before updating the baseline
+    Z_SCALE = 3.0            # z >= Z_SCALE gives the full deviation weight
+    DEVIATION_WEIGHT = 0.7
+    BURST_INTERVAL = 0.3
+    BURST_BONUS = 0.3
+    FANOUT_WINDOW = 60.0     # seconds a port-fanout sketch accumulates before resetting
+    FANOUT_MIN = 8.0         # distinct service ports that start to look like a scan
+    FANOUT_FULL = 64.0       # distinct ports for the full fanout weight
+    FANOUT_WEIGHT = 0.6
+    UNUSUAL_PORT_BONUS = 0.1
+    SKETCH_BITS = 256
+
+    def __init__(self, capacity=4096, max_ips=200000, idle_timeout=600.0, sweep_interval=30.0,
+                 snapshot_path=None, snapshot_interval=300.0, profile_path=None):
+        self.max_ips = max_ips
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._slots = {}
+        self._ips = []
+        self._free = []
+        self._alloc(capacity)
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.evicted = 0
+        self.subnet_priors = {}  # "a.b.c" -> (mean, var)
+        self.normal_ports = frozenset()
+        self._normal_bits = bytearray(65536 // 8)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.snapshots_written = 0
         self.learning_mode = True
-        self.learning_start = time.time()
+        # learning time runs on packet timestamps: it starts at the first one
+        # seen, so replayed or clock-skewed captures learn for the same period
+        self.learning_start = None
+        self.last_ts = None
         self.learning_period = 15  # seconds
-        print("🧠 Behavioral Anomaly Detector initialized in LEARNING mode...")
+        self.unscored = 0  # packets dropped from scoring because every slot was pinned
+        # newest last_seen of a loaded snapshot, until the first packet rebases it
+        self._snapshot_ts = None
+
+        warm = False
+        if profile_path:
+            warm |= self.load_profile(profile_path)
+        if snapshot_path:
+            warm |= self.load_snapshot(snapshot_path)
+        if warm:
+            self.learning_mode = False
+            print("🧠 Behavioral Anomaly Detector warm-started in MONITORING mode.")
+        else:
+            print("🧠 Behavioral Anomaly Detector initialized in LEARNING mode...")
 
-    def calculate_threat_score(self, ip):
+        self._stop = threading.Event()
+        self._snapshot_thread = None
+        if snapshot_path and snapshot_interval:
+            self._snapshot_thread = threading.Thread(target=self._snapshot_loop,
+                                                     name="aura-detector-snapshot", daemon=True)
+            self._snapshot_thread.start()
+
+    # -------------------------------
+    # slot storage
+    # -------------------------------
+    def _alloc(self, capacity):
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.full(capacity, self.PRIOR_INTERVAL, dtype=np.float64)
+        self.var = np.full(capacity, self.PRIOR_STD ** 2, dtype=np.float64)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        # port-fanout sketch: 256 bits per IP as 4 x uint64, plus its set-bit count
+        self.fanout_bits = np.zeros((capacity, self.SKETCH_BITS // 64), dtype=np.uint64)
+        self.fanout_count = np.zeros(capacity, dtype=np.int32)
+        self.fanout_start = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self):
+        old = len(self.count)
+        new = min(self.max_ips, old * 2)
+        for name in ("count", "mean", "var", "last_seen", "fanout_bits", "fanout_count", "fanout_start"):
+            column = getattr(self, name)
+            grown = np.empty((new,) + column.shape[1:], dtype=column.dtype)
+            grown[:old] = column
+            setattr(self, name, grown)
+        self._reset(np.arange(old, new))
+
+    def _reset(self, slots):
+        self.count[slots] = 0
+        self.mean[slots] = self.PRIOR_INTERVAL
+        self.var[slots] = self.PRIOR_STD ** 2
+        self.last_seen[slots] = 0.0
+        self.fanout_bits[slots] = 0
+        self.fanout_count[slots] = 0
+        self.fanout_start[slots] = 0.0
+
+    def _slot(self, ip, now, pinned=()):
         """
-        Dynamically compute a threat score for a given IP.
-        Returns a float between 0.0 and 1.0.
+        Return the slot for ip, allocating (and evicting if full) as needed.
+        Slots in pinned (already handed out to the current batch) are never
+        evicted; returns None when the table is full and nothing can be freed.
+        Caller holds _lock.
         """
+        slot = self._slots.get(ip)
+        if slot is not None:
+            return slot
+        if not self._free:
+            if len(self._ips) < len(self.count):
+                self._free.append(len(self._ips))
+                self._ips.append(None)
+            elif len(self.count) < self.max_ips:
+                self._grow()
+                return self._slot(ip, now, pinned)
+            else:
+                self._sweep(now, force=True, pinned=pinned)
+                if not self._free:
+                    self.unscored += 1
+                    return None
+        slot = self._free.pop()
+        self._slots[ip] = slot
+        self._ips[slot] = ip
+        if self.subnet_priors:
+            prior = self.subnet_priors.get(_subnet(ip))
+            if prior is not None:
+                self.mean[slot], self.var[slot] = prior
+        return slot
+
+    def _release(self, slots):
+        for slot in slots.tolist():
+            del self._slots[self._ips[slot]]
+            self._ips[slot] = None
+            self._free.append(slot)
+        self._reset(slots)
+        self.evicted += len(slots)
 
-        # Exit learning mode automatically
-        if self.learning_mode and (time.time() - self.learning_start) > self.learning_period:
+    def _sweep(self, now, force=False, pinned=()):
+        """
+        Evict idle IPs; when forced and nothing is idle, drop the least recent
+        eighth. Slots in pinned are never evicted.
+        """
+        self._next_sweep = now + self.sweep_interval
+        used = len(self._ips)
+        # port-only activity counts too (fanout_start is within FANOUT_WINDOW of it)
+        last = np.maximum(self.last_seen[:used], self.fanout_start[:used])
+        # slots handed out but not scored yet (count 0) are never the victims
+        active = (self.count[:used] > 0) | (self.fanout_count[:used] > 0)
+        if len(pinned):
+            active[np.fromiter(pinned, dtype=np.int64, count=len(pinned))] = False
+        idle = np.flatnonzero(active & (last < now - self.idle_timeout))
+        if len(idle):
+            self._release(idle)
+        elif force and active.any():
+            last = np.where(active, last, np.inf)
+            k = min(max(1, used // 8), int(active.sum()))
+            self._release(np.argpartition(last, k - 1)[:k])
+
+    # -------------------------------
+    # scoring
+    # -------------------------------
+    def _rebase(self, now):
+        """
+        Shift loaded last_seen values so the snapshot's newest packet lands on
+        the first packet timestamp scored after the load. Rebasing on packet
+        time rather than the wall clock keeps replayed captures consistent, and
+        downtime does not count as idle time. Caller holds _lock.
+        """
+        if self._snapshot_ts is None:
+            return
+        used = len(self._ips)
+        self.last_seen[:used] += now - self._snapshot_ts
+        self._snapshot_ts = None
+
+    def _update_learning(self, now):
+        if self.learning_start is None:
+            self.learning_start = now
+        if self.last_ts is None or now > self.last_ts:
+            self.last_ts = now
+        if self.learning_mode and (now - self.learning_start) > self.learning_period:
             self.learning_mode = False
             print("✅ Behavioral model switched to MONITORING mode.")
 
-        # Initialize activity if unseen
-        if ip not in self.ip_activity:
-            self.ip_activity[ip] = {
-                "count": 0,
-                "last_seen": time.time(),
-                "avg_interval": random.uniform(0.5, 3.0)
-            }
+    def _score_update(self, slots, ts):
+        """
+        Score and update unique slots at timestamps ts (arrays). Caller holds _lock.
+        Returns float scores in [0, 1].
+        """
+        count = self.count[slots]
+        mean = self.mean[slots]
+        var = self.var[slots]
+        interval = np.maximum(ts - self.last_seen[slots], 0.0)
+        seen = count > 0
+
+        std = np.maximum(np.sqrt(var), self.MIN_STD)
+        z = (mean - interval) / std
+        score = self.DEVIATION_WEIGHT * np.clip(z / self.Z_SCALE, 0.0, 1.0)
+        score += np.where(interval < self.BURST_INTERVAL, self.BURST_BONUS, 0.0)
+        score = np.where(seen, np.minimum(score, 1.0), 0.0)
 
-        data = self.ip_activity[ip]
-        now = time.time()
-        interval = now - data["last_seen"]
-        data["last_seen"] = now
-        data["count"] += 1
+        # EWMA mean / variance of the inter-arrival time (first packet only sets last_seen)
+        alpha = self.ALPHA_LEARNING if self.learning_mode else self.ALPHA_MONITORING
+        diff = np.minimum(interval, self.MAX_INTERVAL) - mean
+        incr = alpha * diff
+        self.mean[slots] = np.where(seen, mean + incr, mean)
+        self.var[slots] = np.where(seen, (1 - alpha) * (var + diff * incr), var)
+        self.count[slots] = count + 1
+        self.last_seen[slots] = ts
+        return score
 
-        # Compute deviation (smaller intervals between packets = higher risk)
-        deviation = max(0, (data["avg_interval"] - interval) / data["avg_interval"])
-        base_score = deviation * random.uniform(0.6, 1.0)
+    def _score_update_one(self, slot, ts):
+        """Scalar twin of _score_update (avoids array overhead for a single packet)."""
+        count = int(self.count[slot])
+        mean = float(self.mean[slot])
+        var = float(self.var[slot])
+        interval = max(ts - float(self.last_seen[slot]), 0.0)
+        self.count[slot] = count + 1
+        self.last_seen[slot] = ts
+        if not count:
+            return 0.0
 
-        # Spike-based detection (sudden bursts)
-        if interval < 0.3:
-            base_score += 0.3
+        std = max(math.sqrt(var), self.MIN_STD)
+        z = (mean - interval) / std
+        score = self.DEVIATION_WEIGHT * min(max(z / self.Z_SCALE, 0.0), 1.0)
+        if interval < self.BURST_INTERVAL:
+            score += self.BURST_BONUS
 
-        # Randomized external factor (mimics contextual anomalies)
-        randomness = random.uniform(0.0, 0.2)
+        alpha = self.ALPHA_LEARNING if self.learning_mode else self.ALPHA_MONITORING
+        diff = min(interval, self.MAX_INTERVAL) - mean
+        incr = alpha * diff
+        self.mean[slot] = mean + incr
+        self.var[slot] = (1 - alpha) * (var + diff * incr)
+        return min(score, 1.0)
 
-        # Clamp to [0, 1]
-        score = min(1.0, base_score + randomness)
+    # -------------------------------
+    # port features
+    # -------------------------------
+    def is_normal_port(self, port):
+        return bool(self._normal_bits[port >> 3] >> (port & 7) & 1)
 
-        # Update model baseline during learning phase
-        if self.learning_mode:
-            data["avg_interval"] = (data["avg_interval"] + interval) / 2
+    def _fanout_estimate(self, bits_set):
+        # linear counting: n ~= -m * ln(zero_bits / m); saturates at m * ln(m)
+        m = self.SKETCH_BITS
+        return -m * np.log((m - np.minimum(bits_set, m - 1)) / m)
+
+    def _port_update(self, slots, ts, service, proto):
+        """Vectorized port features for unique slots. Caller holds _lock."""
+        # portless packets (ICMP, later fragments) leave the sketch untouched,
+        # exactly as in _port_update_one
+        has_port = service > 0
+        if not has_port.all():
+            scores = np.zeros(len(slots), dtype=np.float64)
+            if has_port.any():
+                scores[has_port] = self._port_update(slots[has_port], ts[has_port],
+                                                     service[has_port], proto[has_port])
+            return scores
+        stale = ts - self.fanout_start[slots] > self.FANOUT_WINDOW
+        if stale.any():
+            reset = slots[stale]
+            self.fanout_bits[reset] = 0
+            self.fanout_count[reset] = 0
+            self.fanout_start[reset] = ts[stale]
+
+        bucket = _port_bucket(service, proto)
+        word = bucket >> 6
+        mask = np.left_shift(np.uint64(1), (bucket & 63).astype(np.uint64))
+        old = self.fanout_bits[slots, word]
+        fresh = (old & mask) == 0
+        self.fanout_bits[slots, word] = old | mask
+        count = self.fanout_count[slots] + fresh
+        self.fanout_count[slots] = count
+
+        ramp = (self._fanout_estimate(count) - self.FANOUT_MIN) / (self.FANOUT_FULL - self.FANOUT_MIN)
+        score = self.FANOUT_WEIGHT * np.clip(ramp, 0.0, 1.0)
+        if self.normal_ports:
+            normal_bits = np.frombuffer(self._normal_bits, dtype=np.uint8)
+            unusual = ((normal_bits[service >> 3] >> (service & 7)) & 1) == 0
+            score += np.where(unusual, self.UNUSUAL_PORT_BONUS, 0.0)
+        return np.minimum(score, 1.0)
+
+    def _port_update_one(self, slot, ts, service, proto):
+        """Scalar twin of _port_update."""
+        if service <= 0:
+            return 0.0
+        if ts - self.fanout_start.item(slot) > self.FANOUT_WINDOW:
+            self.fanout_bits[slot] = 0
+            self.fanout_count[slot] = 0
+            self.fanout_start[slot] = ts
+        bucket = _port_bucket(service, proto)
+        word, bit = bucket >> 6, bucket & 63
+        old = self.fanout_bits.item(slot, word)
+        count = self.fanout_count.item(slot)
+        if not old >> bit & 1:
+            self.fanout_bits[slot, word] = old | (1 << bit)
+            count += 1
+            self.fanout_count[slot] = count
 
+        score = 0.0
+        if count > self.FANOUT_MIN:
+            m = self.SKETCH_BITS
+            estimate = -m * math.log((m - min(count, m - 1)) / m)
+            ramp = (estimate - self.FANOUT_MIN) / (self.FANOUT_FULL - self.FANOUT_MIN)
+            score = self.FANOUT_WEIGHT * min(max(ramp, 0.0), 1.0)
+        if self.normal_ports and not self.is_normal_port(service):
+            score += self.UNUSUAL_PORT_BONUS
+        return min(score, 1.0)
+
+    @staticmethod
+    def service_port(sport, dport):
+        """The server-side port of a packet: the lower of the two (0 when neither is set)."""
+        if sport and dport:
+            return min(sport, dport)
+        return sport or dport
+
+    def port_score(self, ip, sport, dport, proto=6, ts=None):
+        """
+        Port features for one packet (not cached: every packet must reach the sketch).
+        Returns a float between 0.0 and 1.0 to add to the behavior score.
+        """
+        now = time.time() if ts is None else ts
+        service = self.service_port(sport, dport)
+        with self._lock:
+            self._rebase(now)
+            slot = self._slot(ip, now)
+            if slot is None:
+                return 0.0
+            score = self._port_update_one(slot, now, service, proto)
         return round(score, 2)
 
+    # -------------------------------
+    # interval scoring API
+    # -------------------------------
+    def calculate_threat_score(self, ip, ts=None):
+        """
+        Compute the threat score for one packet from ip seen at ts (defaults to now).
+        Returns a float between 0.0 and 1.0.
+        """
+        now = time.time() if ts is None else ts
+        with self._lock:
+            self._rebase(now)
+            self._update_learning(now)
+            if now >= self._next_sweep:
+                self._sweep(now)
+            slot = self._slot(ip, now)
+            if slot is None:
+                return 0.0
+            score = self._score_update_one(slot, now)
+        return round(score, 2)
+
+    def score_many(self, ips, timestamps, sports=None, dports=None, protos=None):
+        """
+        Score a batch of packets in one pass. Returns a float array of scores
+        (rounded to 2 decimals) aligned with ips. Packets from the same IP are
+        applied in timestamp order, exactly as sequential calls would be.
+        With sports/dports the port features are added as port_score() would.
+        """
+        ts = np.asarray(timestamps, dtype=np.float64)
+        service = proto = None
+        if sports is not None and dports is not None:
+            sp = np.asarray(sports, dtype=np.int64)
+            dp = np.asarray(dports, dtype=np.int64)
+            service = np.where((sp > 0) & (dp > 0), np.minimum(sp, dp), np.maximum(sp, dp))
+            proto = np.zeros(len(ts), dtype=np.int64) if protos is None else np.asarray(protos, dtype=np.int64)
+        scores = np.zeros(len(ts), dtype=np.float64)
+        if not len(ts):
+            return scores
+        with self._lock:
+            now = float(ts.max())
+            self._rebase(float(ts.min()))
+            self._update_learning(float(ts.min()))
+            if now >= self._next_sweep:
+                self._sweep(now)
+            # slots handed out earlier in this batch are pinned, so a forced
+            # sweep cannot free them and hand the same slot to another IP
+            pinned = set()
+            slots = np.empty(len(ts), dtype=np.int64)
+            for i, ip in enumerate(ips):
+                slot = self._slot(ip, now, pinned)
+                if slot is None:
+                    slot = -1  # table full: left unscored
+                else:
+                    pinned.add(slot)
+                slots[i] = slot
+            parts = [np.flatnonzero(slots >= 0)]
+            if self.learning_mode:
+                # packets past the learning period are scored after the switch,
+                # as sequential calls would be
+                keep = parts[0]
+                early = ts[keep] - self.learning_start <= self.learning_period
+                parts = [keep[early], keep[~early]]
+            for part in parts:
+                if not len(part):
+                    continue
+                self._update_learning(float(ts[part].max()))
+                scores[part] = self._score_batch(slots[part], ts[part],
+                                                 None if service is None else service[part],
+                                                 None if service is None else proto[part])
+        return scores
+
+    def _score_batch(self, slots, ts, service, proto):
+        """Sequential-equivalent scoring of a batch with resolved slots. Caller holds _lock."""
+        scores = np.zeros(len(ts), dtype=np.float64)
+        if not len(ts):
+            return scores
+        # k-th packet of every IP is scored in round k, so each round has unique slots
+        order = np.lexsort((ts, slots))
+        sorted_slots = slots[order]
+        starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        for r in range(int(rank.max()) + 1):
+            idx = order[rank == r]
+            scores[idx] = np.round(self._score_update(slots[idx], ts[idx]), 2)
+            if service is not None:
+                ports = self._port_update(slots[idx], ts[idx], service[idx], proto[idx])
+                scores[idx] = np.minimum(scores[idx] + np.round(ports, 2), 1.0)
+        return np.round(scores, 2)
+
+    # -------------------------------
+    # warm start: snapshots + profile
+    # -------------------------------
+    def load_profile(self, path):
+        """Load normal_ports from a network profile JSON; returns True if loaded."""
+        try:
+            with open(path, "r") as f:
+                ports = json.load(f).get("normal_ports", [])
+        except (OSError, ValueError) as e:
+            print(f"[DETECTOR] Cannot load profile {path}: {e}")
+            return False
+        self.normal_ports = frozenset(int(p) for p in ports if 0 <= int(p) <= 65535)
+        bits = bytearray(65536 // 8)
+        for port in self.normal_ports:
+            bits[port >> 3] |= 1 << (port & 7)
+        self._normal_bits = bits
+        return bool(self.normal_ports)
+
+    def _subnet_baselines(self, ips, count, mean, var):
+        """Average the per-IP baselines of every /24 (IPs with at least two packets)."""
+        keys, rows = [], []
+        for i, ip in enumerate(ips):
+            key = _subnet(ip) if ip is not None and count[i] > 1 else None
+            if key is not None:
+                keys.append(key)
+                rows.append(i)
+        if not rows:
+            return [], np.zeros(0), np.zeros(0)
+        subnets, inverse = np.unique(np.array(keys), return_inverse=True)
+        n = np.bincount(inverse)
+        rows = np.array(rows)
+        return (subnets.tolist(),
+                np.bincount(inverse, weights=mean[rows]) / n,
+                np.bincount(inverse, weights=var[rows]) / n)
+
+    def save_snapshot(self, path=None):
+        """Copy the model under the lock, then write it to disk without holding it."""
+        path = path or self.snapshot_path
+        with self._lock:
+            used = len(self._ips)
+            ips = list(self._ips)
+            count = self.count[:used].copy()
+            mean = self.mean[:used].copy()
+            var = self.var[:used].copy()
+            last_seen = self.last_seen[:used].copy()
+        live = np.array([ip is not None and c > 0 for ip, c in zip(ips, count)], dtype=bool)
+        subnets, subnet_mean, subnet_var = self._subnet_baselines(ips, count, mean, var)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, version=np.array([1]),
+                         ips=_pack_strings(ip for ip, keep in zip(ips, live) if keep),
+                         count=count[live], mean=mean[live], var=var[live], last_seen=last_seen[live],
+                         subnets=_pack_strings(subnets), subnet_mean=subnet_mean, subnet_var=subnet_var)
+            os.replace(tmp, path)
+            self.snapshots_written += 1
+        except OSError as e:
+            print(f"[DETECTOR] Failed to write snapshot: {e}")
+
+    def load_snapshot(self, path):
+        """Restore per-IP and per-/24 baselines; returns True if anything was loaded."""
+        if not os.path.exists(path):
+            return False
+        t0 = time.perf_counter()
+        try:
+            with np.load(path) as data:
+                ips = _unpack_strings(data["ips"])
+                count, mean, var = data["count"], data["mean"], data["var"]
+                last_seen = data["last_seen"]
+                subnets = _unpack_strings(data["subnets"])
+                priors = dict(zip(subnets, zip(data["subnet_mean"].tolist(), data["subnet_var"].tolist())))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[DETECTOR] Ignoring unreadable snapshot {path}: {e}")
+            return False
+        n = min(len(ips), self.max_ips)
+        with self._lock:
+            capacity = max(len(self.count), n)
+            self._alloc(capacity)
+            self.count[:n] = count[:n]
+            self.mean[:n] = mean[:n]
+            self.var[:n] = var[:n]
+            self.last_seen[:n] = last_seen[:n]
+            # rebased onto the first scored packet's timestamp (see _rebase)
+            self._snapshot_ts = float(last_seen[:n].max()) if n else None
+            self._ips = ips[:n]
+            self._slots = {ip: i for i, ip in enumerate(self._ips)}
+            self._free = []
+            self.subnet_priors = priors
+        print(f"[DETECTOR] Loaded baselines for {n} IPs / {len(priors)} subnets "
+              f"in {(time.perf_counter() - t0) * 1000:.1f} ms.")
+        return n > 0 or bool(priors)
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            self.save_snapshot()
+
+    def close(self):
+        """Stop the snapshot thread and write a final snapshot."""
+        self._stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=5)
+            self._snapshot_thread = None
+        if self.snapshot_path:
+            self.save_snapshot()
+
     def get_status(self):
         """Return current mode and remaining time (for UI)."""
         if self.learning_mode:
-            remaining = max(0, int(self.learning_period - (time.time() - self.learning_start)))
+            if self.learning_start is None:
+                return {"mode": "Learning", "time_remaining": self.learning_period}
+            elapsed = self.last_ts - self.learning_start
+            remaining = max(0, int(self.learning_period - elapsed))
             return {"mode": "Learning", "time_remaining": remaining}
         else:
             return {"mode": "Monitoring"}
+
+    def stats(self):
+        with self._lock:
+            return {"tracked_ips": len(self._slots), "capacity": len(self.count),
+                    "evicted": self.evicted, "unscored": self.unscored,
+                    "learning": self.learning_mode,
+                    "subnet_priors": len(self.subnet_priors),
+                    "normal_ports": len(self.normal_ports),
+                    "snapshots_written": self.snapshots_written}
@@ -0,0 +1,195 @@
+# baseline_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# stat metadata kept next to each digest so unchanged files are not re-read;
+# `hash` is the raw 32-byte sha256 digest
+FileRecord = namedtuple("FileRecord", "size mtime_ns inode hash")
+
+
+def _record_from_json(value):
+    # legacy baselines stored only the hex digest; those entries get rehashed once
+    if isinstance(value, str):
+        return FileRecord(None, None, None, bytes.fromhex(value))
+    size, mtime_ns, inode, digest = value
+    return FileRecord(size, mtime_ns, inode, bytes.fromhex(digest))
+
+
+class JsonBaselineStore:
+    """
+    Original baseline format: one JSON object of path -> [size, mtime_ns, inode, hex].
+    Every update rewrites the whole file, so it is only suited to small trees.
+    """
+    kind = "json"
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        return {os.path.normcase(k): _record_from_json(v) for k, v in data.items()}
+
+    def save_all(self, records):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({k: [r.size, r.mtime_ns, r.inode, r.hash.hex()] for k, r in records.items()},
+                      f, indent=2)
+        os.replace(tmp, self.path)
+
+    def update(self, records, put=(), delete=()):
+        """Apply single-entry changes; JSON has to rewrite the full snapshot."""
+        self.save_all(records)
+
+    def close(self):
+        pass
+
+
+class SQLiteBaselineStore:
+    """
+    Compact baseline store in SQLite:
+    - directory prefixes are stored once in `dirs`, files reference them by id
+    - digests are raw 32-byte BLOBs, stat fields are integers
+    - `files` is a WITHOUT ROWID table clustered on (dir_id, name)
+    - load() streams rows from a cursor instead of parsing one big document
+    - update() upserts / deletes single entries in one small transaction
+    - a `meta` row written by save_all() marks the store as a baseline, so a
+      legitimately empty baseline is not mistaken for a missing one
+    """
+    kind = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS dirs (
+            id   INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            dir_id   INTEGER NOT NULL,
+            name     TEXT NOT NULL,
+            size     INTEGER,
+            mtime_ns INTEGER,
+            inode    INTEGER,
+            digest   BLOB NOT NULL,
+            PRIMARY KEY (dir_id, name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    CHUNK = 2000
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._dir_ids = {}
+        self._lock = threading.Lock()
+
+    def exists(self):
+        if not os.path.exists(self.path):
+            return False
+        with self._lock:
+            db = self._db()
+            # stores written before the meta table only count when non-empty
+            return (db.execute("SELECT 1 FROM meta WHERE key = 'saved'").fetchone() is not None
+                    or db.execute("SELECT 1 FROM files LIMIT 1").fetchone() is not None)
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._dir_ids = {p: i for i, p in self._conn.execute("SELECT id, path FROM dirs")}
+        return self._conn
+
+    def _rows(self, db, items, known, added):
+        """
+        Row tuples for items. Directories missing from `known` are inserted and
+        recorded in `added`, which the caller merges into _dir_ids only once
+        the transaction has committed (a rollback would orphan those ids).
+        """
+        for path, r in items:
+            directory, name = os.path.split(path)
+            dir_id = known.get(directory)
+            if dir_id is None:
+                dir_id = added.get(directory)
+                if dir_id is None:
+                    dir_id = db.execute("INSERT INTO dirs (path) VALUES (?)", (directory,)).lastrowid
+                    added[directory] = dir_id
+            yield (dir_id, name, r.size, r.mtime_ns, r.inode, r.hash)
+
+    def iter_records(self):
+        """
+        Stream (norm_path, FileRecord) without materialising the whole table.
+        Rows come from a separate read connection (a consistent WAL snapshot),
+        so a slow or abandoned consumer never holds up writers.
+        """
+        with self._lock:
+            self._db()  # make sure the schema exists
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("BEGIN")  # one snapshot for dirs + files
+            # prefix strings are built once per directory, not once per file
+            dirs = {i: p + os.sep if p and not p.endswith(os.sep) else p
+                    for i, p in conn.execute("SELECT id, path FROM dirs")}
+            make = FileRecord._make
+            cur = conn.execute("SELECT dir_id, name, size, mtime_ns, inode, digest FROM files")
+            while True:
+                rows = cur.fetchmany(self.CHUNK)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dirs[row[0]] + row[1], make(row[2:])
+        finally:
+            conn.close()
+
+    def load(self):
+        return dict(self.iter_records())
+
+    def save_all(self, records):
+        with self._lock:
+            db = self._db()
+            dir_ids = {}
+            with db:
+                db.execute("DELETE FROM files")
+                db.execute("DELETE FROM dirs")
+                db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                               self._rows(db, records.items(), {}, dir_ids))
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('saved', ?)", (str(time.time()),))
+            self._dir_ids = dir_ids
+
+    def update(self, records, put=(), delete=()):
+        """Upsert the `put` paths (taken from records) and remove the `delete` paths."""
+        with self._lock:
+            db = self._db()
+            added = {}
+            with db:
+                db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                               self._rows(db, ((p, records[p]) for p in put), self._dir_ids, added))
+                for path in delete:
+                    directory, name = os.path.split(path)
+                    dir_id = self._dir_ids.get(directory)
+                    if dir_id is not None:
+                        db.execute("DELETE FROM files WHERE dir_id = ? AND name = ?", (dir_id, name))
+            self._dir_ids.update(added)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def open_store(path):
+    """Pick the store from the baseline file extension (.db/.sqlite -> SQLite, else JSON)."""
+    if os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteBaselineStore(path)
+    return JsonBaselineStore(path)
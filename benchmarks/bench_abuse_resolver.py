@@ -0,0 +1,104 @@
+# benchmarks/bench_abuse_resolver.py
+"""
+Packet-path cost of AbuseIPDB reputation checks, against the local mock.
+
+Replays a packet stream over a small set of external IPs (so the same IP
+repeats, as in real traffic) and compares:
+  - blocking: one requests.get per check (the previous ThreatIntel path)
+  - resolver: AbuseResolver.get() - cached score or provisional None
+Reports per-check latency on the packet path and how many HTTP requests
+reached the server.
+
+    python benchmarks/bench_abuse_resolver.py [--packets 2000 --ips 50 --latency 0.05]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from abuse_resolver import AbuseResolver  # noqa: E402
+from mock_abuseipdb import MockAbuseIPDB  # noqa: E402
+
+
+def packet_ips(packets, ips, seed=1):
+    rng = random.Random(seed)
+    pool = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+            for _ in range(ips)]
+    return [rng.choice(pool) for _ in range(packets)]
+
+
+def blocking_lookup(url, ip):
+    r = requests.get(url, headers={"Key": "bench", "Accept": "application/json"},
+                     params={"ipAddress": ip, "maxAgeInDays": "90"}, timeout=6)
+    return r.json()["data"]["abuseConfidenceScore"] / 100.0
+
+
+def report(name, samples, requests_made, extra=""):
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1e6
+    print(f"{name:<10} {sum(samples):>9.3f} {p50:>10.1f} {p99:>10.1f} {requests_made:>9} {extra}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--packets", type=int, default=2000)
+    ap.add_argument("--ips", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.05, help="mock server delay per request")
+    args = ap.parse_args()
+
+    stream = packet_ips(args.packets, args.ips)
+    server = MockAbuseIPDB(latency=args.latency).start()
+    workdir = tempfile.mkdtemp(prefix="aura-abuse-bench-")
+    try:
+        print(f"{args.packets:,} checks over {args.ips} IPs, server latency {args.latency * 1000:.0f} ms")
+        print(f"{'path':<10} {'total s':>9} {'p50 us':>10} {'p99 us':>10} {'requests':>9}")
+
+        # the blocking path pays the full round trip per check, so only a prefix is timed
+        sample = stream[:min(len(stream), 200)]
+        samples = []
+        for ip in sample:
+            t0 = time.perf_counter()
+            blocking_lookup(server.url, ip)
+            samples.append(time.perf_counter() - t0)
+        report("blocking", samples, server.requests, f"(first {len(sample)} checks)")
+
+        server.requests = 0
+        resolver = AbuseResolver("bench", base_url=server.url,
+                                 cache_path=os.path.join(workdir, "abuse_cache.db"))
+        for label in ("cold", "warm"):
+            samples, provisional = [], 0
+            for ip in stream:
+                t0 = time.perf_counter()
+                if resolver.get(ip) is None:
+                    provisional += 1
+                samples.append(time.perf_counter() - t0)
+            # let the background lookups land before reporting / the next pass
+            for ip in set(stream):
+                resolver.resolve(ip).result()
+            report(label, samples, server.requests, f"(provisional {provisional})")
+        resolver.close()
+        print(f"resolver stats: {resolver.stats()}")
+
+        # warm restart: everything comes from the persistent cache
+        server.requests = 0
+        resolver = AbuseResolver("bench", base_url=server.url,
+                                 cache_path=os.path.join(workdir, "abuse_cache.db"))
+        hits = sum(resolver.get(ip) is not None for ip in stream)
+        resolver.close()
+        print(f"after restart: {hits}/{len(stream)} served from cache, {server.requests} requests")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_baseline_store.py
+"""
+Compare the JSON and SQLite integrity baseline stores on a synthetic baseline:
+file size, full load time and Python heap peak while loading, plus the cost of
+accepting a single changed entry.
+
+    python benchmarks/bench_baseline_store.py [--files 300000]
+"""
+import argparse
+import gc
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from baseline_store import FileRecord, JsonBaselineStore, SQLiteBaselineStore  # noqa: E402
+
+
+def synthetic_records(n):
+    records = {}
+    for i in range(n):
+        path = os.path.join("/srv", "app", f"pkg{i // 5000:03d}", f"mod{(i // 100) % 50:02d}", f"file{i:07d}.py")
+        records[os.path.normcase(path)] = FileRecord(
+            1000 + i % 50000, 1700000000000000000 + i, 10_000_000 + i,
+            hashlib.sha256(str(i).encode()).digest())
+    return records
+
+
+def measure(store):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    loaded = store.load()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return loaded, elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=300000)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aura-baseline-bench-")
+    try:
+        records = synthetic_records(args.files)
+        stores = [JsonBaselineStore(os.path.join(workdir, "baseline.json")),
+                  SQLiteBaselineStore(os.path.join(workdir, "baseline.db"))]
+        print(f"{args.files:,} entries")
+        print(f"{'store':<8} {'save s':>8} {'size MB':>9} {'load s':>8} {'heap peak MB':>13} {'accept 1 ms':>12}")
+        for store in stores:
+            t0 = time.perf_counter()
+            store.save_all(records)
+            save_s = time.perf_counter() - t0
+            size_mb = os.path.getsize(store.path) / 2**20
+
+            loaded, load_s, peak = measure(store)
+            assert loaded == records
+
+            path = next(iter(records))
+            records[path] = records[path]._replace(hash=b"\x00" * 32)
+            t0 = time.perf_counter()
+            store.update(records, put=[path])
+            accept_ms = (time.perf_counter() - t0) * 1000
+            store.close()
+
+            print(f"{store.kind:<8} {save_s:>8.2f} {size_mb:>9.1f} {load_s:>8.2f} "
+                  f"{peak / 2**20:>13.1f} {accept_ms:>12.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
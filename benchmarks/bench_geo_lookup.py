@@ -0,0 +1,90 @@
+# benchmarks/bench_geo_lookup.py
+"""
+GeoLocator lookups/sec with and without the per-network-block cache, plus
+the private-address check (ipaddress parsing vs integer range check).
+
+Uses a real GeoLite2 database with --db, otherwise writes a synthetic one.
+Lookups draw from a fixed pool of addresses concentrated in a few blocks,
+like live traffic where many hosts share a provider's /24.
+
+    python benchmarks/bench_geo_lookup.py [--db GeoLite2-City.mmdb] [--lookups 200000]
+"""
+import argparse
+import contextlib
+import io
+import ipaddress
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from geolocation_service import GeoLocator, is_private_ip  # noqa: E402
+from mmdb_fixture import synthetic_networks, write_city_db  # noqa: E402
+
+
+def address_pool(networks, ips, seed):
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(ips):
+        if networks and rng.random() < 0.9:
+            net = ipaddress.IPv4Network(rng.choice(networks))
+            pool.append(str(net.network_address + rng.randrange(net.num_addresses)))
+        else:
+            pool.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+    return pool
+
+
+def rate(fn, stream):
+    t0 = time.perf_counter()
+    for ip in stream:
+        fn(ip)
+    elapsed = time.perf_counter() - t0
+    return len(stream) / elapsed, elapsed / len(stream) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", help="GeoLite2-City.mmdb to use instead of a synthetic database")
+    ap.add_argument("--networks", type=int, default=20000, help="blocks in the synthetic database")
+    ap.add_argument("--ips", type=int, default=20000, help="distinct addresses in the lookup pool")
+    ap.add_argument("--lookups", type=int, default=200000)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aura-geo-bench-")
+    try:
+        if args.db:
+            db, networks = args.db, []
+        else:
+            db = os.path.join(workdir, "bench-city.mmdb")
+            nets = synthetic_networks(args.networks)
+            write_city_db(db, nets)
+            # traffic concentrates on a few hundred provider blocks
+            networks = [n[0] for n in nets[:300]]
+        rng = random.Random(2)
+        pool = address_pool(networks, args.ips, seed=1)
+        stream = [rng.choice(pool) for _ in range(args.lookups)]
+
+        print(f"{args.lookups:,} lookups over {len(set(stream)):,} addresses ({'db ' + args.db if args.db else 'synthetic db'})")
+        print(f"{'path':<28} {'lookups/s':>12} {'us/lookup':>10}")
+        for label, cache in (("reader.city() every call", False), ("network-block cache", True)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                geo = GeoLocator(db, cache=cache)
+            per_sec, us = rate(geo.get_location, stream)
+            extra = f"  blocks={geo.stats()['blocks']} hit_ratio={geo.stats()['hit_ratio']}" if cache else ""
+            print(f"{label:<28} {per_sec:>12,.0f} {us:>10.2f}{extra}")
+
+        per_sec, us = rate(lambda ip: ipaddress.ip_address(ip).is_private, stream)
+        print(f"{'is_private via ipaddress':<28} {per_sec:>12,.0f} {us:>10.2f}")
+        per_sec, us = rate(is_private_ip, stream)
+        print(f"{'is_private integer check':<28} {per_sec:>12,.0f} {us:>10.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
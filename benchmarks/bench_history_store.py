@@ -0,0 +1,98 @@
+# benchmarks/bench_history_store.py
+"""
+HistoryStore write throughput and query latency over a large history.
+
+Generates --rows synthetic verdicts spread over --days daily partitions
+(a few thousand external IPs, a couple of hundred countries, mostly low
+scores), writes them through the batched write path, then times the
+forensic queries the /history endpoints run.
+
+    python benchmarks/bench_history_store.py [--rows 2000000 --days 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore  # noqa: E402
+
+
+def verdicts(rows, days, seed=1):
+    rng = random.Random(seed)
+    now = time.time()
+    ips = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+           for _ in range(5000)]
+    countries = [f"Country{i}" for i in range(200)]
+    span = days * 86400
+    for i in range(rows):
+        score = round(min(1.0, rng.expovariate(12)), 2)
+        yield {"ts": now - span + span * i / rows, "external_ip": rng.choice(ips),
+               "src_ip": "10.0.0.5", "dst_ip": rng.choice(ips), "country": rng.choice(countries),
+               "score": score, "blocked": score >= 0.6, "lat": 0.0, "lon": 0.0}
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<44} {best * 1000:>9.2f} ms  ({len(result)} rows)")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2000000)
+    ap.add_argument("--days", type=int, default=3)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aura-history-bench-")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            store = HistoryStore(os.path.join(workdir, "history"), retention_days=args.days + 1)
+        rows = list(verdicts(args.rows, args.days))
+        t0 = time.perf_counter()
+        enqueue = 0.0
+        for i in range(0, len(rows), store.batch_size):
+            # pace the producer to the writer so the benchmark measures throughput, not drops
+            while store.stats()["buffered"] > store.batch_size * 4:
+                time.sleep(0.01)
+            t1 = time.perf_counter()
+            for v in rows[i:i + store.batch_size]:
+                store.record(v)
+            enqueue += time.perf_counter() - t1
+        while store.written + store.dropped < args.rows:
+            time.sleep(0.05)
+        total = time.perf_counter() - t0
+        stats = store.stats()
+        print(f"record(): {enqueue / args.rows * 1e6:.2f} us/row on the caller's thread")
+        print(f"written {stats['written']:,} rows in {total:.1f}s ({stats['written'] / total:,.0f} rows/s), "
+              f"{stats['partitions']} partitions, {stats['bytes_on_disk'] / 1e6:.0f} MB, dropped {stats['dropped']}")
+
+        now = time.time()
+        sample = rows[len(rows) // 2]
+        print(f"\n{'query':<44} {'best of 5':>12}")
+        timed("latest 1000 (no filter)", lambda: store.query(limit=1000))
+        timed("last hour, limit 1000", lambda: store.query(start=now - 3600, limit=1000))
+        timed("one IP, all time", lambda: store.query(ip=sample["external_ip"], limit=100000))
+        timed("one country, last 24h, limit 1000", lambda: store.query(country="Country7", start=now - 86400))
+        timed("score >= 0.6, all time, limit 1000", lambda: store.query(min_score=0.6))
+        timed("score >= 0.9, all time, limit 100000", lambda: store.query(min_score=0.9, limit=100000))
+        timed("top countries, last 24h", lambda: store.count(start=now - 86400), repeat=1)
+        timed("top IPs with score >= 0.6, all time", lambda: store.count(group_by="external_ip", min_score=0.6),
+              repeat=1)
+        store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_integrity_hashing.py
+"""
+Baseline creation time for FileIntegrityMonitor at different hash_workers
+settings, on a generated tree of many small files plus a few huge ones.
+
+    python benchmarks/bench_integrity_hashing.py [--small 20000] [--huge 3] [--huge-mb 256]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrity_monitor import FileIntegrityMonitor  # noqa: E402
+
+
+def generate_tree(root, small, huge, huge_mb):
+    per_dir = 200
+    for i in range(small):
+        d = os.path.join(root, f"d{i // per_dir:04d}")
+        if i % per_dir == 0:
+            os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f"f{i:06d}.txt"), "wb") as f:
+            f.write(os.urandom(256 + (i * 37) % 8192))
+    block = os.urandom(1024 * 1024)
+    for i in range(huge):
+        with open(os.path.join(root, f"huge{i}.bin"), "wb") as f:
+            for _ in range(huge_mb):
+                f.write(block)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--small", type=int, default=20000)
+    ap.add_argument("--huge", type=int, default=3)
+    ap.add_argument("--huge-mb", type=int, default=256)
+    ap.add_argument("--workers", default="1,2,4,8")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aura-fim-bench-")
+    tree = os.path.join(workdir, "tree")
+    os.makedirs(tree)
+    try:
+        print(f"Generating {args.small} small files + {args.huge} x {args.huge_mb} MB ...")
+        generate_tree(tree, args.small, args.huge, args.huge_mb)
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>10} {'MB/s':>8}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            baseline = os.path.join(workdir, f"baseline_{workers}.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                monitor = FileIntegrityMonitor(baseline_path=baseline, watch_dirs=[tree],
+                                               hash_workers=workers)
+                t0 = time.perf_counter()
+                monitor.create_baseline()
+                elapsed = time.perf_counter() - t0
+            stats = monitor.last_scan_stats
+            print(f"{workers:>8} {elapsed:>9.2f} {stats['files'] / elapsed:>10,.0f} "
+                  f"{stats['bytes_hashed'] / elapsed / 2**20:>8.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_intel_startup.py
+"""
+ThreatIntel start-up time: synchronous feed download (previous behaviour)
+versus the cached FeedManager start, against a local feed server that
+serves two DROP-style lists with a configurable delay and ETag support.
+
+    python benchmarks/bench_intel_startup.py [--entries 1500 --latency 1.0]
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_manager import FeedManager  # noqa: E402
+from prefix_index import PrefixIndex  # noqa: E402
+from threat_intel_service import ThreatIntel  # noqa: E402
+
+
+def drop_list(n, seed):
+    rng = random.Random(seed)
+    lines = ["; synthetic DROP list"]
+    for i in range(n):
+        lines.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.0/24 ; SBL{i}")
+    return "\n".join(lines) + "\n"
+
+
+class FeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, bodies, latency):
+        super().__init__(("127.0.0.1", 0), _FeedHandler)
+        self.bodies = bodies
+        self.latency = latency
+        self.hits = {"200": 0, "304": 0}
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}"
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.server.bodies.get(self.path.lstrip("/"))
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        time.sleep(self.server.latency)
+        etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.hits["304"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.server.hits["200"] += 1
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=1500, help="entries per feed")
+    ap.add_argument("--latency", type=float, default=1.0, help="server delay per request (seconds)")
+    args = ap.parse_args()
+
+    server = FeedServer({"drop.txt": drop_list(args.entries, 1), "edrop.txt": drop_list(args.entries // 10, 2)},
+                        args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    class LocalIntel(ThreatIntel):
+        SPAMHAUS_URLS = [server.url("drop.txt"), server.url("edrop.txt")]
+
+    workdir = tempfile.mkdtemp(prefix="aura-feed-bench-")
+    cache_dir = os.path.join(workdir, "feed_cache")
+    try:
+        print(f"2 feeds ({args.entries} + {args.entries // 10} entries), server latency {args.latency * 1000:.0f} ms")
+
+        def sync_start():
+            manager = FeedManager(LocalIntel.SPAMHAUS_URLS, cache_dir=os.path.join(workdir, "unused"))
+            manager.refresh()
+            return PrefixIndex(manager.entries())
+        index, ms = timed(sync_start)
+        print(f"sync fetch + index (previous start-up):  {ms:9.1f} ms  ({len(index)} prefixes)")
+
+        intel, ms = timed(lambda: LocalIntel(fetch=True, feed_cache_dir=cache_dir))
+        print(f"cold start, empty cache:                 {ms:9.1f} ms  ({len(intel.bad_index)} prefixes at return)")
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            while len(intel.bad_index) == 0 and time.perf_counter() - t0 < 30:
+                time.sleep(0.01)
+        print(f"  ... background refresh swapped in after {(time.perf_counter() - t0) * 1000:.0f} ms "
+              f"({len(intel.bad_index)} prefixes)")
+        with contextlib.redirect_stdout(io.StringIO()):
+            intel.close()
+
+        intel, ms = timed(lambda: LocalIntel(fetch=True, feed_cache_dir=cache_dir))
+        print(f"warm start from feed cache:              {ms:9.1f} ms  ({len(intel.bad_index)} prefixes at return)")
+
+        changed, ms = timed(intel.feeds.refresh)
+        print(f"conditional refresh, feeds unchanged:    {ms:9.1f} ms  (changed={changed}, "
+              f"server answers {server.hits})")
+        with contextlib.redirect_stdout(io.StringIO()):
+            intel.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
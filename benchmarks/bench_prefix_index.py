@@ -0,0 +1,84 @@
+# benchmarks/bench_prefix_index.py
+"""
+Micro-benchmark for PrefixIndex lookups.
+
+Builds indexes of growing size from random IPv4/IPv6 prefixes and reports
+per-lookup latency, which should stay flat (O(log N)) as the list grows.
+The old per-packet linear scan is timed on the small sizes for comparison.
+
+    python benchmarks/bench_prefix_index.py [--lookups 200000]
+"""
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefix_index import PrefixIndex  # noqa: E402
+
+
+def random_prefixes(n, rng):
+    out = []
+    for i in range(n):
+        if i % 10 == 0:
+            addr = rng.getrandbits(128)
+            plen = rng.randint(32, 64)
+            out.append(str(ipaddress.IPv6Network((addr >> (128 - plen) << (128 - plen), plen))))
+        else:
+            addr = rng.getrandbits(32)
+            plen = rng.randint(16, 32)
+            out.append(str(ipaddress.IPv4Network((addr >> (32 - plen) << (32 - plen), plen))))
+    return out
+
+
+def linear_scan(entries, ip):
+    addr = ipaddress.ip_address(ip)
+    for entry in entries:
+        if addr in ipaddress.ip_network(entry, strict=False):
+            return True
+    return False
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lookups", type=int, default=200000)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    probes = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups)]
+    probe_ints = [int(ipaddress.IPv4Address(p)) for p in probes]
+
+    print(f"{'prefixes':>10} {'build ms':>10} {'ns/lookup':>10} {'ns/lookup(str)':>15} {'linear ns':>12}")
+    for n in (1000, 10000, 100000, 250000):
+        entries = random_prefixes(n, rng)
+
+        t0 = time.perf_counter()
+        index = PrefixIndex(entries)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for v in probe_ints:
+            index.contains_int(v, 4)
+        int_ns = (time.perf_counter() - t0) / len(probe_ints) * 1e9
+
+        t0 = time.perf_counter()
+        for p in probes:
+            index.contains(p)
+        str_ns = (time.perf_counter() - t0) / len(probes) * 1e9
+
+        linear = "-"
+        if n <= 1000:
+            sample = probes[:200]
+            t0 = time.perf_counter()
+            for p in sample:
+                linear_scan(entries, p)
+            linear = f"{(time.perf_counter() - t0) / len(sample) * 1e9:,.0f}"
+
+        print(f"{n:>10,} {build_ms:>10.1f} {int_ns:>10.0f} {str_ns:>15.0f} {linear:>12}")
+
+
+if __name__ == "__main__":
+    main()
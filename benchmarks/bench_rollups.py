@@ -0,0 +1,55 @@
+# benchmarks/bench_rollups.py
+"""
+RollupStore cost: record() per verdict, snapshot() cold / after the window
+moves / cached, and the /rollup payload size, for a synthetic 10-minute
+window with many distinct external IPs spread over the globe.
+
+    python benchmarks/bench_rollups.py [--verdicts 300000 --ips 50000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rollups import RollupStore  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--verdicts", type=int, default=300000)
+    ap.add_argument("--ips", type=int, default=50000)
+    ap.add_argument("--top", type=int, default=300)
+    args = ap.parse_args()
+
+    rng = random.Random(1)
+    pool = [(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+             rng.choice(("US", "CN", "RU", "DE", "BR", "IN", "NL", "FR")),
+             rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(args.ips)]
+    rollups = RollupStore()
+    window = rollups.bucket_seconds * rollups.n_buckets
+    now = time.time()
+
+    t0 = time.perf_counter()
+    for i in range(args.verdicts):
+        ip, country, lat, lon = rng.choice(pool)
+        rollups.record({"external_ip": ip, "country": country, "lat": lat, "lon": lon,
+                        "score": rng.random() ** 4, "blocked": rng.random() < 0.01},
+                       now=now - window + i * window / args.verdicts)
+    record_us = (time.perf_counter() - t0) / args.verdicts * 1e6
+    print(f"verdicts={args.verdicts}  ips={args.ips}  window={window}s  {rollups.stats()}")
+    print(f"record():            {record_us:8.2f} us/verdict")
+
+    for label, at in (("cold", now), ("cached", now + 0.1), ("window moved", now + rollups.bucket_seconds)):
+        t0 = time.perf_counter()
+        snap = rollups.snapshot(top=args.top, now=at)
+        print(f"snapshot() {label:<13} {(time.perf_counter() - t0) * 1000:8.1f} ms   "
+              f"payload {len(json.dumps(snap)) / 1024:.1f} KiB "
+              f"({len(snap['cells'])} cells, {len(snap['ips'])} ips, {len(snap['countries'])} countries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/mock_abuseipdb.py
+"""
+Local stand-in for the AbuseIPDB v2 `check` endpoint, for exercising
+AbuseResolver without spending real quota.
+
+Scores are deterministic (crc32 of the IP), responses can be delayed, and
+after --quota requests every call answers 429 with Retry-After.
+
+    python benchmarks/mock_abuseipdb.py --port 8765 --latency 0.2
+    # then: AbuseResolver(key, base_url="http://127.0.0.1:8765/api/v2/check")
+"""
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def mock_score(ip):
+    return zlib.crc32(ip.encode()) % 101
+
+
+class MockAbuseIPDB(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, quota=None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.quota = quota
+        self.requests = 0
+        self.per_ip = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v2/check"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="mock-abuseipdb", daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        ip = parse_qs(url.query).get("ipAddress", [""])[0]
+        with server._lock:
+            server.requests += 1
+            server.per_ip[ip] = server.per_ip.get(ip, 0) + 1
+            count = server.requests
+        if url.path != "/api/v2/check" or not ip or not self.headers.get("Key"):
+            self._reply(422, {"errors": [{"detail": "bad request"}]})
+            return
+        if server.quota is not None and count > server.quota:
+            self._reply(429, {"errors": [{"detail": "quota exceeded"}]},
+                        {"Retry-After": "60", "X-RateLimit-Remaining": "0"})
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        remaining = {} if server.quota is None else {"X-RateLimit-Remaining": str(server.quota - count)}
+        self._reply(200, {"data": {"ipAddress": ip, "abuseConfidenceScore": mock_score(ip)}}, remaining)
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock AbuseIPDB check endpoint.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds to delay each answer")
+    ap.add_argument("--quota", type=int, help="answer 429 after this many requests")
+    args = ap.parse_args()
+    server = MockAbuseIPDB(args.port, args.latency, args.quota)
+    print(f"Mock AbuseIPDB listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
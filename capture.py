@@ -0,0 +1,142 @@
+# capture.py
+import socket
+import struct
+import time
+
+# scapy is imported only by the scapy-based paths, so the header parsers stay
+# cheap to import (e.g. in the multicore capture workers)
+from detection_engine import PacketMeta
+
+RFC1918_NETS = ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16")
+
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+_unpack_ip = struct.Struct("!BBHHHBBH4s4s").unpack_from
+_unpack_ports = struct.Struct("!HH").unpack_from
+_unpack_u16 = struct.Struct("!H").unpack_from
+
+
+# -------------------------------
+# scapy path (full dissection)
+# -------------------------------
+def extract_meta(packet):
+    """Reduce a scapy packet to a PacketMeta, or None for non-IP traffic."""
+    from scapy.all import IP, TCP, UDP
+    if not packet.haslayer(IP):
+        return None
+    ip = packet[IP]
+    sport = dport = 0
+    if packet.haslayer(TCP):
+        sport, dport = packet[TCP].sport, packet[TCP].dport
+    elif packet.haslayer(UDP):
+        sport, dport = packet[UDP].sport, packet[UDP].dport
+    return PacketMeta(ip.src, ip.dst, ip.proto, sport, dport, ip.len, float(packet.time))
+
+
+# -------------------------------
+# kernel-side filter
+# -------------------------------
+def build_bpf_filter(blocked_ips=(), max_blocked=256):
+    """
+    BPF expression for IPv4 traffic that has at least one non-RFC1918 side.
+    Already-blocked IPs are excluded too (capped, large filters compile slowly
+    and the firewall drops that traffic anyway).
+    """
+    src_private = " or ".join(f"src net {n}" for n in RFC1918_NETS)
+    dst_private = " or ".join(f"dst net {n}" for n in RFC1918_NETS)
+    expr = f"ip and not (({src_private}) and ({dst_private}))"
+    hosts = [ip for ip in sorted(blocked_ips) if ":" not in ip][:max_blocked]
+    if hosts:
+        expr += " and not (" + " or ".join(f"host {ip}" for ip in hosts) + ")"
+    return expr
+
+
+# -------------------------------
+# fast path: header-only parsing of raw frames
+# -------------------------------
+def parse_ipv4(buf, offset, ts):
+    """Parse an IPv4 header (plus TCP/UDP ports) starting at offset in buf."""
+    if len(buf) - offset < 20:
+        return None
+    ver_ihl, _, total_len, _, frag, _, proto, _, src, dst = _unpack_ip(buf, offset)
+    ihl = ver_ihl & 0x0F
+    # a header shorter than 20 bytes or longer than the datagram is malformed
+    if ver_ihl >> 4 != 4 or ihl < 5 or ihl * 4 > total_len:
+        return None
+    sport = dport = 0
+    # ports only live in the first fragment, and must lie inside both the
+    # captured bytes and the datagram (trailing Ethernet padding is not L4)
+    if proto in (IPPROTO_TCP, IPPROTO_UDP) and not frag & 0x1FFF:
+        l4 = offset + ihl * 4
+        if min(len(buf), offset + total_len) - l4 >= 4:
+            sport, dport = _unpack_ports(buf, l4)
+    return PacketMeta(socket.inet_ntoa(src), socket.inet_ntoa(dst), proto,
+                      sport, dport, total_len, ts)
+
+
+def parse_ethernet(buf, ts):
+    """Parse an Ethernet II frame (optionally VLAN tagged) into a PacketMeta."""
+    if len(buf) < 14:
+        return None
+    offset = 12
+    ethertype = _unpack_u16(buf, offset)[0]
+    while ethertype in (ETH_P_8021Q, ETH_P_8021AD) and len(buf) >= offset + 6:
+        offset += 4
+        ethertype = _unpack_u16(buf, offset)[0]
+    if ethertype != ETH_P_IP:
+        return None
+    return parse_ipv4(buf, offset + 2, ts)
+
+
+def parse_cooked(buf, ts):
+    """Parse a Linux cooked-mode (SLL) frame, as captured on the 'any' device."""
+    if len(buf) < 16 or _unpack_u16(buf, 14)[0] != ETH_P_IP:
+        return None
+    return parse_ipv4(buf, 16, ts)
+
+
+def _parser_for(link_cls):
+    name = getattr(link_cls, "__name__", "")
+    if name == "Ether":
+        return parse_ethernet
+    if name == "CookedLinux":
+        return parse_cooked
+    if name in ("IP", "Raw"):
+        return lambda buf, ts: parse_ipv4(buf, 0, ts)
+    return None
+
+
+def fast_sniff(callback, stop_event, iface=None, bpf_filter=None, poll=0.5):
+    """
+    Capture raw frames through scapy's L2 listen socket without dissecting them,
+    parse IP/TCP/UDP headers directly and hand each PacketMeta to callback.
+    """
+    from scapy.all import conf
+    try:
+        sock = conf.L2listen(iface=iface, filter=bpf_filter)
+    except Exception as e:
+        if not bpf_filter:
+            raise
+        # e.g. libpcap/tcpdump missing: filtering then happens in process_packet
+        print(f"[CAPTURE] Could not attach BPF filter ({e}); capturing unfiltered.")
+        sock = conf.L2listen(iface=iface)
+    parsers = {}
+    try:
+        while not stop_event.is_set():
+            if not sock.select([sock], poll):
+                continue
+            link_cls, data, ts = sock.recv_raw()
+            if data is None:
+                continue
+            parser = parsers.get(link_cls)
+            if parser is None:
+                parser = parsers[link_cls] = _parser_for(link_cls) or (lambda buf, ts: None)
+            meta = parser(memoryview(data), float(ts) if ts else time.time())
+            if meta is not None:
+                callback(meta)
+    finally:
+        sock.close()
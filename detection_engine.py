@@ -0,0 +1,141 @@
+# detection_engine.py
+import time
+from collections import namedtuple
+
+from metrics import LogLimiter
+
+# Minimal per-packet record produced by the capture stage.
+PacketMeta = namedtuple("PacketMeta", "src dst proto sport dport length ts")
+
+
+class DetectionEngine:
+    """
+    The packet scoring path shared by the live sniffer and the pipeline.
+    - external_ip(): picks the non-private side, None for private<->private
+    - analyze(): intel + behavior + geo -> verdict dict (no side effects);
+                 with a flow_table only flow start / flush / threshold packets
+                 are scored, the rest only feed the behavioral detector (each
+                 event carries the flow's peak behavior score since the last)
+    - enforce(): firewall block, UI event and console log for a verdict; the
+                 log is rate-limited (log_rate OK / block_log_rate BLOCKED
+                 lines per second) so it cannot throttle the enforcement thread
+    - process(): analyze + enforce in one synchronous call
+    If stage_observer is set it is called as observer(stage, seconds) for the
+    intel / behavior (detector) / ports / geo / firewall stages (used by replay.py).
+    """
+
+    BLOCK_THRESHOLD = 0.6
+
+    def __init__(self, intel, detector, geo, firewall, cache=None, on_event=None,
+                 log_events=True, stage_observer=None, flow_table=None,
+                 log_rate=2, block_log_rate=20):
+        self.intel = intel
+        self.detector = detector
+        self.geo = geo
+        self.firewall = firewall
+        self.cache = cache
+        self.on_event = on_event
+        self.log_events = log_events
+        self.stage_observer = stage_observer
+        self.flow_table = flow_table
+        self._ok_log = LogLimiter(rate=log_rate, tag="[AURA]")
+        self._block_log = LogLimiter(rate=block_log_rate, tag="[AURA]")
+
+    def external_ip(self, meta):
+        src_private = self.geo._is_private_ip(meta.src)
+        if src_private:
+            if self.geo._is_private_ip(meta.dst):
+                return None
+            return meta.dst
+        return meta.src
+
+    def _lookup(self, ip, component, compute, cached=True):
+        observer = self.stage_observer
+        if observer is None:
+            if self.cache is None or not cached:
+                return compute()
+            return self.cache.get_or_compute(ip, component, compute)
+        t0 = time.perf_counter()
+        if self.cache is None or not cached:
+            value = compute()
+        else:
+            value = self.cache.get_or_compute(ip, component, compute)
+        observer(component, time.perf_counter() - t0)
+        return value
+
+    def analyze(self, meta, external_ip=None):
+        """Score one packet; returns a verdict dict or None if it is not scored."""
+        if external_ip is None:
+            external_ip = self.external_ip(meta)
+            if external_ip is None:
+                return None
+
+        # the detector is stateful (inter-arrival EWMA, burst bonus, port
+        # sketch): every packet must reach it, even those the flow table only
+        # counts, so it bypasses the cache and runs ahead of the flow gate
+        behavior_score = self._lookup(
+            external_ip, "behavior", lambda: self.detector.calculate_threat_score(external_ip, meta.ts),
+            cached=False)
+        behavior_score += self._lookup(
+            external_ip, "ports",
+            lambda: self.detector.port_score(external_ip, meta.sport, meta.dport, meta.proto, meta.ts),
+            cached=False)
+
+        flow = reason = None
+        if self.flow_table is not None:
+            flow, reason = self.flow_table.observe(meta)
+            if reason is None:
+                flow.peak_score = max(flow.peak_score, behavior_score)
+                return None
+            behavior_score = max(flow.peak_score, behavior_score)
+            flow.peak_score = 0.0
+
+        intel_score = self._lookup(
+            external_ip, "intel", lambda: self.intel.check_ip_reputation(external_ip))
+        final_score = min(1.0, round(intel_score + behavior_score, 2))
+
+        location = self._lookup(
+            external_ip, "geo", lambda: self.geo.get_location(external_ip))
+        country = location.get("country", "Unknown") if location else "Unknown"
+        # unknown locations stay None (not 0.0, which is a real point on the map)
+        lat = location.get("latitude") if location else None
+        lon = location.get("longitude") if location else None
+
+        verdict = {
+            "ts": meta.ts,
+            "src_ip": meta.src,
+            "dst_ip": meta.dst,
+            "external_ip": external_ip,
+            "score": final_score,
+            "country": country,
+            "lat": lat,
+            "lon": lon,
+            "blocked": final_score >= self.BLOCK_THRESHOLD
+        }
+        if flow is not None:
+            verdict["flow_event"] = reason
+            verdict["packets"] = flow.packets
+            verdict["bytes"] = flow.bytes
+        return verdict
+
+    def enforce(self, verdict):
+        """Apply a verdict: block if needed, publish the UI event, log it."""
+        if verdict["blocked"]:
+            if self.stage_observer is None:
+                self.firewall.block_ip(verdict["external_ip"])
+            else:
+                t0 = time.perf_counter()
+                self.firewall.block_ip(verdict["external_ip"])
+                self.stage_observer("firewall", time.perf_counter() - t0)
+        if self.on_event is not None:
+            self.on_event(verdict)
+        if self.log_events:
+            log = self._block_log if verdict["blocked"] else self._ok_log
+            log.log(f"[AURA] {verdict['src_ip']} → {verdict['dst_ip']} | Score={verdict['score']} | "
+                    f"{'BLOCKED' if verdict['blocked'] else 'OK'}")
+
+    def process(self, meta):
+        verdict = self.analyze(meta)
+        if verdict is not None:
+            self.enforce(verdict)
+        return verdict
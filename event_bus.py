@@ -0,0 +1,128 @@
+# event_bus.py
+import threading
+from collections import deque
+
+
+class Subscription:
+    """
+    One consumer of the EventBus (a dashboard tab, a legacy poll endpoint).
+    - bounded ring buffer: when the consumer falls behind, the oldest events
+      are dropped and counted instead of growing without limit
+    - get_batch() blocks until something arrives, then returns everything
+      queued (up to max_items) so callers ship events in batches
+    """
+
+    def __init__(self, bus, topics, maxlen):
+        self.bus = bus
+        self.topics = frozenset(topics) if topics else None
+        self.buffer = deque(maxlen=maxlen)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.delivered = 0
+        self.closed = False
+
+    def wants(self, topic):
+        return self.topics is None or topic in self.topics
+
+    def _push(self, event):
+        with self.cond:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(event)
+            self.cond.notify()
+
+    def get_batch(self, max_items=500, timeout=None):
+        """Return up to max_items (seq, topic, data) events; [] on timeout or close."""
+        with self.cond:
+            if not self.buffer and not self.closed:
+                self.cond.wait(timeout)
+            n = min(len(self.buffer), max_items)
+            batch = [self.buffer.popleft() for _ in range(n)]
+        self.delivered += len(batch)
+        return batch
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class Topic:
+    """Publisher handle for one topic; put() matches the Queue API it replaces."""
+
+    def __init__(self, bus, name):
+        self.bus = bus
+        self.name = name
+
+    def put(self, data):
+        self.bus.publish(self.name, data)
+
+
+class EventBus:
+    """
+    In-process fan-out for dashboard events:
+    - publish(topic, data) stamps each event with a global sequence number
+      and copies it into every matching subscriber's ring buffer, so tabs
+      no longer steal each other's events from one shared Queue
+    - a bounded history ring lets a reconnecting client resume from the
+      last sequence number it saw (SSE Last-Event-ID) and receive only
+      what it missed
+    - nothing accumulates when nobody is subscribed beyond the history ring
+    """
+
+    def __init__(self, history=10000, subscriber_buffer=2000):
+        self.subscriber_buffer = subscriber_buffer
+        self._history = deque(maxlen=history)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.seq = 0
+        self.published = 0
+
+    def topic(self, name):
+        return Topic(self, name)
+
+    def publish(self, topic, data):
+        with self._lock:
+            self.seq += 1
+            self.published += 1
+            event = (self.seq, topic, data)
+            self._history.append(event)
+            # delivered under the bus lock so every subscriber sees sequence order
+            for sub in self._subscribers:
+                if sub.wants(topic):
+                    sub._push(event)
+        return event[0]
+
+    def subscribe(self, topics=None, last_seq=None, maxlen=None):
+        """
+        Register a subscriber for topics (None = all). With last_seq, events
+        after it that are still in the history ring are queued first.
+        """
+        sub = Subscription(self, topics, maxlen or self.subscriber_buffer)
+        with self._lock:
+            if last_seq is not None:
+                oldest = self._history[0][0] if self._history else self.seq + 1
+                if last_seq + 1 < oldest:
+                    sub.dropped += oldest - last_seq - 1  # fell out of the history ring
+                for event in self._history:
+                    if event[0] > last_seq and sub.wants(event[1]):
+                        if len(sub.buffer) == sub.buffer.maxlen:
+                            sub.dropped += 1
+                        sub.buffer.append(event)
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+        with sub.cond:
+            sub.closed = True
+            sub.cond.notify_all()
+
+    def stats(self):
+        with self._lock:
+            subs = list(self._subscribers)
+            history = len(self._history)
+        return {"seq": self.seq, "published": self.published, "history": history,
+                "subscribers": [{"topics": sorted(s.topics) if s.topics else None,
+                                 "queued": len(s.buffer), "delivered": s.delivered,
+                                 "dropped": s.dropped} for s in subs]}
@@ -0,0 +1,225 @@
+# feed_manager.py
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+
+def parse_drop(text):
+    """Spamhaus DROP-style list: one CIDR/IP per line, ';' starts a comment."""
+    entries = set()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(";") or line.startswith("#"):
+            continue
+        entry = line.split(";")[0].split("#")[0].strip()
+        if entry:
+            entries.add(entry)
+    return entries
+
+
+class Feed:
+    """
+    One blocklist source: an http(s) URL or a local file path.
+    `name` keys the on-disk cache (default: the source's basename plus a hash
+    of the full source, so same-named files from different hosts or
+    directories do not share a cache), `parse` turns the body into a set of
+    entries.
+    """
+
+    def __init__(self, source, name=None, parse=parse_drop):
+        self.source = source
+        self.remote = source.startswith(("http://", "https://"))
+        if name is None:
+            base = os.path.basename(urlparse(source).path if self.remote else source)
+            digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:8]
+            name = f"{os.path.splitext(base)[0] or 'feed'}-{digest}"
+        self.name = name
+        self.parse = parse
+        self.entries = set()
+        self.etag = None
+        self.last_modified = None
+        self.fetched = 0.0     # time of the last successful download / read
+        self.checked = 0.0     # time of the last refresh attempt
+        self.error = None
+
+
+class FeedManager:
+    """
+    Keeps blocklist feeds current without blocking start-up:
+    - load_cached() reads the last good copy of every feed from cache_dir
+      (local file feeds are read directly)
+    - start() refreshes in a background thread immediately and then every
+      refresh_interval seconds, using ETag / If-Modified-Since so an
+      unchanged feed costs a 304
+    - downloads land in the cache atomically (tmp + rename); a failed
+      refresh keeps the previous entries
+    - whenever any feed changed, on_update(entries) is called from the
+      refresh thread with the union of all feeds, so the owner can build
+      its lookup structure off the packet path and swap it in
+    """
+
+    def __init__(self, feeds, cache_dir="feed_cache", refresh_interval=6 * 3600, on_update=None,
+                 timeout=10):
+        self.feeds = [f if isinstance(f, Feed) else Feed(f) for f in feeds]
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.on_update = on_update
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.updates = 0
+
+    # -------------------------------
+    # cache
+    # -------------------------------
+    def _paths(self, feed):
+        base = os.path.join(self.cache_dir, feed.name)
+        return base + ".txt", base + ".meta.json"
+
+    def _read_cache(self, feed):
+        body_path, meta_path = self._paths(feed)
+        try:
+            with open(body_path, "r") as f:
+                feed.entries = feed.parse(f.read())
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            feed.etag = meta.get("etag")
+            feed.last_modified = meta.get("last_modified")
+            feed.fetched = meta.get("fetched", 0.0)
+            return True
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"[INTEL] Ignoring damaged cache for feed {feed.name}: {e}")
+            return False
+
+    def _write_cache(self, feed, body):
+        body_path, meta_path = self._paths(feed)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = {"source": feed.source, "etag": feed.etag, "last_modified": feed.last_modified,
+                "fetched": feed.fetched}
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta, indent=2))):
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def load_cached(self):
+        """Load every feed from its cache / local file; returns the union of entries."""
+        for feed in self.feeds:
+            if feed.remote:
+                self._read_cache(feed)
+            else:
+                self._refresh_file(feed)
+        return self.entries()
+
+    # -------------------------------
+    # refresh
+    # -------------------------------
+    def _refresh_file(self, feed):
+        try:
+            mtime = os.stat(feed.source).st_mtime
+        except OSError as e:
+            feed.error = str(e)
+            return False
+        if mtime == feed.fetched:
+            return False
+        with open(feed.source, "r") as f:
+            feed.entries = feed.parse(f.read())
+        feed.fetched = mtime
+        feed.error = None
+        return True
+
+    def _refresh_url(self, feed):
+        headers = {}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+        r = self.session.get(feed.source, headers=headers, timeout=self.timeout)
+        if r.status_code == 304:
+            feed.error = None
+            return False
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code}")
+        entries = feed.parse(r.text)
+        if not entries:
+            raise RuntimeError("empty feed")  # keep the last good copy
+        feed.entries = entries
+        feed.etag = r.headers.get("ETag")
+        feed.last_modified = r.headers.get("Last-Modified")
+        feed.fetched = time.time()
+        feed.error = None
+        self._write_cache(feed, r.text)
+        return True
+
+    def refresh(self):
+        """Check every feed once; calls on_update if anything changed. Returns True if so."""
+        changed = False
+        with self._lock:
+            for feed in self.feeds:
+                if self._stop.is_set():
+                    break  # stop() waits for at most one request
+                feed.checked = time.time()
+                try:
+                    changed |= self._refresh_url(feed) if feed.remote else self._refresh_file(feed)
+                except Exception as e:
+                    feed.error = str(e)
+                    print(f"[INTEL] Feed {feed.name} refresh failed: {e}")
+            self.refreshes += 1
+        if changed and not self._stop.is_set():
+            self.updates += 1
+            if self.on_update is not None:
+                self.on_update(self.entries())
+        return changed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[INTEL] Feed refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="aura-feeds", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            # refresh() stops between feeds; allow one request's connect + read timeouts
+            self._thread.join(timeout=2 * self.timeout + 5)
+            if self._thread.is_alive():
+                print("[INTEL] Feed refresh thread did not stop in time; leaving it to exit on its own.")
+            self._thread = None
+        self.session.close()
+
+    # -------------------------------
+    # views
+    # -------------------------------
+    def entries(self):
+        merged = set()
+        for feed in self.feeds:
+            merged |= feed.entries
+        return merged
+
+    def stats(self):
+        return {
+            "refreshes": self.refreshes,
+            "updates": self.updates,
+            "feeds": [{"name": f.name, "source": f.source, "entries": len(f.entries),
+                       "fetched": f.fetched, "checked": f.checked, "error": f.error}
+                      for f in self.feeds],
+        }
@@ -0,0 +1,221 @@
+# firewall_backends.py
+import ipaddress
+import shutil
+import subprocess
+import time
+from collections import deque
+
+
+class DryRunBackend:
+    """
+    Backend that only records the batches it was asked to apply.
+    Used for dry_run=True, tests / replay, and hosts without a real backend.
+    """
+    name = "dry-run"
+
+    def __init__(self, note=None, history=100):
+        self.note = note
+        self.batches = deque(maxlen=history)
+
+    def apply(self, blocked, added, removed, expiry=None):
+        self.batches.append({"added": list(added), "removed": list(removed), "total": len(blocked)})
+        if self.note:
+            print(f"[FIREWALL] {self.note} (+{len(added)} / -{len(removed)}, {len(blocked)} total).")
+        return True
+
+
+class NetshBackend:
+    """
+    Windows Firewall backend: blocked IPs are packed into a few shared rules
+    (AURA_Block_Set_<n>, one inbound + one outbound each) with a remoteip list,
+    instead of two rules per IP. Each IP keeps the slot it was first put in, so
+    unblocking one IP only touches its own rule set; a changed set is updated in
+    place with `set rule ... new remoteip=`, leaving no unblocked window.
+    A batch therefore costs about one netsh call per changed slot.
+    """
+    name = "netsh"
+    RULE_PREFIX = "AURA_Block_Set_"
+    CHUNK_SIZE = 500  # keep remoteip lists well below netsh's command-line limits
+    MAX_STALE_SETS = 256  # bound on leftover rule sets cleared at first sync
+
+    def __init__(self, runner=None):
+        self.runner = runner or self._run
+        self._slots = []  # slot index -> insertion-ordered {ip: None}
+        self._slot_of = {}
+        self._written = set()  # slots whose rule pair exists in the firewall
+        self._dirty = set()  # slots not yet written (or whose last write failed)
+        self._cleaned = False
+
+    @staticmethod
+    def _run(args):
+        return subprocess.run(args, capture_output=True, check=False).returncode
+
+    def _rule(self, idx):
+        return f"name={self.RULE_PREFIX}{idx}"
+
+    def _netsh(self, *args):
+        return self.runner(["netsh", "advfirewall", "firewall", *args])
+
+    def _write_slot(self, idx):
+        ips = list(self._slots[idx])
+        if not ips:
+            if idx in self._written:
+                self._netsh("delete", "rule", self._rule(idx))
+                self._written.discard(idx)
+            return
+        remote = "remoteip=" + ",".join(ips)
+        if idx in self._written:
+            rc = self._netsh("set", "rule", self._rule(idx), "new", remote)
+            if rc != 0:
+                raise RuntimeError(f"netsh set rule {self.RULE_PREFIX}{idx} exited with status {rc}")
+            return
+        # a stale rule of the same name would otherwise be duplicated
+        self._netsh("delete", "rule", self._rule(idx))
+        for direction in ("in", "out"):
+            rc = self._netsh("add", "rule", self._rule(idx), f"dir={direction}", remote, "action=block")
+            if rc != 0:
+                raise RuntimeError(f"netsh add rule {self.RULE_PREFIX}{idx} exited with status {rc}")
+        self._written.add(idx)
+
+    def _assign(self, blocked):
+        wanted = dict.fromkeys(blocked)
+        for ip in [ip for ip in self._slot_of if ip not in wanted]:
+            idx = self._slot_of.pop(ip)
+            del self._slots[idx][ip]
+            self._dirty.add(idx)
+        free = 0
+        for ip in wanted:
+            if ip in self._slot_of:
+                continue
+            while free < len(self._slots) and len(self._slots[free]) >= self.CHUNK_SIZE:
+                free += 1
+            if free == len(self._slots):
+                self._slots.append({})
+            self._slots[free][ip] = None
+            self._slot_of[ip] = free
+            self._dirty.add(free)
+
+    def _cleanup(self, blocked):
+        # leftovers from an earlier, larger rule set
+        for idx in range(len(self._slots), len(self._slots) + self.MAX_STALE_SETS):
+            if self._netsh("delete", "rule", self._rule(idx)) != 0:
+                break
+        # rules from older versions used one rule pair per IP
+        for ip in blocked:
+            self._netsh("delete", "rule", f"name=AURA_Block_{ip}")
+
+    def apply(self, blocked, added, removed, expiry=None):
+        # expiry is enforced by FirewallManager unblocking expired IPs
+        blocked = list(blocked)
+        self._assign(blocked)
+        for idx in sorted(self._dirty):
+            self._write_slot(idx)  # raises; the slot stays dirty for the retry
+            self._dirty.discard(idx)
+        if not self._cleaned:
+            self._cleanup(blocked)
+            self._cleaned = True
+        return True
+
+
+class RecordingRunner:
+    """Command-runner stand-in for NftablesBackend: records scripts, runs nothing."""
+
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+        self.scripts = []
+
+    def __call__(self, script):
+        self.scripts.append(script)
+        return self.returncode
+
+
+class NftablesBackend:
+    """
+    Linux backend built on one nftables table with two named sets:
+        table inet aura { set blocked_v4 / blocked_v6 ; input + output drop rules }
+    Thousands of blocked IPs therefore cost one hash lookup per packet in the
+    kernel instead of one rule each. Every apply() is a single `nft -f -`
+    transaction, so bulk adds/removes are atomic. IPs blocked with a TTL are
+    added with a per-element timeout and expire in the kernel on their own.
+    """
+    name = "nftables"
+
+    def __init__(self, runner=None, table="aura", priority=-10):
+        self.runner = runner or self._run
+        self.table = table
+        self.priority = priority
+        self._bootstrapped = False
+
+    @staticmethod
+    def available():
+        return shutil.which("nft") is not None
+
+    @staticmethod
+    def _run(script):
+        return subprocess.run(["nft", "-f", "-"], input=script, text=True,
+                              capture_output=True, check=False).returncode
+
+    def _bootstrap_lines(self):
+        t = f"inet {self.table}"
+        return [
+            f"add table {t}",
+            f"add set {t} blocked_v4 {{ type ipv4_addr; flags timeout; }}",
+            f"add set {t} blocked_v6 {{ type ipv6_addr; flags timeout; }}",
+            f"add chain {t} input {{ type filter hook input priority {self.priority}; policy accept; }}",
+            f"add chain {t} output {{ type filter hook output priority {self.priority}; policy accept; }}",
+            f"flush chain {t} input",
+            f"flush chain {t} output",
+            f"flush set {t} blocked_v4",
+            f"flush set {t} blocked_v6",
+            f"add rule {t} input ip saddr @blocked_v4 drop",
+            f"add rule {t} input ip6 saddr @blocked_v6 drop",
+            f"add rule {t} output ip daddr @blocked_v4 drop",
+            f"add rule {t} output ip6 daddr @blocked_v6 drop",
+        ]
+
+    @staticmethod
+    def _split(ips):
+        v4, v6 = [], []
+        for ip in ips:
+            try:
+                (v6 if ipaddress.ip_address(ip).version == 6 else v4).append(ip)
+            except ValueError:
+                continue
+        return v4, v6
+
+    @staticmethod
+    def _element(ip, expiry, now):
+        expires = expiry.get(ip) if expiry else None
+        if expires is None:
+            return ip
+        return f"{ip} timeout {max(1, int(expires - now))}s"
+
+    def build_script(self, blocked, added, removed, expiry=None):
+        """Return the nft batch script for one apply() call."""
+        now = time.time()
+        t = f"inet {self.table}"
+        lines = []
+        if not self._bootstrapped:
+            # first sync: (re)create table and load the full set in one transaction
+            lines += self._bootstrap_lines()
+            added = list(blocked)
+        for set_name, ips in zip(("blocked_v4", "blocked_v6"), self._split(removed)):
+            if ips:
+                # add-then-delete keeps the transaction valid if an element already expired
+                lines.append(f"add element {t} {set_name} {{ {', '.join(ips)} }}")
+                lines.append(f"delete element {t} {set_name} {{ {', '.join(ips)} }}")
+        for set_name, ips in zip(("blocked_v4", "blocked_v6"), self._split(added)):
+            if ips:
+                elements = ", ".join(self._element(ip, expiry, now) for ip in ips)
+                lines.append(f"add element {t} {set_name} {{ {elements} }}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def apply(self, blocked, added, removed, expiry=None):
+        script = self.build_script(blocked, added, removed, expiry)
+        if not script:
+            return True
+        rc = self.runner(script)
+        if rc != 0:
+            raise RuntimeError(f"nft exited with status {rc}")
+        self._bootstrapped = True
+        return True
@@ -1,25 +1,77 @@
 # firewall_manager.py
 import platform
-import subprocess
 import json
 import os
 import ipaddress
+import heapq
+import threading
+import time
+
+from firewall_backends import DryRunBackend, NetshBackend, NftablesBackend
 
 class FirewallManager:
     """
     Firewall manager for AURA Cyber Threat Radar
     - Auto-blocks malicious IPs dynamically.
-    - Persists blocked IPs.
+    - Persists blocked IPs (snapshot + append-only journal, compacted periodically).
     - Prevents duplicate rules.
-    - Works safely on Windows (using netsh).
+    - Coalesces block/unblock requests over batch_window seconds and applies
+      them as one bulk update on a background thread.
+    - Works safely on Windows (using netsh) and Linux (using one nftables set).
+    - Blocks may carry a TTL (block_ip(ip, ttl=...) or default_ttl) and are
+      lifted automatically when they expire.
+    - dry_run=True records blocks without touching the OS firewall.
+    - on_change(added, removed) is called after each applied batch;
+      observer("apply", seconds) times each backend update.
+    - A batch the backend fails to apply is put back in the queue (not
+      journaled, not reported) and retried with exponential backoff.
     """
 
-    def __init__(self, record_file="blocked_ips.json"):
+    def __init__(self, record_file="blocked_ips.json", dry_run=False, verbose=True,
+                 backend=None, batch_window=0.5, compact_every=1000, default_ttl=None,
+                 on_change=None, observer=None):
         self.os = platform.system().lower()
         self.record_file = record_file
-        self.blocked_ips = set()
+        self.journal_file = record_file + ".journal"
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self.batch_window = batch_window
+        self.compact_every = compact_every
+        self.default_ttl = default_ttl
+        self.on_change = on_change
+        self.observer = observer
+        self.backend = backend or self._default_backend()
+
+        # insertion-ordered: ip -> expiry timestamp (None = permanent)
+        self.blocked_ips = {}
+        self._expiry_heap = []
+        self._journal_lines = 0
         self._load_blocked_ips()
 
+        # insertion-ordered sets of IPs waiting for the next batch
+        self._pending_add = {}
+        self._pending_remove = {}
+        self._cond = threading.Condition()
+        self._apply_lock = threading.Lock()
+        self._needs_sync = True  # push the loaded set to the backend on first flush
+        self._retry_at = 0.0
+        self._retry_delay = 0.0
+        self.batches_applied = 0
+        self.batches_failed = 0
+        self.running = True
+        self._worker = threading.Thread(target=self._flush_loop, name="aura-firewall", daemon=True)
+        self._worker.start()
+        self._request_flush()
+
+    def _default_backend(self):
+        if self.dry_run:
+            return DryRunBackend()
+        if "windows" in self.os:
+            return NetshBackend()
+        if "linux" in self.os and NftablesBackend.available():
+            return NftablesBackend()
+        return DryRunBackend(note="No supported firewall backend found, skipping actual block")
+
     # -------------------------------
     # File persistence helpers
     # -------------------------------
@@ -27,15 +79,70 @@ class FirewallManager:
         if os.path.exists(self.record_file):
             try:
                 with open(self.record_file, "r") as f:
-                    self.blocked_ips = set(json.load(f))
-                print(f"[FIREWALL] Loaded {len(self.blocked_ips)} previously blocked IPs.")
+                    for entry in json.load(f):
+                        # permanent blocks are plain strings, timed ones {"ip", "expires"}
+                        if isinstance(entry, str):
+                            self.blocked_ips[entry] = None
+                        else:
+                            self.blocked_ips[entry["ip"]] = entry.get("expires")
             except Exception:
-                self.blocked_ips = set()
+                self.blocked_ips = {}
+        if os.path.exists(self.journal_file):
+            try:
+                with open(self.journal_file, "r") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # torn last line after a crash
+                        self._replay_journal_entry(entry)
+                        self._journal_lines += 1
+            except Exception as e:
+                print(f"[FIREWALL] Failed to read journal: {e}")
+        now = time.time()
+        for ip, expires in list(self.blocked_ips.items()):
+            if expires is None:
+                continue
+            if expires <= now:
+                del self.blocked_ips[ip]
+            else:
+                heapq.heappush(self._expiry_heap, (expires, ip))
+        if self.blocked_ips:
+            print(f"[FIREWALL] Loaded {len(self.blocked_ips)} previously blocked IPs.")
+
+    def _replay_journal_entry(self, entry):
+        if entry.get("op") == "add":
+            self.blocked_ips[entry["ip"]] = entry.get("expires")
+        elif entry.get("op") == "remove":
+            self.blocked_ips.pop(entry["ip"], None)
+
+    def _append_journal(self, added, removed, expiry):
+        if not added and not removed:
+            return
+        lines = [json.dumps({"op": "add", "ip": ip, "expires": expiry.get(ip)}) for ip in added]
+        lines += [json.dumps({"op": "remove", "ip": ip}) for ip in removed]
+        try:
+            with open(self.journal_file, "a") as f:
+                f.write("\n".join(lines) + "\n")
+            self._journal_lines += len(lines)
+        except Exception as e:
+            print(f"[FIREWALL] Failed to append journal: {e}")
+        if self._journal_lines >= self.compact_every:
+            self._save_blocked_ips()
 
     def _save_blocked_ips(self):
+        """Compact: write a full snapshot atomically and truncate the journal."""
+        tmp = self.record_file + ".tmp"
         try:
-            with open(self.record_file, "w") as f:
-                json.dump(sorted(list(self.blocked_ips)), f, indent=2)
+            with self._cond:
+                snapshot = sorted(self.blocked_ips.items())
+            records = [ip if expires is None else {"ip": ip, "expires": expires}
+                       for ip, expires in snapshot]
+            with open(tmp, "w") as f:
+                json.dump(records, f, indent=2)
+            os.replace(tmp, self.record_file)
+            open(self.journal_file, "w").close()
+            self._journal_lines = 0
         except Exception as e:
             print(f"[FIREWALL] Failed to save record: {e}")
 
@@ -48,56 +155,162 @@ class FirewallManager:
         except ValueError:
             return True
 
+    # -------------------------------
+    # Batching
+    # -------------------------------
+    def _request_flush(self):
+        with self._cond:
+            self._cond.notify()
+
+    def _expire_due(self, now):
+        """Move expired blocks to the pending-remove list. Caller holds _cond."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires, ip = heapq.heappop(heap)
+            if self.blocked_ips.get(ip) != expires:
+                continue  # unblocked or re-blocked since
+            del self.blocked_ips[ip]
+            if ip in self._pending_add:
+                del self._pending_add[ip]
+            else:
+                self._pending_remove[ip] = None
+            if self.verbose:
+                print(f"[FIREWALL] Block expired: {ip}")
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    self._expire_due(now)
+                    pending = self._pending_add or self._pending_remove or self._needs_sync
+                    if not self.running or (pending and now >= self._retry_at):
+                        break
+                    # sleep until the next expiry, or the retry time of a failed batch
+                    wake = [self._expiry_heap[0][0]] if self._expiry_heap else []
+                    if pending:
+                        wake.append(self._retry_at)
+                    self._cond.wait(min(wake) - now if wake else None)
+                if not self.running and not (self._pending_add or self._pending_remove):
+                    return
+            # let more requests pile up so they land in the same bulk update
+            if self.running and self.batch_window > 0:
+                time.sleep(self.batch_window)
+            self.flush()
+            if not self.running:
+                return  # one last attempt on shutdown; close() flushes again
+
+    def flush(self):
+        """Apply all pending changes now as a single backend update."""
+        with self._apply_lock:
+            with self._cond:
+                added, self._pending_add = list(self._pending_add), {}
+                removed, self._pending_remove = list(self._pending_remove), {}
+                sync, self._needs_sync = self._needs_sync, False
+                blocked = list(self.blocked_ips)
+                expiry = {ip: e for ip, e in self.blocked_ips.items() if e is not None}
+            if not (added or removed or sync):
+                return
+            t0 = time.perf_counter()
+            try:
+                self.backend.apply(blocked, added, removed, expiry)
+                self.batches_applied += 1
+                self._retry_delay = 0.0
+            except Exception as e:
+                self._requeue(added, removed, sync)
+                print(f"[FIREWALL] Failed to apply batch (+{len(added)} / -{len(removed)}): {e} "
+                      f"(retrying in {self._retry_delay:.0f}s)")
+                return
+            finally:
+                if self.observer is not None:
+                    self.observer("apply", time.perf_counter() - t0)
+            self._append_journal(added, removed, expiry)
+            if self.verbose and (added or removed):
+                print(f"[FIREWALL] Applied batch: blocked {len(added)}, unblocked {len(removed)} "
+                      f"({len(blocked)} total).")
+            if self.on_change is not None and (added or removed):
+                try:
+                    self.on_change(added, removed)
+                except Exception as e:
+                    print(f"[FIREWALL] on_change callback failed: {e}")
+
+    def _requeue(self, added, removed, sync):
+        """Put a failed batch back in front of anything queued since, and back off."""
+        with self._cond:
+            self.batches_failed += 1
+            self._retry_delay = min(60.0, self._retry_delay * 2 or 1.0)
+            self._retry_at = time.time() + self._retry_delay
+            self._needs_sync = self._needs_sync or sync
+            # only what still matches the wanted state: a later unblock / block wins
+            add = {ip: None for ip in added if ip in self.blocked_ips and ip not in self._pending_remove}
+            remove = {ip: None for ip in removed
+                      if ip not in self.blocked_ips and ip not in self._pending_add}
+            add.update(self._pending_add)
+            remove.update(self._pending_remove)
+            self._pending_add, self._pending_remove = add, remove
+
+    def close(self):
+        """Stop the batching thread, apply what is pending and compact the record."""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        self._worker.join(timeout=5)
+        self.flush()
+        self._save_blocked_ips()
+
     # -------------------------------
     # Main methods
     # -------------------------------
-    def block_ip(self, ip):
-        """Add a firewall rule to block a malicious IP address."""
+    def block_ip(self, ip, ttl=None):
+        """
+        Queue a firewall block for a malicious IP address (applied in the next batch).
+        ttl (seconds) overrides default_ttl; None/0 with no default = permanent.
+        """
         if self._is_private_ip(ip):
             return
 
-        if ip in self.blocked_ips:
-            return  # already blocked
-
-        try:
-            if "windows" in self.os:
-                subprocess.run([
-                    "netsh", "advfirewall", "firewall", "add", "rule",
-                    f"name=AURA_Block_{ip}", "dir=in", f"remoteip={ip}", "action=block"
-                ], capture_output=True, check=False)
-                subprocess.run([
-                    "netsh", "advfirewall", "firewall", "add", "rule",
-                    f"name=AURA_Block_{ip}", "dir=out", f"remoteip={ip}", "action=block"
-                ], capture_output=True, check=False)
-            else:
-                print(f"[FIREWALL] Non-Windows OS detected, skipping actual block for {ip}.")
-
-            self.blocked_ips.add(ip)
-            self._save_blocked_ips()
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires = time.time() + ttl if ttl else None
+        with self._cond:
+            if ip in self.blocked_ips:
+                return  # already blocked
+            self.blocked_ips[ip] = expires
+            if expires is not None:
+                heapq.heappush(self._expiry_heap, (expires, ip))
+            self._pending_remove.pop(ip, None)
+            self._pending_add[ip] = None
+            self._cond.notify()
+        if self.verbose:
             print(f"[FIREWALL] Blocked IP: {ip}")
-        except Exception as e:
-            print(f"[FIREWALL] Failed to block {ip}: {e}")
 
     def unblock_ip(self, ip):
-        """Remove a firewall block rule for a given IP."""
-        if ip not in self.blocked_ips:
-            return
-
-        try:
-            if "windows" in self.os:
-                subprocess.run([
-                    "netsh", "advfirewall", "firewall", "delete", "rule",
-                    f"name=AURA_Block_{ip}"
-                ], capture_output=True, check=False)
+        """Queue removal of the firewall block for a given IP."""
+        with self._cond:
+            if ip not in self.blocked_ips:
+                return
+            del self.blocked_ips[ip]
+            if ip in self._pending_add:
+                del self._pending_add[ip]
             else:
-                print(f"[FIREWALL] Non-Windows OS detected, skipping unblock for {ip}.")
-
-            self.blocked_ips.remove(ip)
-            self._save_blocked_ips()
+                self._pending_remove[ip] = None
+            self._cond.notify()
+        if self.verbose:
             print(f"[FIREWALL] Unblocked IP: {ip}")
-        except Exception as e:
-            print(f"[FIREWALL] Failed to unblock {ip}: {e}")
 
     def list_blocked_ips(self):
         """Return the current list of blocked IPs."""
-        return sorted(list(self.blocked_ips))
+        with self._cond:
+            return sorted(self.blocked_ips)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "backend": self.backend.name,
+                "blocked": len(self.blocked_ips),
+                "pending_add": len(self._pending_add),
+                "pending_remove": len(self._pending_remove),
+                "temporary": sum(1 for e in self.blocked_ips.values() if e is not None),
+                "batches_applied": self.batches_applied,
+                "batches_failed": self.batches_failed,
+                "journal_entries": self._journal_lines,
+            }
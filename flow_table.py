@@ -0,0 +1,135 @@
+# flow_table.py
+import threading
+
+
+class FlowRecord:
+    """Aggregated counters for one bidirectional 5-tuple flow."""
+    __slots__ = ("key", "packets", "bytes", "first_seen", "last_seen",
+                 "last_emit", "emit_packets", "emit_bytes", "peak_score")
+
+    def __init__(self, key, ts):
+        self.key = key
+        self.packets = 0
+        self.bytes = 0
+        self.first_seen = ts
+        self.last_seen = ts
+        self.last_emit = ts
+        self.emit_packets = 0   # packets since the last emitted event
+        self.emit_bytes = 0
+        self.peak_score = 0.0   # highest behavior score since the last event (set by the engine)
+
+    def as_dict(self):
+        a, b, proto, pa, pb = self.key
+        return {"endpoints": [f"{a}:{pa}", f"{b}:{pb}"], "proto": proto,
+                "packets": self.packets, "bytes": self.bytes,
+                "first_seen": self.first_seen, "last_seen": self.last_seen}
+
+
+class FlowTable:
+    """
+    5-tuple flow table that decides when a packet is worth scoring.
+    observe() returns the flow record and an emit reason:
+    - "start":     first packet of a new flow
+    - "active":    flow still running and active_timeout elapsed since last event
+    - "threshold": packet_threshold / byte_threshold crossed since last event
+    - None:        packet was only counted
+    Flows idle for idle_timeout are swept out; timestamps come from the packets.
+    """
+
+    def __init__(self, idle_timeout=30.0, active_timeout=10.0, packet_threshold=5000,
+                 byte_threshold=10 * 1024 * 1024, max_flows=200000, sweep_interval=5.0):
+        self.idle_timeout = idle_timeout
+        self.active_timeout = active_timeout
+        self.packet_threshold = packet_threshold
+        self.byte_threshold = byte_threshold
+        self.max_flows = max_flows
+        self.sweep_interval = sweep_interval
+        self.flows = {}
+        self.lock = threading.Lock()
+        self._last_sweep = 0.0
+        self.packets_seen = 0
+        self.events_emitted = 0
+        self.flows_expired = 0
+        self.flows_evicted = 0
+
+    @staticmethod
+    def flow_key(meta):
+        """Direction-independent key so both halves of a connection share a record."""
+        if (meta.src, meta.sport) <= (meta.dst, meta.dport):
+            return (meta.src, meta.dst, meta.proto, meta.sport, meta.dport)
+        return (meta.dst, meta.src, meta.proto, meta.dport, meta.sport)
+
+    def observe(self, meta):
+        ts = meta.ts
+        key = self.flow_key(meta)
+        with self.lock:
+            self.packets_seen += 1
+            if ts - self._last_sweep >= self.sweep_interval:
+                self._sweep(ts)
+
+            rec = self.flows.get(key)
+            if rec is not None and ts - rec.last_seen > self.idle_timeout:
+                # same 5-tuple after an idle gap is a new flow
+                del self.flows[key]
+                self.flows_expired += 1
+                rec = None
+
+            reason = None
+            if rec is None:
+                if len(self.flows) >= self.max_flows:
+                    self._evict(ts)
+                rec = self.flows[key] = FlowRecord(key, ts)
+                reason = "start"
+
+            rec.packets += 1
+            rec.bytes += meta.length
+            rec.last_seen = ts
+            rec.emit_packets += 1
+            rec.emit_bytes += meta.length
+
+            if reason is None:
+                if rec.emit_packets >= self.packet_threshold or rec.emit_bytes >= self.byte_threshold:
+                    reason = "threshold"
+                elif ts - rec.last_emit >= self.active_timeout:
+                    reason = "active"
+
+            if reason is not None:
+                rec.last_emit = ts
+                rec.emit_packets = 0
+                rec.emit_bytes = 0
+                self.events_emitted += 1
+            return rec, reason
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        cutoff = now - self.idle_timeout
+        idle = [k for k, r in self.flows.items() if r.last_seen < cutoff]
+        for k in idle:
+            del self.flows[k]
+        self.flows_expired += len(idle)
+
+    def _evict(self, now):
+        # table full even after sweeping: drop the oldest tenth (dict keeps insertion order)
+        self._sweep(now)
+        if len(self.flows) < self.max_flows:
+            return
+        excess = len(self.flows) - self.max_flows + max(1, self.max_flows // 10)
+        for k in list(self.flows)[:excess]:
+            del self.flows[k]
+            self.flows_evicted += 1
+
+    def top_flows(self, limit=20):
+        with self.lock:
+            recs = sorted(self.flows.values(), key=lambda r: r.bytes, reverse=True)[:limit]
+            return [r.as_dict() for r in recs]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "active_flows": len(self.flows),
+                "packets_seen": self.packets_seen,
+                "events_emitted": self.events_emitted,
+                "reduction": round(self.packets_seen / self.events_emitted, 1) if self.events_emitted else 0.0,
+                "flows_expired": self.flows_expired,
+                "flows_evicted": self.flows_evicted,
+            }
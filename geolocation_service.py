@@ -1,14 +1,67 @@
 # geolocation_service.py
 import geoip2.database
+import geoip2.errors
 import ipaddress
+import socket
+import threading
+
+from prefix_index import PrefixIndex
+
+# the IPv4 ranges ipaddress.IPv4Address.is_private reports, as one compiled index
+PRIVATE_V4 = PrefixIndex([
+    "0.0.0.0/8", "10.0.0.0/8", "127.0.0.0/8", "169.254.0.0/16", "172.16.0.0/12",
+    "192.0.0.0/29", "192.0.0.170/31", "192.0.2.0/24", "192.168.0.0/16", "198.18.0.0/15",
+    "198.51.100.0/24", "203.0.113.0/24", "240.0.0.0/4", "255.255.255.255/32",
+])
+
+_MISS = object()
+
+
+def parse_ip(ip):
+    """Return (version, integer) for an address string, or None if it is invalid."""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, TypeError):
+        pass
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    return addr.version, int(addr)
+
+
+def is_private_ip(ip):
+    """Integer range check for IPv4 (no ipaddress parsing); IPv6 falls back to ipaddress."""
+    try:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, TypeError):
+        try:
+            return ipaddress.ip_address(ip).is_private
+        except ValueError:
+            return False
+    return PRIVATE_V4.contains_int(value, 4)
+
 
 class GeoLocator:
     """
     Handles IP to Geolocation mapping using the MaxMind GeoLite2 database.
+    - the database is memory-mapped (MODE_MMAP) rather than read into the heap
+    - answers are cached per network block: the mmdb reports the prefix each
+      record covers, so one reader lookup serves every address in that
+      /24 (or larger) block; "not found" blocks are cached the same way
+    - cached location dicts are shared, callers must not modify them
+    - _is_private_ip() is an integer range check
     """
-    def __init__(self, db_path='GeoLite2-City.mmdb'):
+    def __init__(self, db_path='GeoLite2-City.mmdb', cache=True, max_blocks=200000):
+        self.cache = cache
+        self.max_blocks = max_blocks
+        self._tables = {4: [], 6: []}   # version -> [(prefixlen, {network_int: location})]
+        self._block_count = 0
+        self._lock = threading.Lock()  # writers only; lookups read the tables lock-free
+        self.hits = 0
+        self.misses = 0
         try:
-            self.reader = geoip2.database.Reader(db_path)
+            self.reader = geoip2.database.Reader(db_path, mode=geoip2.database.MODE_MMAP)
             print("🌍 GeoLite2 Database loaded successfully.")
         except FileNotFoundError:
             print(f"⚠️ GeoLite2 database not found at {db_path}. Location lookups will return Unknown.")
@@ -19,24 +72,79 @@ class GeoLocator:
         Fetches location data, including lat/lon, for a given public IP address.
         Returns None for private or invalid IPs.
         """
-        if self.reader is None or self._is_private_ip(ip_address):
+        if self.reader is None:
             return None
+        parsed = parse_ip(ip_address)
+        if parsed is None:
+            return None
+        version, value = parsed
+        if version == 4:
+            if PRIVATE_V4.contains_int(value, 4):
+                return None
+        elif ipaddress.ip_address(ip_address).is_private:
+            return None
+
+        if self.cache:
+            bits = 32 if version == 4 else 128
+            for prefixlen, blocks in self._tables[version]:
+                location = blocks.get(value >> (bits - prefixlen), _MISS)
+                if location is not _MISS:
+                    self.hits += 1
+                    return location
+            self.misses += 1
+
+        network = None
         try:
             response = self.reader.city(ip_address)
-            return {
+            location = {
                 'city': response.city.name or 'Unknown',
                 'country': response.country.name or 'Unknown',
                 'latitude': response.location.latitude,
                 'longitude': response.location.longitude
             }
-        except (geoip2.errors.AddressNotFoundError, ValueError):
+            network = response.traits.network
+        except geoip2.errors.AddressNotFoundError as e:
+            location = None
+            try:
+                network = e.network
+            except ValueError:
+                network = None
+        except ValueError:
             return None
+        if self.cache and network is not None:
+            with self._lock:
+                self._remember(version, network, location)
+        return location
+
+    def _remember(self, version, network, location):
+        if self._block_count >= self.max_blocks:
+            # simple bound: start over rather than track recency per block
+            self._tables = {4: [], 6: []}
+            self._block_count = 0
+        bits = 32 if version == 4 else 128
+        prefixlen = network.prefixlen
+        key = int(network.network_address) >> (bits - prefixlen)
+        tables = self._tables[version]
+        for plen, blocks in tables:
+            if plen == prefixlen:
+                break
+        else:
+            blocks = {}
+            tables = tables + [(prefixlen, blocks)]
+        if key not in blocks:
+            self._block_count += 1
+        blocks[key] = location
+        # probe the most populated prefix lengths first; the list is replaced,
+        # not sorted in place, so concurrent readers never see it half-sorted
+        self._tables[version] = sorted(tables, key=lambda t: len(t[1]), reverse=True)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"blocks": self._block_count, "hits": self.hits, "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0}
 
     def _is_private_ip(self, ip):
         """
         Checks if an IP is private (e.g., 192.168.x.x, 10.x.x.x, etc.).
         """
-        try:
-            return ipaddress.ip_address(ip).is_private
-        except ValueError:
-            return False
+        return is_private_ip(ip)
@@ -0,0 +1,309 @@
+# history_store.py
+import calendar
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing
+
+COLUMNS = ("ts", "external_ip", "src_ip", "dst_ip", "country", "score", "blocked",
+           "lat", "lon", "packets", "bytes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    ts          REAL NOT NULL,
+    external_ip TEXT NOT NULL,
+    src_ip      TEXT NOT NULL,
+    dst_ip      TEXT NOT NULL,
+    country     TEXT NOT NULL,
+    score       REAL NOT NULL,
+    blocked     INTEGER NOT NULL,
+    lat         REAL,
+    lon         REAL,
+    packets     INTEGER,
+    bytes       INTEGER
+);
+CREATE INDEX IF NOT EXISTS verdicts_ts ON verdicts (ts);
+CREATE INDEX IF NOT EXISTS verdicts_ip_ts ON verdicts (external_ip, ts);
+CREATE INDEX IF NOT EXISTS verdicts_country_ts ON verdicts (country, ts);
+CREATE INDEX IF NOT EXISTS verdicts_alerts_ts ON verdicts (ts) WHERE score >= 0.5;
+"""
+
+# scores are overwhelmingly low, so alert-level rows get their own small
+# partial index; queries with min_score >= ALERT_SCORE repeat its WHERE term
+# verbatim so SQLite can use it
+ALERT_SCORE = 0.5
+
+_DAY = 86400
+
+
+def _day(ts):
+    return int(ts // _DAY)
+
+
+class HistoryStore:
+    """
+    Persistent verdict history for forensics.
+    - write-behind: record() only appends to a bounded buffer; a writer
+      thread inserts batches (batch_size rows or every flush_interval
+      seconds) in one transaction, so the enforcement thread never waits
+      on disk; if the writer falls behind the oldest rows are dropped and
+      counted
+    - time-partitioned: one SQLite file (WAL mode) per UTC day, so
+      retention is deleting whole files and a time-range query only opens
+      the days it covers
+    - each partition is indexed on ts, (external_ip, ts), (country, ts) and
+      ts for alert-level scores only; queries walk partitions newest first
+      and stop at limit
+    """
+
+    def __init__(self, directory="history", retention_days=30, batch_size=5000,
+                 flush_interval=1.0, max_buffer=200000):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=max_buffer)
+        self._cond = threading.Condition()
+        self._writers = {}    # day -> connection (writer thread only)
+        self._flush_requested = 0
+        self._flushed = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self.apply_retention()
+        self.running = True
+        self._thread = threading.Thread(target=self._writer_loop, name="aura-history", daemon=True)
+        self._thread.start()
+
+    # -------------------------------
+    # write path
+    # -------------------------------
+    def record(self, verdict):
+        """Queue one verdict dict (as produced by DetectionEngine.analyze)."""
+        row = (verdict.get("ts") or time.time(), verdict["external_ip"], verdict["src_ip"],
+               verdict["dst_ip"], verdict.get("country", "Unknown"), verdict["score"],
+               int(verdict["blocked"]), verdict.get("lat"), verdict.get("lon"),
+               verdict.get("packets"), verdict.get("bytes"))
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _path(self, day):
+        return os.path.join(self.directory, f"verdicts-{time.strftime('%Y%m%d', time.gmtime(day * _DAY))}.db")
+
+    def _writer(self, day):
+        conn = self._writers.get(day)
+        if conn is None:
+            conn = sqlite3.connect(self._path(day), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # room for the secondary indexes' hot pages, which take random inserts
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.executescript(SCHEMA)
+            self._writers[day] = conn
+            # a new day: keep only the two most recent writers open, apply retention
+            for old in sorted(self._writers)[:-2]:
+                self._writers.pop(old).close()
+            self.apply_retention()
+        return conn
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                if (self.running and len(self._buffer) < self.batch_size
+                        and self._flushed == self._flush_requested):
+                    self._cond.wait(self.flush_interval)
+                batch = list(self._buffer)
+                self._buffer.clear()
+                running = self.running
+                requested = self._flush_requested
+            if batch:
+                self._write(batch)
+            with self._cond:
+                self._flushed = requested
+                self._cond.notify_all()
+            if not running:
+                return
+
+    def _write(self, rows):
+        t0 = time.perf_counter()
+        by_day = {}
+        oldest = _day(time.time()) - self.retention_days if self.retention_days else None
+        for row in rows:
+            day = _day(row[0])
+            if oldest is not None and day < oldest:
+                self.dropped += 1  # already past retention
+                continue
+            by_day.setdefault(day, []).append(row)
+        for day, day_rows in by_day.items():
+            try:
+                conn = self._writer(day)
+                with conn:
+                    conn.executemany(f"INSERT INTO verdicts VALUES ({', '.join('?' * len(COLUMNS))})", day_rows)
+                self.written += len(day_rows)
+            except sqlite3.Error as e:
+                self.dropped += len(day_rows)
+                print(f"[HISTORY] Failed to write {len(day_rows)} rows: {e}")
+        self.batches += 1
+        self.last_flush_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+    def flush(self, timeout=30.0):
+        """
+        Write everything buffered so far and wait for it: the writer thread
+        does the write, so its connections are never shared. Returns False
+        if that took longer than timeout.
+        """
+        with self._cond:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._flushed >= target or not self._thread.is_alive(), timeout)
+
+    def close(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=10)
+        for conn in self._writers.values():
+            conn.close()
+        self._writers.clear()
+
+    # -------------------------------
+    # partitions & retention
+    # -------------------------------
+    def partitions(self):
+        """Sorted list of (day, path) for every partition file on disk."""
+        out = []
+        for name in os.listdir(self.directory):
+            if name.startswith("verdicts-") and name.endswith(".db"):
+                try:
+                    t = time.strptime(name[9:17], "%Y%m%d")
+                except ValueError:
+                    continue
+                out.append((_day(calendar.timegm(t)), os.path.join(self.directory, name)))
+        return sorted(out)
+
+    def apply_retention(self, now=None):
+        """Delete partitions older than retention_days; returns how many were removed."""
+        if not self.retention_days:
+            return 0
+        cutoff = _day(now or time.time()) - self.retention_days
+        removed = 0
+        for day, path in self.partitions():
+            if day >= cutoff:
+                break
+            conn = self._writers.pop(day, None)
+            if conn is not None:
+                conn.close()
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(path + suffix)
+                except FileNotFoundError:
+                    pass
+            removed += 1
+        if removed:
+            print(f"[HISTORY] Retention: removed {removed} partition(s) older than {self.retention_days} days.")
+        return removed
+
+    # -------------------------------
+    # queries
+    # -------------------------------
+    def query(self, start=None, end=None, ip=None, country=None, min_score=None,
+              blocked=None, limit=1000):
+        """
+        Verdicts in [start, end) matching every given filter, newest first.
+        start / end are unix timestamps (None = unbounded).
+        """
+        where, args = [], []
+        if start is not None:
+            where.append("ts >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("ts < ?")
+            args.append(end)
+        if ip:
+            where.append("external_ip = ?")
+            args.append(ip)
+        if country:
+            where.append("country = ?")
+            args.append(country)
+        if min_score is not None:
+            where.append("score >= ?")
+            args.append(min_score)
+            if min_score >= ALERT_SCORE:
+                where.append(f"score >= {ALERT_SCORE}")
+        if blocked is not None:
+            where.append("blocked = ?")
+            args.append(int(blocked))
+        sql = (f"SELECT {', '.join(COLUMNS)} FROM verdicts"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY ts DESC LIMIT ?")
+
+        rows = []
+        for day, path in reversed(self._covering(start, end)):
+            with self._reader(path) as conn:
+                rows.extend(conn.execute(sql, args + [limit - len(rows)]).fetchall())
+            if len(rows) >= limit:
+                break
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def count(self, start=None, end=None, group_by="country", min_score=None, limit=50):
+        """Verdict counts per country / external_ip in [start, end), largest first."""
+        if group_by not in ("country", "external_ip"):
+            raise ValueError("group_by must be country or external_ip")
+        totals = {}
+        for day, path in self._covering(start, end):
+            where, args = [], []
+            # days entirely inside the range skip the ts terms and scan the table
+            # sequentially, which beats probing the ts index for every row
+            if start is not None and start > day * _DAY:
+                where.append("ts >= ?")
+                args.append(start)
+            if end is not None and end < (day + 1) * _DAY:
+                where.append("ts < ?")
+                args.append(end)
+            if min_score is not None:
+                where.append("score >= ?")
+                args.append(min_score)
+                if min_score >= ALERT_SCORE:
+                    where.append(f"score >= {ALERT_SCORE}")
+            # "+column" keeps SQLite from walking the whole group_by index in order
+            sql = (f"SELECT {group_by}, COUNT(*), SUM(blocked), MAX(score) FROM verdicts"
+                   + (f" WHERE {' AND '.join(where)}" if where else "")
+                   + f" GROUP BY +{group_by}")
+            with self._reader(path) as conn:
+                for key, n, blocked, max_score in conn.execute(sql, args):
+                    t = totals.setdefault(key, [0, 0, 0.0])
+                    t[0] += n
+                    t[1] += blocked or 0
+                    t[2] = max(t[2], max_score or 0.0)
+        top = sorted(totals.items(), key=lambda kv: kv[1][0], reverse=True)[:limit]
+        return [{group_by: key, "count": n, "blocked": b, "max_score": s} for key, (n, b, s) in top]
+
+    def _covering(self, start, end):
+        first = _day(start) if start is not None else None
+        last = _day(end) if end is not None else None
+        return [(day, path) for day, path in self.partitions()
+                if (first is None or day >= first) and (last is None or day <= last)]
+
+    @staticmethod
+    def _reader(path):
+        # short-lived read-only connection per query: WAL lets it run alongside the writer
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA query_only=ON")
+        return closing(conn)
+
+    def stats(self):
+        parts = self.partitions()
+        return {"buffered": len(self._buffer), "written": self.written, "dropped": self.dropped,
+                "batches": self.batches, "last_flush_ms": self.last_flush_ms,
+                "partitions": len(parts),
+                "bytes_on_disk": sum(os.path.getsize(p) for _, p in parts if os.path.exists(p))}
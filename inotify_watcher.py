@@ -0,0 +1,179 @@
+# inotify_watcher.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT = struct.Struct("iIII")
+
+
+def _libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 - probe for the symbol
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class InotifyWatcher:
+    """
+    Recursive inotify watcher (Linux, via ctypes - no extra dependency).
+    - watches every directory under dirs; new directories are added on the fly
+    - changed paths are collected and delivered in one on_changes(set_of_paths)
+      call once events have been quiet for `debounce` seconds (or max_delay
+      has passed since the first pending event)
+    - on kernel queue overflow on_overflow() is called so the owner can rescan
+    """
+
+    def __init__(self, dirs, on_changes, on_overflow=None, debounce=0.1, max_delay=1.0):
+        self.dirs = list(dirs)
+        self.on_changes = on_changes
+        self.on_overflow = on_overflow
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._libc = _libc()
+        self._fd = None
+        self._wd_paths = {}
+        self._thread = None
+        self.running = False
+        self.events_seen = 0
+        self.batches_delivered = 0
+
+    @staticmethod
+    def available():
+        return _libc() is not None
+
+    # -------------------------------
+    # watch management
+    # -------------------------------
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            print(f"[INOTIFY] Cannot watch {path}: {os.strerror(err)}")
+            return
+        self._wd_paths[wd] = path
+
+    def _add_tree(self, base):
+        for root, _, _ in os.walk(base):
+            self._add_watch(root)
+
+    # -------------------------------
+    # lifecycle
+    # -------------------------------
+    def start(self):
+        if self.running:
+            return
+        if self._libc is None:
+            raise OSError("inotify is not available on this platform")
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        for base in self.dirs:
+            if os.path.isdir(base):
+                self._add_tree(base)
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, name="aura-inotify", daemon=True)
+        self._thread.start()
+        print(f"[INOTIFY] Watching {len(self._wd_paths)} directories.")
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._wd_paths.clear()
+
+    # -------------------------------
+    # event loop
+    # -------------------------------
+    def _read_events(self, pending):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        overflow = False
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, name_len = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            self.events_seen += 1
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+            base = self._wd_paths.get(wd)
+            if base is None:
+                continue
+            path = os.path.join(base, os.fsdecode(name)) if name else base
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                self._add_tree(path)
+            pending.add(path)
+        return overflow
+
+    def _loop(self):
+        pending = set()
+        first = last = 0.0
+        while self.running:
+            timeout = self.debounce if pending else 0.5
+            try:
+                ready, _, _ = select.select([self._fd], [], [], timeout)
+            except (OSError, ValueError):
+                break
+            now = time.monotonic()
+            if ready:
+                if self._read_events(pending) and self.on_overflow is not None:
+                    # events were lost: hand over to a full rescan instead
+                    pending.clear()
+                    first = last = 0.0
+                    self._deliver(self.on_overflow)
+                    continue
+                if pending:
+                    first = first or now
+                    last = now
+            if pending and (now - last >= self.debounce or now - first >= self.max_delay):
+                batch, pending = pending, set()
+                first = last = 0.0
+                self.batches_delivered += 1
+                self._deliver(self.on_changes, batch)
+
+    @staticmethod
+    def _deliver(fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[INOTIFY] Change handler failed: {e}")
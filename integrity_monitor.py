@@ -1,50 +1,137 @@
 # integrity_monitor.py
 import os
 import time
-import json
-import hashlib
 import threading
 
+from parallel_hasher import ParallelHasher, walk_files
+from inotify_watcher import InotifyWatcher
+from baseline_store import FileRecord, JsonBaselineStore, open_store
+
+DRIFT_KINDS = ("modified", "added", "removed")
+
+
+def _unchanged(old, st):
+    """
+    True if stat result st matches record old. An inode of 0 means "unknown"
+    (DirEntry.stat() on Windows) and is not compared.
+    """
+    return (old.size == st.st_size and old.mtime_ns == st.st_mtime_ns
+            and (old.inode == st.st_ino or not old.inode or not st.st_ino))
+
 class FileIntegrityMonitor:
     """
     Reliable File Integrity Monitor:
-    - baseline file stored as JSON (path_norm -> sha256)
+    - baseline stored as SQLite (.db/.sqlite: dir-prefix dedup, raw digests,
+      single-entry updates) or JSON (path_norm -> [size, mtime_ns, inode, sha256])
+    - incremental scans: only files whose stat tuple changed are rehashed,
+      with an optional full "paranoid" rehash every paranoid_every scans
+    - files are hashed on a thread pool (hash_workers, None = min(8, cpus + 4))
+    - watch_mode "auto"/"inotify": changes are picked up from inotify within
+      milliseconds and only the reported paths are hashed; the full walk then
+      only runs every reconcile_interval seconds as a safety net ("poll" = walk
+      every interval seconds, the fallback where inotify is unavailable)
     - periodic background scanning
     - detects added / modified / removed files
     - supports a force_scan() to trigger immediate detection (useful for testing)
+    - drift is tracked as state: every path that differs from the baseline
+      is outstanding until it reverts or is accepted, and events carry only
+      transitions since the previous check (new / changed / resolved), so a
+      mass change is reported once rather than on every scan
+    - accept_paths() / accept() fold changes into the baseline entry by
+      entry; acknowledge() marks drift as seen without accepting it
+    - event path lists are capped at max_event_paths per kind; the full set
+      is paged through changes()
     - emits structured events via an alert_queue (if provided)
+    - observer("scan" | "paths", seconds) times full scans and watcher checks
     """
 
     def __init__(self, baseline_path="integrity_baseline.json",
-                 watch_dirs=None, interval=60, alert_queue=None, max_files=None):
+                 watch_dirs=None, interval=60, alert_queue=None, max_files=None,
+                 paranoid_every=0, hash_workers=None, watch_mode="auto",
+                 reconcile_interval=600, debounce=0.1, observer=None, max_event_paths=100):
         self.baseline_path = baseline_path
         self.watch_dirs = watch_dirs or [r"C:\Users\LIKHITH\OneDrive\Desktop\AURA-COPY"]
         self.interval = interval
         self.alert_queue = alert_queue
+        self.observer = observer
         self.running = False
         self.lock = threading.Lock()
         # limit how many files to index for speed (None = no limit)
         self.max_files = max_files
+        # every Nth scan rehashes all files regardless of stat metadata (0 = never)
+        self.paranoid_every = paranoid_every
+        self.scan_count = 0
+        self.last_scan_stats = {}
+        self.hasher = ParallelHasher(workers=hash_workers)
+        self.watch_mode = watch_mode
+        self.reconcile_interval = reconcile_interval
+        self.debounce = debounce
+        self.watcher = None
+        self.max_event_paths = max_event_paths
+        # outstanding drift, path_norm -> {kind, hash, since, seq, acknowledged},
+        # kept in seq order (an entry that changes again is moved to the end)
+        self.drift = {}
+        self.seq = 0
 
         # internal baseline representation uses normcase() for Windows compatibility
+        # path_norm -> FileRecord(size, mtime_ns, inode, digest)
         self.baseline = {}
-        if os.path.exists(self.baseline_path):
+        self.store = open_store(self.baseline_path)
+        self._migrate_json_baseline()
+        if self.store.exists():
             self._load_baseline()
         else:
             print("[INTEGRITY] Baseline not found; create baseline by calling create_baseline() or start_monitoring().")
+        # records from the previous scan, used to skip rehashing unchanged files
+        self._last_seen = dict(self.baseline)
 
     # ----------------------
     # hashing helpers
     # ----------------------
     def _hash_file(self, path):
-        try:
-            with open(path, "rb") as f:
-                h = hashlib.sha256()
-                for chunk in iter(lambda: f.read(65536), b""):
-                    h.update(chunk)
-            return h.hexdigest()
-        except Exception:
-            return None
+        return self.hasher.hash_file(path)
+
+    def _snapshot(self, previous=None, paranoid=False):
+        """
+        Return {norm_path: FileRecord} for the current tree.
+        Files whose (size, mtime_ns, inode) match `previous` reuse the old hash
+        instead of being read again, unless paranoid is set.
+        """
+        previous = previous or {}
+        snapshot = {}
+        stats = {"files": 0, "hashed": 0, "skipped": 0,
+                 "bytes_hashed": 0, "bytes_skipped": 0, "paranoid": paranoid,
+                 "workers": self.hasher.workers}
+        started = time.time()
+        stat_of = {}
+        result_lock = threading.Lock()
+
+        def _to_hash():
+            for path, st in walk_files(self.watch_dirs, self.max_files):
+                norm = os.path.normcase(os.path.abspath(path))
+                stats["files"] += 1
+                old = previous.get(norm)
+                if not paranoid and old is not None and _unchanged(old, st):
+                    snapshot[norm] = old
+                    stats["skipped"] += 1
+                    stats["bytes_skipped"] += st.st_size
+                    continue
+                stat_of[norm] = st
+                yield norm, path, st.st_size
+
+        def _on_hashed(norm, file_hash):
+            if not file_hash:
+                return
+            st = stat_of[norm]
+            with result_lock:
+                snapshot[norm] = FileRecord(st.st_size, st.st_mtime_ns, st.st_ino, file_hash)
+                stats["hashed"] += 1
+                stats["bytes_hashed"] += st.st_size
+
+        self.hasher.hash_all(_to_hash(), _on_hashed)
+        stats["duration"] = round(time.time() - started, 3)
+        self.last_scan_stats = stats
+        return snapshot
 
     # ----------------------
     # baseline creation / load / save
@@ -55,42 +142,34 @@ class FileIntegrityMonitor:
         This may take time on first run. Progress printed to console.
         """
         print("[INTEGRITY] Creating baseline...")
-        snapshot = {}
-        count = 0
         for base in self.watch_dirs:
             if not os.path.exists(base):
                 print(f"[INTEGRITY] Watch directory missing: {base}  (skipping)")
-                continue
-            for root, _, files in os.walk(base):
-                for name in files:
-                    path = os.path.join(root, name)
-                    norm = os.path.normcase(os.path.abspath(path))
-                    file_hash = self._hash_file(path)
-                    if file_hash:
-                        snapshot[norm] = file_hash
-                    count += 1
-                    if self.max_files and count >= self.max_files:
-                        print(f"[INTEGRITY] Reached max_files ({self.max_files}) while indexing baseline.")
-                        break
-                if self.max_files and count >= self.max_files:
-                    break
-            if self.max_files and count >= self.max_files:
-                break
+        snapshot = self._snapshot(paranoid=True)
+        if self.max_files and self.last_scan_stats["files"] >= self.max_files:
+            print(f"[INTEGRITY] Reached max_files ({self.max_files}) while indexing baseline.")
+        self.baseline = snapshot
+        self._last_seen = dict(snapshot)
+        self.drift.clear()
+        if self._save_baseline():
+            print(f"[INTEGRITY] Baseline created ({len(snapshot)} files tracked).")
 
+    def _migrate_json_baseline(self):
+        """Import a sibling .json baseline the first time a SQLite store is used."""
+        if self.store.kind != "sqlite" or self.store.exists():
+            return
+        legacy = JsonBaselineStore(os.path.splitext(self.baseline_path)[0] + ".json")
+        if not legacy.exists():
+            return
         try:
-            with open(self.baseline_path, "w") as f:
-                json.dump(snapshot, f, indent=2)
-            self.baseline = snapshot
-            print(f"[INTEGRITY] Baseline created ({len(snapshot)} files tracked).")
+            self.store.save_all(legacy.load())
+            print(f"[INTEGRITY] Migrated {legacy.path} -> {self.baseline_path}")
         except Exception as e:
-            print(f"[INTEGRITY] Failed to save baseline: {e}")
+            print(f"[INTEGRITY] Failed to migrate JSON baseline: {e}")
 
     def _load_baseline(self):
         try:
-            with open(self.baseline_path, "r") as f:
-                data = json.load(f)
-            # ensure keys are normalized for comparison
-            self.baseline = {os.path.normcase(k): v for k, v in data.items()}
+            self.baseline = self.store.load()
             print(f"[INTEGRITY] Baseline loaded ({len(self.baseline)} files).")
         except Exception as e:
             print(f"[INTEGRITY] Failed to load baseline: {e}")
@@ -98,81 +177,245 @@ class FileIntegrityMonitor:
 
     def _save_baseline(self):
         try:
-            with open(self.baseline_path, "w") as f:
-                json.dump(self.baseline, f, indent=2)
+            self.store.save_all(self.baseline)
+            return True
         except Exception as e:
             print(f"[INTEGRITY] Failed to save baseline: {e}")
+            return False
+
+    def accept_paths(self, paths):
+        """
+        Accept the current state of the given paths into the baseline, writing
+        only those entries to the store. Their outstanding drift is cleared and
+        reported as resolved. Returns the number of entries changed.
+        """
+        with self.lock:
+            put, delete, accepted = [], [], []
+            for path in paths:
+                norm = os.path.normcase(os.path.abspath(path))
+                if self.drift.pop(norm, None) is not None:
+                    accepted.append(norm)
+                record = self._last_seen.get(norm)
+                if record is None or not os.path.isfile(norm):
+                    if self.baseline.pop(norm, None) is not None:
+                        delete.append(norm)
+                elif self.baseline.get(norm) != record:
+                    self.baseline[norm] = record
+                    put.append(norm)
+            if put or delete:
+                try:
+                    self.store.update(self.baseline, put=put, delete=delete)
+                except Exception as e:
+                    print(f"[INTEGRITY] Failed to update baseline: {e}")
+            if accepted:
+                self._emit({}, accepted, source="accept")
+            return len(put) + len(delete)
+
+    def accept(self, paths=None, kind=None):
+        """Accept outstanding drift (all of it, or the given paths / kind) into the baseline."""
+        with self.lock:
+            if paths is None:
+                paths = [p for p, e in self.drift.items() if kind is None or e["kind"] == kind]
+        return self.accept_paths(paths)
+
+    def acknowledge(self, paths=None):
+        """Mark outstanding drift as seen without changing the baseline; returns how many."""
+        with self.lock:
+            norms = self.drift.keys() if paths is None else \
+                [os.path.normcase(os.path.abspath(p)) for p in paths]
+            count = 0
+            for norm in norms:
+                entry = self.drift.get(norm)
+                if entry is not None and not entry["acknowledged"]:
+                    entry["acknowledged"] = True
+                    count += 1
+            return count
+
+    def outstanding(self):
+        """Outstanding drift counts per kind, plus how many are acknowledged."""
+        counts = {k: 0 for k in DRIFT_KINDS}
+        counts["acknowledged"] = 0
+        for entry in list(self.drift.values()):
+            counts[entry["kind"]] += 1
+            counts["acknowledged"] += entry["acknowledged"]
+        return counts
+
+    def changes(self, offset=0, limit=100, kind=None, since=0, acknowledged=None):
+        """
+        One page of outstanding drift in transition order.
+        since: only entries whose last transition is newer than this seq.
+        """
+        with self.lock:
+            matched = [(path, e) for path, e in self.drift.items()
+                       if e["seq"] > since and (kind is None or e["kind"] == kind)
+                       and (acknowledged is None or e["acknowledged"] == acknowledged)]
+            seq = self.seq
+        page = matched[offset:offset + limit]
+        return {"seq": seq, "total": len(matched), "offset": offset, "limit": limit,
+                "outstanding": self.outstanding(),
+                "changes": [{"path": path, "kind": e["kind"], "since": e["since"], "seq": e["seq"],
+                             "acknowledged": e["acknowledged"],
+                             "sha256": e["hash"].hex() if e["hash"] else None}
+                            for path, e in page]}
 
     # ----------------------
     # scanning & detection
     # ----------------------
     def _scan_current(self):
-        """Return snapshot dict of current files: {norm_path: sha256}"""
-        snapshot = {}
-        count = 0
-        for base in self.watch_dirs:
-            if not os.path.exists(base):
-                continue
-            for root, _, files in os.walk(base):
-                for name in files:
-                    path = os.path.join(root, name)
-                    norm = os.path.normcase(os.path.abspath(path))
-                    h = self._hash_file(path)
-                    if h:
-                        snapshot[norm] = h
-                    count += 1
-                    if self.max_files and count >= self.max_files:
-                        return snapshot
+        """Return snapshot dict of current files: {norm_path: FileRecord}"""
+        self.scan_count += 1
+        paranoid = bool(self.paranoid_every) and self.scan_count % self.paranoid_every == 0
+        snapshot = self._snapshot(self._last_seen, paranoid=paranoid)
+        self._last_seen = snapshot
+        s = self.last_scan_stats
+        if self.observer is not None:
+            self.observer("scan", s["duration"])
+        print(f"[INTEGRITY] Scan #{self.scan_count}{' (paranoid)' if paranoid else ''}: "
+              f"hashed {s['hashed']} files / {s['bytes_hashed']} bytes, "
+              f"skipped {s['skipped']} files / {s['bytes_skipped']} bytes in {s['duration']}s")
         return snapshot
 
     def detect_drift(self):
         """
-        Compare current snapshot with baseline.
-        Returns dict: {modified:[], added:[], removed:[]}
-        Also pushes events into alert_queue if provided.
+        Compare current snapshot with baseline and update the drift state.
+        Returns the transition event (see _emit) or None if nothing changed
+        since the last check. Also pushes it into alert_queue if provided.
         """
         with self.lock:
             current = self._scan_current()
 
-            modified = []
-            removed = []
-            added = []
+            drifted = {}
 
             # check for modified / removed
-            for path, old_hash in self.baseline.items():
-                new_hash = current.get(path)
-                if new_hash is None:
-                    removed.append(path)
-                elif new_hash != old_hash:
-                    modified.append(path)
+            for path, old in self.baseline.items():
+                new = current.get(path)
+                if new is None:
+                    drifted[path] = ("removed", None)
+                elif new.hash != old.hash:
+                    drifted[path] = ("modified", new.hash)
 
             # check for new files
-            for path in current.keys():
+            for path, new in current.items():
                 if path not in self.baseline:
-                    added.append(path)
-
-            # if any changes, push structured event(s)
-            if modified or removed or added:
-                event = {
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "modified": modified,
-                    "added": added,
-                    "removed": removed,
-                    "total_changes": len(modified) + len(added) + len(removed)
-                }
-                print(f"[INTEGRITY] Drift detected: modified={len(modified)} added={len(added)} removed={len(removed)}")
-                # push event(s) to queue
-                if self.alert_queue:
-                    try:
-                        self.alert_queue.put(event)
-                    except Exception:
-                        pass
-                # update baseline for modified/added/removed? (we do not auto-update baseline)
-                # (We keep baseline unchanged — admin should rebuild baseline if changes are expected)
-                return event
-            else:
-                print("[INTEGRITY] No drift detected.")
-                return None
+                    drifted[path] = ("added", new.hash)
+
+            event = self._transition(drifted, self.drift.keys(), source="scan")
+            if event is None:
+                print(f"[INTEGRITY] No new drift ({len(self.drift)} outstanding).")
+            return event
+
+    def detect_paths(self, paths):
+        """
+        Check only the given paths (as reported by the inotify watcher) against
+        the baseline and emit an event for those that drifted.
+        """
+        t0 = time.perf_counter()
+        with self.lock:
+            candidates = set()
+            for path in paths:
+                norm = os.path.normcase(os.path.abspath(path))
+                if os.path.isdir(path):
+                    # directory created / moved in: everything inside is new
+                    candidates.update(os.path.normcase(os.path.abspath(p))
+                                      for p, _ in walk_files([path]))
+                elif os.path.exists(path):
+                    candidates.add(norm)
+                else:
+                    # deleted file, or a directory moved away: drop what lived under it
+                    candidates.add(norm)
+                    prefix = norm + os.sep
+                    candidates.update(p for p in self._last_seen if p.startswith(prefix))
+                    candidates.update(p for p in self.baseline if p.startswith(prefix))
+
+            drifted = {}
+            for norm in sorted(candidates):
+                try:
+                    st = os.stat(norm)
+                    is_file = os.path.isfile(norm)
+                except OSError:
+                    st, is_file = None, False
+                if not is_file:
+                    self._last_seen.pop(norm, None)
+                    if norm in self.baseline:
+                        drifted[norm] = ("removed", None)
+                    continue
+                old = self._last_seen.get(norm)
+                if old is not None and _unchanged(old, st):
+                    record = old
+                else:
+                    file_hash = self.hasher.hash_file(norm, st.st_size)
+                    if not file_hash:
+                        continue
+                    record = FileRecord(st.st_size, st.st_mtime_ns, st.st_ino, file_hash)
+                    self._last_seen[norm] = record
+                base = self.baseline.get(norm)
+                if base is None:
+                    drifted[norm] = ("added", record.hash)
+                elif base.hash != record.hash:
+                    drifted[norm] = ("modified", record.hash)
+            event = self._transition(drifted, candidates, source="watch")
+        if self.observer is not None:
+            self.observer("paths", time.perf_counter() - t0)
+        return event
+
+    def _transition(self, drifted, checked, source):
+        """
+        Fold one check into the drift state (caller holds self.lock).
+        drifted: {path_norm: (kind, hash)} for the checked paths that differ
+        from the baseline; outstanding paths in `checked` that are no longer
+        drifted have reverted and are resolved.
+        """
+        now = time.time()
+        new = {k: [] for k in DRIFT_KINDS}
+        for norm, (kind, digest) in drifted.items():
+            entry = self.drift.get(norm)
+            if entry is not None and entry["kind"] == kind and entry["hash"] == digest:
+                continue  # already reported
+            self.seq += 1
+            self.drift.pop(norm, None)
+            self.drift[norm] = {"kind": kind, "hash": digest, "since": now,
+                                "seq": self.seq, "acknowledged": False}
+            new[kind].append(norm)
+        resolved = [p for p in checked if p in self.drift and p not in drifted]
+        for norm in resolved:
+            del self.drift[norm]
+        return self._emit(new, resolved, source)
+
+    def _emit(self, new, resolved, source):
+        """
+        Build a transition event, push it to alert_queue and return it (None if
+        no changes). Path lists are capped at max_event_paths each; `counts`
+        has the real sizes and changes(since=...) pages through the rest.
+        """
+        counts = {k: len(new.get(k, ())) for k in DRIFT_KINDS}
+        counts["resolved"] = len(resolved)
+        if not any(counts.values()):
+            return None
+        cap = self.max_event_paths
+        event = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "source": source,
+            "seq": self.seq,
+            "modified": new.get("modified", [])[:cap],
+            "added": new.get("added", [])[:cap],
+            "removed": new.get("removed", [])[:cap],
+            "resolved": resolved[:cap],
+            "counts": counts,
+            "total_changes": sum(counts.values()),
+            "truncated": any(n > cap for n in counts.values()),
+            "outstanding": len(self.drift)
+        }
+        print(f"[INTEGRITY] Drift transitions ({source}): modified={counts['modified']} "
+              f"added={counts['added']} removed={counts['removed']} resolved={counts['resolved']} "
+              f"({len(self.drift)} outstanding)")
+        # push event(s) to queue
+        if self.alert_queue:
+            try:
+                self.alert_queue.put(event)
+            except Exception:
+                pass
+        # the baseline only changes through accept_paths() / accept() / create_baseline()
+        return event
 
     # ----------------------
     # background monitoring
@@ -181,11 +424,22 @@ class FileIntegrityMonitor:
         """Start background thread that runs detect_drift() every self.interval seconds."""
         if self.running:
             return
-        if not self.baseline:
+        if not self.baseline and not self.store.exists():
             print("[INTEGRITY] No baseline loaded — creating one now.")
             self.create_baseline()
 
         self.running = True
+        poll_interval = self.interval
+        if self.watch_mode == "inotify" or (self.watch_mode == "auto" and InotifyWatcher.available()):
+            try:
+                self.watcher = InotifyWatcher(self.watch_dirs, on_changes=self.detect_paths,
+                                              on_overflow=self.detect_drift, debounce=self.debounce)
+                self.watcher.start()
+                # events drive detection; the walk is only a periodic reconciliation pass
+                poll_interval = max(self.interval, self.reconcile_interval or self.interval)
+            except OSError as e:
+                print(f"[INTEGRITY] inotify unavailable ({e}); falling back to polling.")
+                self.watcher = None
 
         def _loop():
             # small initial delay to let system stabilize
@@ -195,14 +449,18 @@ class FileIntegrityMonitor:
                     self.detect_drift()
                 except Exception as e:
                     print(f"[INTEGRITY] Error during detect_drift: {e}")
-                time.sleep(self.interval)
+                time.sleep(poll_interval)
 
         t = threading.Thread(target=_loop, daemon=True)
         t.start()
-        print(f"[INTEGRITY] Background monitor started (interval={self.interval}s).")
+        mode = "inotify + reconcile" if self.watcher else "polling"
+        print(f"[INTEGRITY] Background monitor started ({mode}, interval={poll_interval}s).")
 
     def stop_monitoring(self):
         self.running = False
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
         print("[INTEGRITY] Monitoring stopped.")
 
     # ----------------------
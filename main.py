@@ -1,87 +1,267 @@
 # main.py
+import time
+_t_start = time.perf_counter()
+
+import functools
+import json
 import os
 import threading
 import signal
 import sys
-from queue import Queue
-from flask import Flask, jsonify, render_template
-from scapy.all import sniff, IP
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 
-# import your existing modules (make sure names match your files)
-from anomaly_detection_service import BehavioralAnomalyDetector
-from threat_intel_service import ThreatIntel
-from firewall_manager import FirewallManager
-from geolocation_service import GeoLocator
-from integrity_monitor import FileIntegrityMonitor
+# scapy, numpy, geoip2 and requests are imported inside the subsystem
+# factories below, on their own threads, so the web UI is up before they load
+from startup import Startup
+from event_bus import EventBus
+from metrics import Registry
+from sampling_profiler import SamplingProfiler
+from rollups import RollupStore
 
-# Queues for UI
-traffic_data_queue = Queue()
-integrity_queue = Queue()
+# Dashboard events fan out to every /stream client; /traffic and /integrity
+# keep one bounded legacy subscription each for polling clients
+bus = EventBus(history=10000, subscriber_buffer=2000)
+traffic_events = bus.topic("traffic")
+integrity_events = bus.topic("integrity")
+blocked_events = bus.topic("blocked")
+legacy_traffic = bus.subscribe(["traffic"], maxlen=1000)
+legacy_integrity = bus.subscribe(["integrity"], maxlen=200)
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
+# SSE: ship at most one batch per STREAM_INTERVAL seconds, STREAM_MAX_BATCH events each
+STREAM_INTERVAL = 0.5
+STREAM_MAX_BATCH = 500
+STREAM_HEARTBEAT = 15
+
+# Prometheus metrics (/metrics) and the on-demand profiler (/profile)
+metrics = Registry()
+stage_seconds = metrics.histogram("stage_seconds", "Per-stage latency of the scoring path", ("stage",))
+firewall_seconds = metrics.histogram("firewall_seconds", "Firewall backend batch apply latency", ("stage",))
+integrity_seconds = metrics.histogram("integrity_seconds", "Integrity scan / watcher check latency", ("stage",))
+verdicts_total = metrics.counter("verdicts_total", "Scored verdicts by outcome", ("result",))
+profiler = SamplingProfiler()
+
+# Rolling per-country / grid-cell / IP aggregates the dashboard map renders from (/rollup)
+rollups = RollupStore(bucket_seconds=10, n_buckets=60, grid_deg=2.0)
 
-# Initialize modules
-detector = BehavioralAnomalyDetector()
-intel = ThreatIntel()
-firewall = FirewallManager()
-geo = GeoLocator()
+def observe_stage(stage, seconds):
+    stage_seconds.labels(stage).observe(seconds)
+
+def publish_verdict(verdict):
+    verdicts_total.labels("blocked" if verdict["blocked"] else "ok").inc()
+    traffic_events.put(verdict)
+    rollups.record(verdict)
+
+app = Flask(__name__, template_folder='templates', static_folder='static')
 
 # Initialize File Integrity Monitor (use a safe test folder first)
 WATCH_DIRS = [r"C:\Users\LIKHITH\OneDrive\Desktop\AURA-COPY"]  # ensure test_dir exists and contains testfile.txt
-integrity_monitor = FileIntegrityMonitor(
-    baseline_path=os.path.join(os.getcwd(), "integrity_baseline.json"),
-    watch_dirs=WATCH_DIRS,
-    interval=30,
-    alert_queue=integrity_queue,
-    max_files=20000  # optional cap for speed; None for unlimited
-)
-
-# start integrity monitor background thread
-integrity_monitor.start_monitoring(initial_delay=1)
-
-# ---- Radar/sniffer logic (unchanged) ----
+
+# "fast": kernel BPF filter + header-only parsing; "scapy": full scapy dissection
+CAPTURE_MODE = "fast"
+CAPTURE_IFACE = None  # None = scapy default interface
+# >1: that many capture+scoring processes sharing CAPTURE_IFACE through
+# AF_PACKET fanout (Linux only, needs CAP_NET_RAW); 1: threaded pipeline
+CAPTURE_WORKERS = 1
+
 stop_sniffer = threading.Event()
 
+# ---- Subsystem factories (run concurrently by the Startup orchestrator) ----
+def make_detector():
+    from anomaly_detection_service import BehavioralAnomalyDetector
+    # learned baselines survive restarts; the network profile skips the learning window
+    return BehavioralAnomalyDetector(snapshot_path=os.path.join(os.getcwd(), "behavior_baseline.npz"),
+                                     profile_path="network_profile.json")
+
+def make_intel():
+    from threat_intel_service import ThreatIntel
+    return ThreatIntel(abuse_key=os.environ.get("ABUSEIPDB_KEY", ""))
+
+def make_firewall():
+    from firewall_manager import FirewallManager
+    firewall = FirewallManager(on_change=lambda added, removed: blocked_events.put(
+        {"added": added, "removed": removed}),
+        observer=lambda stage, seconds: firewall_seconds.labels(stage).observe(seconds))
+    # streams opened before the firewall was up get the loaded blocklist as a diff
+    blocked_events.put({"added": firewall.list_blocked_ips(), "removed": []})
+    return firewall
+
+def make_geo():
+    from geolocation_service import GeoLocator
+    return GeoLocator()
+
+def make_integrity():
+    from integrity_monitor import FileIntegrityMonitor
+    monitor = FileIntegrityMonitor(
+        baseline_path=os.path.join(os.getcwd(), "integrity_baseline.db"),  # an existing .json is migrated
+        watch_dirs=WATCH_DIRS,
+        interval=30,
+        alert_queue=integrity_events,
+        max_files=20000,  # optional cap for speed; None for unlimited
+        observer=lambda stage, seconds: integrity_seconds.labels(stage).observe(seconds)
+    )
+    # start integrity monitor background thread (builds the baseline first if missing)
+    monitor.start_monitoring(initial_delay=1)
+    return monitor
+
+def make_history():
+    from history_store import HistoryStore
+    # one SQLite file per day under history/, 30 days kept
+    return HistoryStore(directory=os.path.join(os.getcwd(), "history"), retention_days=30)
+
+def make_engine(detector, intel, geo, firewall, history):
+    from verdict_cache import VerdictCache
+    from detection_engine import DetectionEngine
+    from flow_table import FlowTable
+
+    # Per-IP verdict cache in front of intel / geo (TTLs in seconds; the detector is stateful and never cached)
+    verdict_cache = VerdictCache(max_entries=50000, ttls={"intel": 300, "geo": 6 * 3600})
+    if intel.abuse is not None:
+        # a resolved AbuseIPDB score replaces the provisional intel verdict on the next packet
+        intel.abuse.on_result = lambda ip, score: verdict_cache.invalidate(ip)
+    # likewise a feed update replaces every cached intel verdict (geo stays valid)
+    intel.on_update = lambda entries: verdict_cache.invalidate_component("intel")
+
+    # Flow aggregation: score on flow start, every 10s while active, or per 5000 packets
+    flow_table = FlowTable(idle_timeout=30, active_timeout=10, packet_threshold=5000)
+
+    def on_verdict(verdict):
+        publish_verdict(verdict)
+        history.record(verdict)
+
+    # Scoring path shared by the synchronous callback and the staged pipeline
+    return DetectionEngine(intel, detector, geo, firewall, cache=verdict_cache,
+                           on_event=on_verdict, flow_table=flow_table,
+                           stage_observer=observe_stage)
+
+def make_pipeline(engine):
+    from packet_pipeline import PacketPipeline
+    # capture -> sharded scoring workers -> enforcement
+    analyze = stage_seconds.timed(engine.analyze, "analyze")
+    enforce = stage_seconds.timed(engine.enforce, "enforce")
+    return PacketPipeline(analyze, enforce, key=engine.external_ip, workers=4)
+
+def make_sniffer(pipeline, firewall):
+    from capture import build_bpf_filter, fast_sniff, extract_meta
+
+    def capture_packet(packet):
+        """Sniffer callback: only extract the header fields and hand off."""
+        meta = extract_meta(packet)
+        if meta is not None:
+            pipeline.submit(meta)
+
+    def start_sniffer():
+        print("🔍 Starting live packet capture...")
+        pipeline.start()
+        bpf = build_bpf_filter(firewall.list_blocked_ips())
+        if CAPTURE_MODE == "fast":
+            try:
+                fast_sniff(pipeline.submit, stop_sniffer, iface=CAPTURE_IFACE, bpf_filter=bpf)
+                return
+            except Exception as e:
+                print(f"[CAPTURE] Fast capture unavailable ({e}); falling back to scapy sniff.")
+        from scapy.all import sniff
+        sniff(prn=capture_packet, store=False, iface=CAPTURE_IFACE, filter=bpf,
+              stop_filter=lambda pkt: stop_sniffer.is_set())
+
+    sniffer_thread = threading.Thread(target=start_sniffer, daemon=True)
+    sniffer_thread.start()
+    return sniffer_thread
+
+def make_multicore_capture(intel, firewall, history):
+    from multicore_capture import MulticoreCapture
+
+    def on_verdict(verdict):
+        publish_verdict(verdict)
+        history.record(verdict)
+
+    def on_abuse(ip):
+        # workers ask the parent's resolver for misses; fresh results arrive
+        # through on_result, cached scores and skipped lookups are answered now
+        score = intel.abuse.get(ip)
+        if score is not None or not intel.abuse.pending(ip):
+            capture.push_abuse(ip, score)
+
+    def on_firewall_change(added, removed):
+        notify(added, removed)
+        capture.unblocked(removed)  # workers may request those blocks again
+
+    capture = MulticoreCapture(
+        workers=CAPTURE_WORKERS, iface=CAPTURE_IFACE, on_verdict=on_verdict, on_block=firewall.block_ip,
+        on_abuse=on_abuse if intel.abuse is not None else None,
+        config={"geo_db": "GeoLite2-City.mmdb",
+                "snapshot_path": os.path.join(os.getcwd(), "behavior_baseline.npz"),
+                "profile_path": "network_profile.json",
+                "flow_table": {"idle_timeout": 30, "active_timeout": 10, "packet_threshold": 5000},
+                "blocked_ips": firewall.list_blocked_ips()})
+    # wire feed updates before taking the snapshot, so a refresh in between is not lost
+    intel.on_update = capture.update_intel
+    capture.update_intel(intel.bad_entries)
+    capture.start()
+    if intel.abuse is not None:
+        intel.abuse.on_result = capture.push_abuse
+    notify = firewall.on_change or (lambda added, removed: None)
+    firewall.on_change = on_firewall_change
+    return capture
+
+
+boot = Startup()
+boot.add("intel", make_intel, close=lambda i: i.close())
+boot.add("firewall", make_firewall, close=lambda f: f.close())
+boot.add("integrity", make_integrity, close=lambda m: m.stop_monitoring())
+boot.add("history", make_history, close=lambda h: h.close())
+if CAPTURE_WORKERS > 1:
+    # every worker process builds its own detector / geo / engine
+    boot.add("sniffer", make_multicore_capture, deps=("intel", "firewall", "history"),
+             close=lambda c: c.stop())
+else:
+    boot.add("detector", make_detector, close=lambda d: d.close())
+    boot.add("geo", make_geo)
+    boot.add("engine", make_engine, deps=("detector", "intel", "geo", "firewall", "history"))
+    boot.add("pipeline", make_pipeline, deps=("engine",), close=lambda p: p.stop())
+    boot.add("sniffer", make_sniffer, deps=("pipeline", "firewall"), close=lambda t: stop_sniffer.set())
+# spawned capture workers import this module as __mp_main__; only the parent boots
+if __name__ != "__mp_main__":
+    boot.start()
+
+# subsystem stats() dicts are exported as gauges at scrape time
+metrics.collect("startup", boot.status)
+metrics.collect("bus", bus.stats)
+metrics.collect("rollup", rollups.stats)
+metrics.collect("pipeline", lambda: boot["pipeline"].stats())
+metrics.collect("flows", lambda: boot["engine"].flow_table.stats())
+metrics.collect("cache", lambda: boot["engine"].cache.stats())
+metrics.collect("intel", lambda: boot["intel"].stats())
+metrics.collect("firewall", lambda: boot["firewall"].stats())
+metrics.collect("history", lambda: boot["history"].stats())
+if CAPTURE_WORKERS > 1:
+    metrics.collect("capture", lambda: boot["sniffer"].stats())
+else:
+    metrics.collect("detector", lambda: boot["detector"].stats())
+    metrics.collect("geo", lambda: boot["geo"].stats())
+metrics.collect("integrity", lambda: {"scans": boot["integrity"].scan_count,
+                                      "tracked_files": len(boot["integrity"].baseline),
+                                      "last_scan": boot["integrity"].last_scan_stats,
+                                      "drift": boot["integrity"].outstanding()})
+
 def process_packet(packet):
-    if not packet.haslayer(IP):
-        return
-    src = packet[IP].src
-    dst = packet[IP].dst
-    if geo._is_private_ip(src) and geo._is_private_ip(dst):
-        return
-    external_ip = dst if geo._is_private_ip(src) else src
-
-    intel_score = intel.check_ip_reputation(external_ip)
-    behavior_score = detector.calculate_threat_score(external_ip)
-    final_score = min(1.0, round(intel_score + behavior_score, 2))
-
-    location = geo.get_location(external_ip)
-    country = location.get("country", "Unknown") if location else "Unknown"
-    lat = location.get("latitude", 0.0) if location else 0.0
-    lon = location.get("longitude", 0.0) if location else 0.0
-
-    if final_score >= 0.6:
-        firewall.block_ip(external_ip)
-
-    traffic_data_queue.put({
-        "src_ip": src,
-        "dst_ip": dst,
-        "external_ip": external_ip,
-        "score": final_score,
-        "country": country,
-        "lat": lat,
-        "lon": lon,
-        "blocked": final_score >= 0.6
-    })
-
-    print(f"[AURA] {src} → {dst} | Score={final_score} | {'BLOCKED' if final_score>=0.6 else 'OK'}")
-
-def start_sniffer():
-    print("🔍 Starting live packet capture...")
-    sniff(prn=process_packet, store=False, stop_filter=lambda pkt: stop_sniffer.is_set())
-
-sniffer_thread = threading.Thread(target=start_sniffer, daemon=True)
-sniffer_thread.start()
+    """Synchronous path: score and enforce a single scapy packet in-line."""
+    from capture import extract_meta
+    meta = extract_meta(packet)
+    if meta is not None:
+        boot["engine"].process(meta)
+
+def needs(*names):
+    """Route decorator: 503 with readiness until the named subsystems are up, 404 if they never will be."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            blocked = boot.unavailable(names)
+            if blocked:
+                code, body = blocked
+                return jsonify(body), code
+            return fn(*args, **kwargs)
+        return inner
+    return wrap
 
 # ---- Flask routes ----
 @app.route('/')
@@ -90,47 +270,280 @@ def index():
 
 @app.route('/traffic')
 def traffic():
-    data = []
-    while not traffic_data_queue.empty():
-        data.append(traffic_data_queue.get())
-    return jsonify(data)
+    return jsonify([data for _, _, data in legacy_traffic.get_batch(1000, timeout=0)])
+
+def _sse_batch(batch, dropped):
+    """One SSE message per batch, grouped by topic; id is the last sequence number."""
+    payload = {"traffic": [], "integrity": [], "blocked": [], "dropped": dropped}
+    for _, topic, data in batch:
+        payload.setdefault(topic, []).append(data)
+    return f"id: {batch[-1][0]}\nevent: batch\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/stream')
+def stream():
+    """
+    Server-Sent Events feed of traffic, integrity and blocklist changes.
+    A reconnecting EventSource sends Last-Event-ID and gets only what it missed.
+    """
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    try:
+        last_seq = int(last_id) if last_id else None
+    except ValueError:
+        last_seq = None
+    sub = bus.subscribe(last_seq=last_seq)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if boot.is_ready("firewall"):
+                # no id: the blocklist snapshot does not move the resume point
+                yield f"event: blocked\ndata: {json.dumps(boot['firewall'].list_blocked_ips())}\n\n"
+            reported = 0
+            while True:
+                batch = sub.get_batch(STREAM_MAX_BATCH, timeout=STREAM_HEARTBEAT)
+                if not batch:
+                    if sub.closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse_batch(batch, sub.dropped - reported)
+                reported = sub.dropped
+                # server-side throttle: let the next batch accumulate
+                time.sleep(STREAM_INTERVAL)
+        finally:
+            sub.close()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/bus')
+def bus_stats():
+    return jsonify(bus.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if request.args.get("format") == "json":
+        return jsonify(metrics.summary())
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/profile/start')
+def profile_start():
+    started = profiler.start(hz=request.args.get("hz", 100, type=int),
+                             max_seconds=request.args.get("seconds", 60, type=int))
+    return jsonify({"started": started, **profiler.status()})
+
+@app.route('/profile/stop')
+def profile_stop():
+    # collapsed stacks, ready for flamegraph.pl / speedscope
+    profiler.stop()
+    return Response(profiler.collapsed(), mimetype="text/plain")
+
+@app.route('/profile')
+def profile_status():
+    return jsonify(profiler.status())
 
 @app.route('/status')
 def status():
-    return jsonify(detector.get_status())
+    if boot.is_ready("detector"):
+        data = dict(boot["detector"].get_status())
+    elif CAPTURE_WORKERS > 1 and boot.is_ready("sniffer"):
+        # each capture worker runs its own detector
+        data = {"mode": "Monitoring", "capture_workers": CAPTURE_WORKERS}
+    else:
+        data = {"mode": "Starting"}
+    data["startup"] = boot.status()
+    return jsonify(data)
 
 @app.route('/blocked')
+@needs("firewall")
 def blocked():
-    return jsonify(firewall.list_blocked_ips())
+    return jsonify(boot["firewall"].list_blocked_ips())
+
+@app.route('/firewall')
+@needs("firewall")
+def firewall_stats():
+    return jsonify(boot["firewall"].stats())
+
+@app.route('/pipeline')
+@needs("pipeline")
+def pipeline_stats():
+    return jsonify(boot["pipeline"].stats())
+
+@app.route('/capture')
+@needs("sniffer")
+def capture_stats():
+    if CAPTURE_WORKERS > 1:
+        return jsonify(boot["sniffer"].stats())
+    return jsonify({"workers": 1, "mode": "threaded pipeline (see /pipeline)"})
+
+@app.route('/flows')
+@needs("engine")
+def flows():
+    flow_table = boot["engine"].flow_table
+    return jsonify({"stats": flow_table.stats(), "top": flow_table.top_flows()})
+
+@app.route('/intel')
+@needs("intel")
+def intel_stats():
+    return jsonify(boot["intel"].stats())
+
+@app.route('/geo')
+@needs("geo")
+def geo_stats():
+    return jsonify(boot["geo"].stats())
+
+@app.route('/cache')
+@needs("engine")
+def cache_stats():
+    return jsonify(boot["engine"].cache.stats())
+
+def _number(args, name, type=float, default=None):
+    """Query argument as a number; ValueError if present but malformed."""
+    if name not in args:
+        return default
+    try:
+        return type(args[name])
+    except ValueError:
+        raise ValueError(f"{name} must be a number") from None
+
+def _history_args(args, limit, max_limit):
+    """(start, end, min_score, limit) for the /history endpoints; minutes=N means the last N minutes."""
+    start = _number(args, "start")
+    minutes = _number(args, "minutes")
+    if minutes is not None:
+        start = time.time() - minutes * 60
+    return (start, _number(args, "end"), _number(args, "min_score"),
+            min(max(_number(args, "limit", int, limit), 1), max_limit))
+
+@app.route('/history')
+@needs("history")
+def history():
+    """
+    Stored verdicts, newest first. Filters: start / end (unix time, or
+    minutes=N for the last N minutes), ip, country, min_score, blocked, limit.
+    """
+    args = request.args
+    try:
+        start, end, min_score, limit = _history_args(args, 1000, 100000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    blocked = args.get("blocked")
+    rows = boot["history"].query(
+        start=start, end=end, ip=args.get("ip"), country=args.get("country"), min_score=min_score,
+        blocked=None if blocked is None else blocked.lower() in ("1", "true", "yes"),
+        limit=limit)
+    return jsonify(rows)
+
+@app.route('/history/top')
+@needs("history")
+def history_top():
+    """Verdict counts grouped by country (default) or external_ip over a time range."""
+    args = request.args
+    try:
+        start, end, min_score, limit = _history_args(args, 50, 1000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    group_by = args.get("by", "country")
+    if group_by not in ("country", "external_ip"):
+        return jsonify({"error": "by must be country or external_ip"}), 400
+    return jsonify(boot["history"].count(
+        start=start, end=end, group_by=group_by, min_score=min_score, limit=limit))
+
+@app.route('/history/stats')
+@needs("history")
+def history_stats():
+    return jsonify(boot["history"].stats())
+
+@app.route('/rollup')
+def rollup():
+    """
+    Map aggregates over the last `minutes` (default 10): totals, per-bucket
+    series, top countries, grid cells [lat, lon, count, blocked, max_score]
+    and top external IPs; `top` caps each list.
+    """
+    args = request.args
+    minutes = args.get("minutes", type=float)
+    return jsonify(rollups.snapshot(seconds=minutes * 60 if minutes else None,
+                                    top=min(max(args.get("top", 200, type=int), 1), 1000)))
 
 @app.route('/integrity')
 def integrity():
-    # return all queued integrity events (consumes queue)
-    events = []
-    while not integrity_queue.empty():
-        events.append(integrity_queue.get())
-    return jsonify(events)
+    """
+    Without arguments: integrity events queued since the last poll.
+    With offset / limit / kind / since / acknowledged: one page of the
+    outstanding drift set (see FileIntegrityMonitor.changes).
+    """
+    args = request.args
+    if not args:
+        return jsonify([data for _, _, data in legacy_integrity.get_batch(200, timeout=0)])
+    return integrity_changes()
+
+@needs("integrity")
+def integrity_changes():
+    args = request.args
+    kind = args.get("kind")
+    if kind not in (None, "modified", "added", "removed"):
+        return jsonify({"error": "kind must be modified, added or removed"}), 400
+    acknowledged = args.get("acknowledged")
+    return jsonify(boot["integrity"].changes(
+        offset=max(args.get("offset", 0, type=int), 0),
+        limit=min(max(args.get("limit", 100, type=int), 1), 5000),
+        kind=kind, since=args.get("since", 0, type=int),
+        acknowledged=None if acknowledged is None else acknowledged.lower() in ("1", "true", "yes")))
+
+@app.route('/integrity/accept', methods=["POST"])
+@needs("integrity")
+def integrity_accept():
+    """Accept drift into the baseline: JSON {"paths": [...]} or {"kind": ...}; empty body = everything."""
+    body = request.get_json(silent=True) or {}
+    changed = boot["integrity"].accept(paths=body.get("paths"), kind=body.get("kind"))
+    return jsonify({"baseline_entries_changed": changed,
+                    "outstanding": boot["integrity"].outstanding()})
+
+@app.route('/integrity/acknowledge', methods=["POST"])
+@needs("integrity")
+def integrity_acknowledge():
+    """Mark drift as seen without accepting it: JSON {"paths": [...]}; empty body = everything."""
+    body = request.get_json(silent=True) or {}
+    return jsonify({"acknowledged": boot["integrity"].acknowledge(paths=body.get("paths"))})
+
+@app.route('/integrity_stats')
+@needs("integrity")
+def integrity_stats():
+    integrity_monitor = boot["integrity"]
+    return jsonify({"scans": integrity_monitor.scan_count,
+                    "tracked_files": len(integrity_monitor.baseline),
+                    "last_scan": integrity_monitor.last_scan_stats,
+                    "outstanding": integrity_monitor.outstanding()})
 
 @app.route('/force_integrity')
+@needs("integrity")
 def force_integrity():
-    # synchronous force scan and return result
-    event = integrity_monitor.force_scan()
+    # synchronous force scan; "changed" = new transitions in this scan,
+    # "drift" = nothing new but earlier drift is still unresolved
+    monitor = boot["integrity"]
+    event = monitor.force_scan()
+    outstanding = monitor.outstanding()
     if event:
-        return jsonify({"status": "changed", "event": event})
+        status = "changed"
+    elif any(n for kind, n in outstanding.items() if kind != "acknowledged"):
+        status = "drift"
     else:
-        return jsonify({"status": "ok", "event": None})
+        status = "ok"
+    return jsonify({"status": status, "event": event or None, "outstanding": outstanding})
 
 # graceful shutdown
 def shutdown_handler(sig, frame):
     print("\n[ AURA ] Shutting down...")
-    stop_sniffer.set()
-    integrity_monitor.stop_monitoring()
+    profiler.stop()
+    boot.close()
     sys.exit(0)
 
 signal.signal(signal.SIGINT, shutdown_handler)
 signal.signal(signal.SIGTERM, shutdown_handler)
 
 if __name__ == "__main__":
-    print("✅ System initialized successfully.")
+    print(f"✅ Web UI ready in {(time.perf_counter() - _t_start) * 1000:.0f} ms; "
+          f"subsystems are starting in the background (see /status).")
     print("🌍 Web UI: http://127.0.0.1:5000")
-    app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+    app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False, threaded=True)
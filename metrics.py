@@ -0,0 +1,326 @@
+# metrics.py
+import re
+import time
+
+# log-linear ("HDR-style") buckets over integer nanoseconds: values below
+# 2**SUB_BITS are exact, above that every power of two is split into
+# 2**SUB_BITS linear sub-buckets (about 6% worst-case relative error)
+SUB_BITS = 4
+SUB = 1 << SUB_BITS
+MAX_SHIFT = 40  # ~ 2**44 ns, about 5 hours
+N_BUCKETS = SUB * (MAX_SHIFT + 2)
+
+# Prometheus "le" bounds: powers of two nanoseconds from ~1us to ~68s, which
+# fall exactly on sub-bucket edges so the cumulative counts are exact
+PROM_BOUNDS_NS = [1 << k for k in range(10, 37)]
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _bucket_index(ns):
+    if ns < SUB:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - SUB_BITS - 1
+    if shift > MAX_SHIFT:
+        return N_BUCKETS - 1
+    return SUB * (shift + 1) + (ns >> shift) - SUB
+
+
+def _bucket_bounds(idx):
+    """[low, high) in nanoseconds covered by bucket idx."""
+    if idx < SUB:
+        return idx, idx + 1
+    shift = idx // SUB - 1
+    m = idx % SUB + SUB
+    return m << shift, (m + 1) << shift
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labelstr(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(int(value))
+
+
+# -------------------------------
+# metric children (one per label set)
+# -------------------------------
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, n=1):
+        self.value += n
+
+    def dec(self, n=1):
+        self.value -= n
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "count", "sum_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def observe(self, seconds):
+        ns = int(seconds * 1e9)
+        if ns < 0:
+            ns = 0
+        self.counts[_bucket_index(ns)] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) in seconds, bucket midpoint."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(self.count * q / 100.0)))
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= rank:
+                    low, high = _bucket_bounds(idx)
+                    return min((low + high) / 2, self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def summary(self):
+        return {"count": self.count,
+                "mean_us": round(self.sum_ns / self.count / 1e3, 2) if self.count else 0.0,
+                "p50_us": round(self.percentile(50) * 1e6, 2),
+                "p90_us": round(self.percentile(90) * 1e6, 2),
+                "p99_us": round(self.percentile(99) * 1e6, 2),
+                "max_us": round(self.max_ns / 1e3, 2)}
+
+
+class _Family:
+    """A named metric with optional labels; without labels it acts as its own child."""
+
+    kind = None
+    child_class = None
+
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(values, self.child_class())
+        return child
+
+    def __getattr__(self, attr):
+        # unlabelled families forward inc() / set() / observe() to their child
+        if attr.startswith("_") or self.labelnames:
+            raise AttributeError(attr)
+        return getattr(self._default, attr)
+
+
+class Counter(_Family):
+    kind = "counter"
+    child_class = _CounterChild
+
+    def render(self):
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_labelstr(self.labelnames, values)} {_fmt(child.value)}"
+
+
+class Gauge(_Family):
+    kind = "gauge"
+    child_class = _GaugeChild
+
+    def render(self):
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_labelstr(self.labelnames, values)} {_fmt(child.value)}"
+
+
+class Histogram(_Family):
+    kind = "histogram"
+    child_class = _HistogramChild
+
+    def render(self):
+        inf = 'le="+Inf"'
+        for values, child in list(self._children.items()):
+            counts = list(child.counts)
+            total, cumulative, idx = sum(counts), 0, 0
+            for bound in PROM_BOUNDS_NS:
+                while idx < N_BUCKETS and _bucket_bounds(idx)[1] <= bound:
+                    cumulative += counts[idx]
+                    idx += 1
+                le = f'le="{_fmt(bound / 1e9)}"'
+                yield f"{self.name}_bucket{_labelstr(self.labelnames, values, le)} {cumulative}"
+            yield f"{self.name}_bucket{_labelstr(self.labelnames, values, inf)} {total}"
+            yield f"{self.name}_sum{_labelstr(self.labelnames, values)} {_fmt(child.sum_ns / 1e9)}"
+            yield f"{self.name}_count{_labelstr(self.labelnames, values)} {total}"
+
+    def timed(self, fn, *labelvalues):
+        """Wrap fn so every call is observed under labelvalues."""
+        child = self.labels(*labelvalues)
+        perf = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            t0 = perf()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(perf() - t0)
+        return wrapper
+
+
+class Registry:
+    """
+    Process-wide metrics for AURA, rendered in Prometheus text format:
+    - counter / gauge / histogram families, updated lock-free on the hot
+      path (like the subsystems' own stats counters, a racing update can
+      rarely be lost; that is acceptable for monitoring)
+    - histograms use fixed log-linear buckets, so observe() is a few integer
+      operations and percentiles come out within a few percent
+    - collect(prefix, fn) exports a subsystem's existing stats() dict as
+      gauges at scrape time, so those counters cost nothing per packet
+    """
+
+    def __init__(self, namespace="aura"):
+        self.namespace = namespace
+        self._families = {}
+        self._collectors = []
+
+    def _family(self, cls, name, help, labelnames):
+        name = f"{self.namespace}_{name}"
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = cls(name, help, labelnames)
+        return family
+
+    def counter(self, name, help="", labelnames=()):
+        return self._family(Counter, name, help, labelnames)
+
+    def gauge(self, name, help="", labelnames=()):
+        return self._family(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help="", labelnames=()):
+        return self._family(Histogram, name, help, labelnames)
+
+    def collect(self, prefix, fn):
+        """fn() -> nested stats dict; numeric leaves become gauges. Errors skip the collector."""
+        self._collectors.append((prefix, fn))
+
+    # -------------------------------
+    # exposition
+    # -------------------------------
+    def _collected(self):
+        samples = {}
+        for prefix, fn in self._collectors:
+            try:
+                stats = fn()
+            except Exception:
+                continue  # subsystem not ready yet
+            _flatten(f"{self.namespace}_{prefix}", stats, (), samples)
+        return samples
+
+    def render(self):
+        lines = []
+        for family in list(self._families.values()):
+            if family.help:
+                lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(family.render())
+        for name, series in self._collected().items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in series:
+                lines.append(f"{name}{_labelstr([k for k, _ in labels], [v for _, v in labels])} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """JSON view: histogram percentiles plus counter / gauge values."""
+        out = {}
+        for family in list(self._families.values()):
+            for values, child in list(family._children.items()):
+                key = family.name + _labelstr(family.labelnames, values)
+                out[key] = child.summary() if family.kind == "histogram" else child.value
+        return out
+
+
+def _flatten(name, value, labels, samples):
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        samples.setdefault(_NAME_RE.sub("_", name), []).append((labels, value))
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            _flatten(f"{name}_{key}", child, labels, samples)
+    elif isinstance(value, (list, tuple)):
+        for i, child in enumerate(value):
+            _flatten(name, child, labels + (("index", i),), samples)
+
+
+class LogLimiter:
+    """
+    Console logging for hot paths: at most `rate` lines per `per` seconds;
+    the rest are counted and reported in one summary line per window.
+    """
+
+    def __init__(self, rate=5, per=1.0, tag="[AURA]"):
+        self.rate = rate
+        self.per = per
+        self.tag = tag
+        self._window = 0.0
+        self._printed = 0
+        self.suppressed = 0
+        self.total_suppressed = 0
+
+    def log(self, line):
+        now = time.monotonic()
+        if now - self._window >= self.per:
+            if self.suppressed:
+                print(f"{self.tag} ... {self.suppressed} similar lines suppressed "
+                      f"in the last {now - self._window:.1f}s")
+            self._window = now
+            self._printed = 0
+            self.suppressed = 0
+        if self._printed < self.rate:
+            self._printed += 1
+            print(line)
+        else:
+            self.suppressed += 1
+            self.total_suppressed += 1
@@ -0,0 +1,489 @@
+# multicore_capture.py
+"""
+Multi-process capture and scoring (Linux only).
+
+N worker processes each open an AF_PACKET socket on the same interface and
+join one PACKET_FANOUT group, so the kernel spreads packets across them and
+every worker runs its own parser, detector, intel index, geo reader, flow
+table and verdict cache on its own core. Verdicts, block requests and
+AbuseIPDB lookups are shipped to the parent in batches; the parent owns the
+firewall, the UI event bus and the history store.
+"""
+import ctypes
+import multiprocessing as mp
+import os
+import queue
+import signal
+import socket
+import struct
+import threading
+import time
+
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+PACKET_FANOUT = 18
+PACKET_FANOUT_DATA = 22
+PACKET_FANOUT_HASH = 0
+PACKET_FANOUT_CBPF = 6
+PACKET_FANOUT_FLAG_DEFRAG = 0x8000
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = 26
+SKF_AD_OFF = 0xFFFFF000  # -0x1000 as u32: ancillary loads
+SKF_AD_PROTOCOL = 0
+SKF_NET_OFF = 0xFFF00000  # -0x100000 as u32: loads relative to the network header
+
+# per-worker counters kept in one shared-memory array (each worker only writes its own row)
+COUNTERS = ("received", "parsed", "scored", "blocked", "batches", "events_dropped",
+            "kernel_packets", "kernel_drops")
+_C = {name: i for i, name in enumerate(COUNTERS)}
+
+_unpack_stats = struct.Struct("II").unpack
+
+
+# -------------------------------
+# BPF programs (fanout + capture filter)
+# -------------------------------
+class _SockFilter(ctypes.Structure):
+    _fields_ = [("code", ctypes.c_uint16), ("jt", ctypes.c_uint8),
+                ("jf", ctypes.c_uint8), ("k", ctypes.c_uint32)]
+
+
+class _SockFprog(ctypes.Structure):
+    _fields_ = [("len", ctypes.c_uint16), ("filter", ctypes.POINTER(_SockFilter))]
+
+
+_PRIVATE_V4 = ((0xFF000000, 0x0A000000), (0xFFF00000, 0xAC100000), (0xFFFF0000, 0xC0A80000))
+
+# classic BPF opcodes used below
+_LD_H_ABS, _LD_W_ABS, _JEQ_K, _JA = 0x28, 0x20, 0x15, 0x05
+_AND_K, _RSH_K, _XOR_X, _MOD_K, _TAX, _RET_A, _RET_K = 0x54, 0x74, 0xAC, 0x94, 0x07, 0x16, 0x06
+# source / destination address relative to the network header: skb->data
+# points there on receive but at the link header on locally transmitted
+# frames, so absolute offsets would read different bytes per direction
+_LD_SRC = (_LD_W_ABS, 0, 0, SKF_NET_OFF + 12)
+_LD_DST = (_LD_W_ABS, 0, 0, SKF_NET_OFF + 16)
+_LD_PROTO = (_LD_H_ABS, 0, 0, SKF_AD_OFF + SKF_AD_PROTOCOL)  # skb->protocol
+
+
+def fanout_program(workers):
+    """
+    Classic BPF program for PACKET_FANOUT_CBPF that returns the worker index
+    for an IPv4 packet, keyed on the external (non-RFC1918) address: every
+    packet of an external IP reaches the same worker, whichever internal
+    host it talks to and in either direction, so per-IP detector state is
+    never split. Non-IPv4 frames go to worker 0. Mirrors fanout_shard().
+    Addresses are read with SKF_NET_OFF loads and the protocol from the
+    skb, so the program works for any link type and for both received and
+    locally transmitted frames.
+    """
+    checks = len(_PRIVATE_V4)
+    use_dst = 2 + 3 * checks + 2   # index of the destination load
+    non_ip = use_dst + 6           # index of "ret #0"
+    prog = [_LD_PROTO, (_JEQ_K, 0, non_ip - 2, 0x0800)]
+    for mask, net in _PRIVATE_V4:
+        prog.append(_LD_SRC)
+        prog.append((_AND_K, 0, 0, mask))
+        prog.append((_JEQ_K, use_dst - len(prog) - 1, 0, net))  # private source: key on dst
+    prog += [_LD_SRC, (_JA, 0, 0, 1),
+             _LD_DST,
+             (_TAX, 0, 0, 0), (_RSH_K, 0, 0, 16), (_XOR_X, 0, 0, 0),
+             (_MOD_K, 0, 0, workers), (_RET_A, 0, 0, 0),
+             (_RET_K, 0, 0, 0)]
+    return prog
+
+
+def capture_filter_program(blocked_ips=(), max_blocked=256, snaplen=0x40000):
+    """
+    Socket filter equivalent to capture.build_bpf_filter(): IPv4 with at
+    least one non-RFC1918 side, minus already-blocked hosts (capped). Built
+    by hand so the workers do not need libpcap to compile an expression;
+    every drop is an inline "ret #0", so no jump exceeds cBPF's 8-bit range.
+    """
+    hosts = [int.from_bytes(socket.inet_aton(ip), "big")
+             for ip in sorted(blocked_ips) if ":" not in ip][:max_blocked]
+    prog = [_LD_PROTO, (_JEQ_K, 1, 0, 0x0800), (_RET_K, 0, 0, 0)]
+    dst_block = len(prog) + 3 * len(_PRIVATE_V4) + 1
+    for mask, net in _PRIVATE_V4:
+        prog.append(_LD_SRC)
+        prog.append((_AND_K, 0, 0, mask))
+        prog.append((_JEQ_K, dst_block - len(prog) - 1, 0, net))  # private source: check dst
+    prog.append((_JA, 0, 0, 4 * len(_PRIVATE_V4)))                # public source: keep
+    for mask, net in _PRIVATE_V4:
+        prog += [_LD_DST, (_AND_K, 0, 0, mask), (_JEQ_K, 0, 1, net),
+                 (_RET_K, 0, 0, 0)]                               # private <-> private
+    for load in (_LD_SRC, _LD_DST):
+        prog.append(load)
+        for host in hosts:
+            prog += [(_JEQ_K, 0, 1, host), (_RET_K, 0, 0, 0)]    # already blocked
+    prog.append((_RET_K, 0, 0, snaplen))
+    return prog
+
+
+def _attach(sock, level, option, prog):
+    filters = (_SockFilter * len(prog))(*prog)
+    fprog = _SockFprog(len(prog), ctypes.cast(filters, ctypes.POINTER(_SockFilter)))
+    sock.setsockopt(level, option, bytes(fprog))
+
+
+def fanout_shard(external_ip, workers):
+    """The worker fanout_program() sends external_ip's traffic to."""
+    value = int.from_bytes(socket.inet_aton(external_ip), "big")
+    return ((value >> 16) ^ value) % workers
+
+
+def _fanout_arg(group, mode):
+    # packed as unsigned: the DEFRAG flag sets bit 31, which overflows a C int
+    return struct.pack("I", (group & 0xFFFF) | (mode << 16))
+
+
+def _packet_socket(iface, rcvbuf, blocked_ips):
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    except OSError:
+        pass
+    # filter before bind, so nothing unfiltered is queued in between
+    _attach(sock, socket.SOL_SOCKET, SO_ATTACH_FILTER, capture_filter_program(blocked_ips))
+    if iface:
+        sock.bind((iface, 0))
+    return sock
+
+
+def open_fanout_socket(iface, group, workers, rcvbuf=8 << 20, blocked_ips=()):
+    """
+    AF_PACKET socket with the capture filter attached, joined to fanout
+    group; keyed by external IP where supported.
+    """
+    sock = _packet_socket(iface, rcvbuf, blocked_ips)
+    mode = "external-ip"
+    try:
+        sock.setsockopt(SOL_PACKET, PACKET_FANOUT,
+                        _fanout_arg(group, PACKET_FANOUT_CBPF | PACKET_FANOUT_FLAG_DEFRAG))
+        _attach(sock, SOL_PACKET, PACKET_FANOUT_DATA, fanout_program(workers))
+    except OSError:
+        # kernels without CBPF fanout (< 4.3): the kernel's flow hash keeps each
+        # flow on one worker, but one external IP's flows may be split
+        sock.close()
+        sock = _packet_socket(iface, rcvbuf, blocked_ips)
+        sock.setsockopt(SOL_PACKET, PACKET_FANOUT,
+                        _fanout_arg(group, PACKET_FANOUT_HASH | PACKET_FANOUT_FLAG_DEFRAG))
+        mode = "flow-hash"
+    return sock, mode
+
+
+# -------------------------------
+# worker process
+# -------------------------------
+class _Outbox:
+    """Worker-side batching of messages to the parent (one queue put per batch)."""
+
+    def __init__(self, idx, out_queue, counters, base, batch_size=256, max_delay=0.1):
+        self.idx = idx
+        self.out_queue = out_queue
+        self.counters = counters
+        self.base = base
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.events = []
+        self.requests = []   # block / abuse requests are never dropped
+        self.last_flush = time.monotonic()
+
+    def verdict(self, verdict):
+        self.events.append(("verdict", verdict))
+        if len(self.events) >= self.batch_size:
+            self.flush()
+
+    def request(self, kind, payload):
+        self.requests.append((kind, payload))
+
+    def maybe_flush(self):
+        if (self.events or self.requests) and time.monotonic() - self.last_flush >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not (self.events or self.requests):
+            return
+        try:
+            self.out_queue.put_nowait((self.idx, self.requests + self.events))
+            self.requests = []
+            self.counters[self.base + _C["batches"]] += 1
+        except queue.Full:
+            # the parent is behind: shed UI events, keep requests for the next try
+            self.counters[self.base + _C["events_dropped"]] += len(self.events)
+        self.events = []
+
+
+class _FirewallProxy:
+    """
+    Stands in for FirewallManager inside a worker: blocks go to the parent,
+    once per IP until the parent reports the IP unblocked (e.g. TTL expiry).
+    """
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+        self.requested = set()
+
+    def unblocked(self, ips):
+        self.requested.difference_update(ips)
+
+    def block_ip(self, ip, ttl=None):
+        if ip not in self.requested:
+            self.requested.add(ip)
+            self.outbox.request("block", ip)
+            self.outbox.flush()
+
+    def list_blocked_ips(self):
+        return sorted(self.requested)
+
+
+class _AbuseProxy:
+    """
+    AbuseResolver.get() inside a worker: misses are requested from the parent,
+    which pushes the score back. A None answer means the parent skipped the
+    lookup (budget / backoff); the IP may then be asked for again after
+    retry_after seconds.
+    """
+
+    def __init__(self, outbox, retry_after=60.0):
+        self.outbox = outbox
+        self.retry_after = retry_after
+        self.scores = {}
+        self.requested = {}   # ip -> monotonic time a new request is allowed (inf while pending)
+        self.on_result = None
+
+    def get(self, ip):
+        score = self.scores.get(ip)
+        if score is None and self.requested.get(ip, 0.0) <= time.monotonic():
+            self.requested[ip] = float("inf")
+            self.outbox.request("abuse", ip)
+        return score
+
+    def answered(self, results):
+        retry = time.monotonic() + self.retry_after
+        for ip, score in results.items():
+            if score is None:
+                if ip not in self.scores:
+                    self.requested[ip] = retry
+            else:
+                self.scores[ip] = score
+                self.requested.pop(ip, None)
+
+    def stats(self):
+        return {"cached": len(self.scores), "requested": len(self.requested)}
+
+    def close(self):
+        pass
+
+
+def _worker_main(idx, config, out_queue, ctl_queue, counters, stop):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+    from capture import parse_ethernet
+    from anomaly_detection_service import BehavioralAnomalyDetector
+    from threat_intel_service import ThreatIntel
+    from geolocation_service import GeoLocator
+    from verdict_cache import VerdictCache
+    from flow_table import FlowTable
+    from detection_engine import DetectionEngine
+
+    base = idx * len(COUNTERS)
+    outbox = _Outbox(idx, out_queue, counters, base)
+    abuse = _AbuseProxy(outbox) if config.get("abuse") else None
+    intel = ThreatIntel(fetch=False, resolver=abuse)
+    intel._on_feed_update(set(config.get("intel_entries", ())))
+    snapshot = config.get("snapshot_path")
+    if snapshot:
+        root, ext = os.path.splitext(snapshot)
+        snapshot = f"{root}.w{idx}{ext}"
+    detector = BehavioralAnomalyDetector(snapshot_path=snapshot, profile_path=config.get("profile_path"))
+    geo = GeoLocator(config.get("geo_db", "GeoLite2-City.mmdb"))
+    firewall = _FirewallProxy(outbox)
+    engine = DetectionEngine(intel, detector, geo, firewall,
+                             cache=VerdictCache(max_entries=config.get("cache_entries", 50000)),
+                             on_event=outbox.verdict, log_events=config.get("log_events", True),
+                             flow_table=FlowTable(**config.get("flow_table", {})),
+                             log_rate=1, block_log_rate=5)
+
+    sock, mode = open_fanout_socket(config.get("iface"), config["group"], config["workers"],
+                                    blocked_ips=config.get("blocked_ips", ()))
+    sock.settimeout(0.1)
+    print(f"[CAPTURE] Worker {idx} (pid {os.getpid()}) capturing, fanout by {mode}.")
+    buf = bytearray(65536)
+    view = memoryview(buf)
+    received = _C["received"] + base
+    parsed = _C["parsed"] + base
+    scored = _C["scored"] + base
+    blocked = _C["blocked"] + base
+    now = time.time
+    last_poll = 0.0
+    try:
+        while not stop.is_set():
+            try:
+                n = sock.recv_into(buf)
+            except socket.timeout:
+                n = 0
+            if n:
+                counters[received] += 1
+                meta = parse_ethernet(view[:n], now())
+                if meta is not None:
+                    counters[parsed] += 1
+                    verdict = engine.process(meta)
+                    if verdict is not None:
+                        counters[scored] += 1
+                        if verdict["blocked"]:
+                            counters[blocked] += 1
+            t = time.monotonic()
+            if t - last_poll >= 0.1:
+                last_poll = t
+                outbox.maybe_flush()
+                _poll_control(ctl_queue, intel, abuse, firewall, engine.cache)
+                packets, drops = _unpack_stats(sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, 8))
+                counters[base + _C["kernel_packets"]] += packets
+                counters[base + _C["kernel_drops"]] += drops
+    finally:
+        outbox.flush()
+        sock.close()
+        detector.close()
+
+
+def _poll_control(ctl_queue, intel, abuse, firewall, cache):
+    while True:
+        try:
+            kind, payload = ctl_queue.get_nowait()
+        except queue.Empty:
+            return
+        if kind == "intel":
+            intel._on_feed_update(set(payload))
+            cache.invalidate_component("intel")
+        elif kind == "abuse" and abuse is not None:
+            abuse.answered(payload)
+            for ip, score in payload.items():
+                if score is not None:
+                    cache.invalidate(ip)  # replace the provisional intel verdict
+        elif kind == "unblock":
+            firewall.unblocked(payload)
+
+
+# -------------------------------
+# parent side
+# -------------------------------
+class MulticoreCapture:
+    """
+    Runs `workers` capture+scoring processes on one interface.
+    - config: picklable settings for the workers (geo_db, snapshot_path,
+      profile_path, flow_table kwargs, intel_entries, blocked_ips, abuse,
+      log_events)
+    - on_verdict(verdict) / on_block(ip) / on_abuse(ip) run on the parent's
+      collector thread for everything the workers send back
+    - update_intel(entries), push_abuse(ip, score) (None = lookup skipped)
+      and unblocked(ips) broadcast to workers; an update_intel() before
+      start() replaces the entries the workers are started with
+    - stats() reads the workers' shared-memory counters without messaging them
+    """
+
+    def __init__(self, workers, iface, on_verdict, on_block, on_abuse=None, config=None,
+                 queue_size=4096):
+        self.workers = max(1, int(workers))
+        self.iface = iface
+        self.on_verdict = on_verdict
+        self.on_block = on_block
+        self.on_abuse = on_abuse
+        self.config = dict(config or {})
+        self.config.update(iface=iface, workers=self.workers,
+                           group=self.config.get("group") or (os.getpid() & 0xFFFF),
+                           abuse=on_abuse is not None)
+        self.queue_size = queue_size
+        # spawn: workers start from a clean interpreter instead of forking a threaded parent
+        self._ctx = mp.get_context("spawn")
+        self._procs = []
+        self._ctl = []
+        self._collector = None
+        self._start_lock = threading.Lock()
+        self.running = False
+        self.received_batches = 0
+        self.errors = 0
+
+    def start(self):
+        ctx = self._ctx
+        self._stop = ctx.Event()
+        self._out = ctx.Queue(maxsize=self.queue_size)
+        self.counters = ctx.Array("Q", self.workers * len(COUNTERS), lock=False)
+        # update_intel() waits for this, so an update either lands in the
+        # workers' start-up config or reaches every control queue
+        with self._start_lock:
+            self.running = True
+            for idx in range(self.workers):
+                ctl = ctx.Queue()
+                proc = ctx.Process(target=_worker_main, name=f"aura-capture-{idx}",
+                                   args=(idx, self.config, self._out, ctl, self.counters, self._stop),
+                                   daemon=True)
+                proc.start()
+                self._ctl.append(ctl)
+                self._procs.append(proc)
+        self._collector = threading.Thread(target=self._collect_loop, name="aura-capture-collect", daemon=True)
+        self._collector.start()
+        print(f"[CAPTURE] Started {self.workers} capture worker processes on {self.iface or 'all interfaces'}.")
+
+    def _collect_loop(self):
+        handlers = {"verdict": self.on_verdict, "block": self.on_block, "abuse": self.on_abuse}
+        while self.running or not self._out.empty():
+            try:
+                _, items = self._out.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self.received_batches += 1
+            for kind, payload in items:
+                try:
+                    handlers[kind](payload)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[CAPTURE] Handling {kind} from a worker failed: {e}")
+
+    def _broadcast(self, message):
+        for ctl in self._ctl:
+            try:
+                ctl.put_nowait(message)
+            except (queue.Full, ValueError, OSError):
+                pass
+
+    def update_intel(self, entries):
+        with self._start_lock:
+            if not self.running:
+                self.config["intel_entries"] = sorted(entries)
+                return
+        self._broadcast(("intel", list(entries)))
+
+    def push_abuse(self, ip, score):
+        self._broadcast(("abuse", {ip: score}))
+
+    def unblocked(self, ips):
+        """Let workers request blocks for these IPs again (after an unblock / TTL expiry)."""
+        if ips:
+            self._broadcast(("unblock", list(ips)))
+
+    def stop(self, timeout=5.0):
+        if not self.running:
+            return
+        self._stop.set()
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self.running = False
+        if self._collector is not None:
+            self._collector.join(timeout)
+        print("[CAPTURE] Capture workers stopped.")
+
+    def stats(self):
+        per_worker = []
+        n = len(COUNTERS)
+        for idx, proc in enumerate(self._procs):
+            row = dict(zip(COUNTERS, self.counters[idx * n:(idx + 1) * n]))
+            row["alive"] = proc.is_alive()
+            per_worker.append(row)
+        totals = {name: sum(w[name] for w in per_worker) for name in COUNTERS}
+        return {"workers": self.workers, "running": self.running, "totals": totals,
+                "batches_received": self.received_batches, "errors": self.errors,
+                "per_worker": per_worker}
@@ -0,0 +1,165 @@
+# packet_pipeline.py
+import threading
+import zlib
+from queue import Queue, Full
+
+_STOP = object()
+
+
+class _StageStats:
+    __slots__ = ("accepted", "dropped", "processed", "errors")
+
+    def __init__(self):
+        self.accepted = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+
+    def as_dict(self, depth):
+        return {"accepted": self.accepted, "dropped": self.dropped,
+                "processed": self.processed, "errors": self.errors, "depth": depth}
+
+
+class PacketPipeline:
+    """
+    Staged packet pipeline behind the sniffer:
+    - capture:  submit() only drops a PacketMeta into a bounded buffer
+    - dispatch: routes each packet to a scoring worker sharded by key(meta)
+                (the external IP), so per-IP detector state stays on one thread
+    - scoring:  N workers run analyze(meta, key) -> verdict
+    - enforce:  a single thread runs enforce(verdict) (firewall, UI, logging)
+    Every stage is bounded; when a stage is full the item is dropped and counted
+    instead of stalling capture. Counters are best-effort (no locking).
+    """
+
+    def __init__(self, analyze, enforce, key, workers=4, capture_size=65536,
+                 worker_queue_size=8192, enforce_queue_size=8192):
+        self.analyze = analyze
+        self.enforce = enforce
+        self.key = key
+        self.workers = max(1, int(workers))
+        self.capture_buffer = Queue(maxsize=capture_size)
+        self.worker_queues = [Queue(maxsize=worker_queue_size) for _ in range(self.workers)]
+        self.enforce_queue = Queue(maxsize=enforce_queue_size)
+        self.stats_capture = _StageStats()
+        self.stats_dispatch = _StageStats()
+        self.stats_scoring = [_StageStats() for _ in range(self.workers)]
+        self.stats_enforce = _StageStats()
+        self.filtered = 0
+        self._threads = []
+        self.running = False
+
+    # -------------------------------
+    # capture stage (called from the sniffer callback)
+    # -------------------------------
+    def submit(self, meta):
+        try:
+            self.capture_buffer.put_nowait(meta)
+            self.stats_capture.accepted += 1
+        except Full:
+            self.stats_capture.dropped += 1
+
+    # -------------------------------
+    # stage loops
+    # -------------------------------
+    def _shard(self, key):
+        return zlib.crc32(key.encode()) % self.workers
+
+    def _dispatch_loop(self):
+        stats = self.stats_dispatch
+        while True:
+            meta = self.capture_buffer.get()
+            if meta is _STOP:
+                break
+            try:
+                key = self.key(meta)
+            except Exception:
+                stats.errors += 1
+                continue
+            stats.processed += 1
+            if key is None:
+                self.filtered += 1
+                continue
+            shard = self._shard(key) if self.workers > 1 else 0
+            try:
+                self.worker_queues[shard].put_nowait((meta, key))
+                self.stats_scoring[shard].accepted += 1
+            except Full:
+                self.stats_scoring[shard].dropped += 1
+
+    def _worker_loop(self, idx):
+        q = self.worker_queues[idx]
+        stats = self.stats_scoring[idx]
+        while True:
+            item = q.get()
+            if item is _STOP:
+                break
+            meta, key = item
+            try:
+                verdict = self.analyze(meta, key)
+            except Exception as e:
+                stats.errors += 1
+                print(f"[PIPELINE] scoring worker {idx} error: {e}")
+                continue
+            stats.processed += 1
+            if verdict is None:
+                continue
+            try:
+                self.enforce_queue.put_nowait(verdict)
+                self.stats_enforce.accepted += 1
+            except Full:
+                self.stats_enforce.dropped += 1
+
+    def _enforce_loop(self):
+        stats = self.stats_enforce
+        while True:
+            verdict = self.enforce_queue.get()
+            if verdict is _STOP:
+                break
+            try:
+                self.enforce(verdict)
+                stats.processed += 1
+            except Exception as e:
+                stats.errors += 1
+                print(f"[PIPELINE] enforcement error: {e}")
+
+    # -------------------------------
+    # lifecycle
+    # -------------------------------
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        specs = [("aura-dispatch", self._dispatch_loop, ())]
+        specs += [(f"aura-score-{i}", self._worker_loop, (i,)) for i in range(self.workers)]
+        specs.append(("aura-enforce", self._enforce_loop, ()))
+        for name, target, args in specs:
+            t = threading.Thread(target=target, args=args, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"[PIPELINE] Started with {self.workers} scoring workers.")
+
+    def stop(self, timeout=2.0):
+        """Drain and stop all stages in order (capture -> scoring -> enforce)."""
+        if not self.running:
+            return
+        self.running = False
+        self.capture_buffer.put(_STOP)
+        self._threads[0].join(timeout)
+        for q in self.worker_queues:
+            q.put(_STOP)
+        for t in self._threads[1:-1]:
+            t.join(timeout)
+        self.enforce_queue.put(_STOP)
+        self._threads[-1].join(timeout)
+        self._threads = []
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "capture": self.stats_capture.as_dict(self.capture_buffer.qsize()),
+            "dispatch": dict(self.stats_dispatch.as_dict(0), filtered=self.filtered),
+            "scoring": [s.as_dict(q.qsize()) for s, q in zip(self.stats_scoring, self.worker_queues)],
+            "enforce": self.stats_enforce.as_dict(self.enforce_queue.qsize()),
+        }
@@ -0,0 +1,126 @@
+# parallel_hasher.py
+import hashlib
+import mmap
+import os
+import threading
+from queue import Queue
+
+_DONE = object()
+
+
+def walk_files(dirs, max_files=None):
+    """
+    Yield (path, stat_result) for every regular file under dirs using os.scandir
+    (directory entries carry their type, so no extra stat per entry to tell
+    files from directories). Symlinked directories are not followed.
+    On Windows the cached DirEntry stat has st_ino == 0; callers comparing
+    stat results must treat a zero inode as unknown.
+    """
+    count = 0
+    for base in dirs:
+        if not os.path.exists(base):
+            continue
+        stack = [base]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, st
+                count += 1
+                if max_files and count >= max_files:
+                    return
+            # depth-first, top-down like os.walk
+            stack.extend(reversed(subdirs))
+
+
+class ParallelHasher:
+    """
+    SHA-256 hashing on a pool of threads (hashlib releases the GIL while it
+    digests large buffers, and file reads release it too).
+    - work is fed through a bounded queue, so walking and hashing overlap
+      without buffering the whole tree in memory
+    - files >= mmap_threshold are hashed straight from a read-only mmap
+    """
+
+    def __init__(self, workers=None, queue_size=1024, mmap_threshold=8 * 1024 * 1024,
+                 chunk_size=1024 * 1024):
+        self.workers = max(1, workers or min(8, (os.cpu_count() or 1) + 4))
+        self.queue_size = queue_size
+        self.mmap_threshold = mmap_threshold
+        self.chunk_size = chunk_size
+
+    def hash_file(self, path, size=None):
+        """Return the raw 32-byte sha256 digest of path, or None if it cannot be read."""
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                if size >= self.mmap_threshold:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        view = memoryview(mm)
+                        try:
+                            for off in range(0, len(view), self.chunk_size):
+                                h.update(view[off:off + self.chunk_size])
+                        finally:
+                            view.release()
+                else:
+                    for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                        h.update(chunk)
+            return h.digest()
+        except (OSError, ValueError):
+            return None
+
+    def hash_all(self, items, on_result):
+        """
+        Hash every (key, path, size) from items and call on_result(key, digest)
+        (from worker threads; digest is None for unreadable files).
+        Returns once everything has been hashed.
+        """
+        if self.workers == 1:
+            for key, path, size in items:
+                on_result(key, self.hash_file(path, size))
+            return
+
+        q = Queue(maxsize=self.queue_size)
+        errors = []
+
+        def _worker():
+            while True:
+                item = q.get()
+                if item is _DONE:
+                    return
+                key, path, size = item
+                try:
+                    on_result(key, self.hash_file(path, size))
+                except Exception as e:  # keep draining so the producer never blocks forever
+                    errors.append(e)
+
+        threads = [threading.Thread(target=_worker, name=f"aura-hash-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        try:
+            for item in items:
+                q.put(item)
+        finally:
+            for _ in threads:
+                q.put(_DONE)
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
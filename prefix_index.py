@@ -0,0 +1,73 @@
+# prefix_index.py
+import bisect
+import ipaddress
+
+
+class PrefixIndex:
+    """
+    Compiled CIDR lookup table for IPv4 and IPv6.
+    - every prefix is converted once into an integer [start, end] interval
+    - overlapping / adjacent intervals are merged, so the table stays disjoint
+    - lookups are a single bisect over the sorted starts: O(log N)
+    """
+
+    def __init__(self, entries=()):
+        self._starts = {4: [], 6: []}
+        self._ends = {4: [], 6: []}
+        self.size = 0          # number of prefixes accepted
+        self.invalid = 0       # number of entries that could not be parsed
+        self._build(entries)
+
+    # -------------------------------
+    # build
+    # -------------------------------
+    def _build(self, entries):
+        intervals = {4: [], 6: []}
+        for entry in entries:
+            try:
+                net = ipaddress.ip_network(str(entry).strip(), strict=False)
+            except ValueError:
+                self.invalid += 1
+                continue
+            intervals[net.version].append(
+                (int(net.network_address), int(net.broadcast_address))
+            )
+            self.size += 1
+
+        for version, spans in intervals.items():
+            spans.sort()
+            starts, ends = self._starts[version], self._ends[version]
+            for start, end in spans:
+                if ends and start <= ends[-1] + 1:
+                    if end > ends[-1]:
+                        ends[-1] = end
+                else:
+                    starts.append(start)
+                    ends.append(end)
+
+    # -------------------------------
+    # lookup
+    # -------------------------------
+    def contains_int(self, value, version=4):
+        """Return True if the integer address falls inside any prefix."""
+        starts = self._starts[version]
+        i = bisect.bisect_right(starts, value) - 1
+        return i >= 0 and value <= self._ends[version][i]
+
+    def contains(self, ip):
+        """Return True if ip (str or ipaddress object) is covered by the index."""
+        try:
+            addr = ip if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)) \
+                else ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        return self.contains_int(int(addr), addr.version)
+
+    __contains__ = contains
+
+    def __len__(self):
+        return self.size
+
+    def interval_count(self):
+        """Number of disjoint intervals after merging (v4 + v6)."""
+        return len(self._starts[4]) + len(self._starts[6])
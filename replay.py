@@ -0,0 +1,203 @@
+# replay.py
+"""
+Offline replay / throughput benchmark for the AURA detection pipeline.
+
+Feeds a pcap file, or a synthetic set of N flows x M packets, through the
+same DetectionEngine.process() path the live sniffer uses, as fast as
+possible, with the firewall in dry-run mode. Reports packets/sec, p50/p99
+per-packet latency per stage and peak memory.
+
+    python replay.py --pcap capture.pcap
+    python replay.py --synthetic 500 200 --json > before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from anomaly_detection_service import BehavioralAnomalyDetector
+from threat_intel_service import ThreatIntel
+from firewall_manager import FirewallManager
+from geolocation_service import GeoLocator
+from verdict_cache import VerdictCache
+from flow_table import FlowTable
+from detection_engine import DetectionEngine, PacketMeta
+
+
+# -------------------------------
+# packet sources
+# -------------------------------
+def pcap_source(path):
+    from scapy.all import PcapReader
+    from capture import extract_meta
+
+    with PcapReader(path) as reader:
+        for packet in reader:
+            meta = extract_meta(packet)
+            if meta is not None:
+                yield meta
+
+
+def synthetic_source(flows, packets_per_flow, seed=1):
+    """N flows x M packets, interleaved round-robin like concurrent traffic."""
+    rng = random.Random(seed)
+    specs = []
+    for i in range(flows):
+        internal = f"192.168.{(i >> 8) & 0xff}.{i & 0xff or 1}"
+        external = f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        proto = 6 if rng.random() < 0.8 else 17
+        sport, dport = rng.randint(49152, 65535), rng.choice((53, 80, 443, 8080, 22))
+        outbound = rng.random() < 0.7
+        specs.append((internal, external, proto, sport, dport, outbound))
+    ts = time.time()
+    for _ in range(packets_per_flow):
+        for internal, external, proto, sport, dport, outbound in specs:
+            ts += 0.0001
+            if outbound:
+                yield PacketMeta(internal, external, proto, sport, dport, 120, ts)
+            else:
+                yield PacketMeta(external, internal, proto, dport, sport, 1400, ts)
+
+
+# -------------------------------
+# stats helpers
+# -------------------------------
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def __call__(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def build_engine(args, timer, workdir):
+    intel = ThreatIntel(fetch=False)
+    if args.feed:
+        with open(args.feed) as f:
+            intel.load_entries(line.split(";")[0].strip() for line in f
+                               if line.strip() and not line.startswith(";"))
+    detector = BehavioralAnomalyDetector()
+    geo = GeoLocator(args.geo_db)
+    firewall = FirewallManager(record_file=os.path.join(workdir, "blocked_ips.json"),
+                               dry_run=True, verbose=False)
+    cache = None if args.no_cache else VerdictCache()
+    flow_table = FlowTable() if args.flows else None
+    return DetectionEngine(intel, detector, geo, firewall, cache=cache,
+                           log_events=False, stage_observer=timer, flow_table=flow_table)
+
+
+def run(args):
+    timer = StageTimer()
+    workdir = tempfile.mkdtemp(prefix="aura-replay-")
+    # keep subsystem start-up chatter out of stdout so --json stays parseable
+    with contextlib.redirect_stdout(sys.stderr):
+        engine = build_engine(args, timer, workdir)
+
+    if args.pcap:
+        source = pcap_source(args.pcap)
+    else:
+        source = synthetic_source(args.synthetic[0], args.synthetic[1], seed=args.seed)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    packets = scored = blocked = 0
+    perf = time.perf_counter
+    start = perf()
+    for meta in source:
+        t0 = perf()
+        verdict = engine.process(meta)
+        timer("total", perf() - t0)
+        packets += 1
+        if verdict is not None:
+            scored += 1
+            blocked += verdict["blocked"]
+    elapsed = perf() - start
+
+    report = {
+        "source": args.pcap or f"synthetic {args.synthetic[0]}x{args.synthetic[1]}",
+        "cache": not args.no_cache,
+        "flows": args.flows,
+        "packets": packets,
+        "scored": scored,
+        "blocked_verdicts": blocked,
+        "elapsed_s": round(elapsed, 4),
+        "packets_per_sec": round(packets / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {},
+    }
+    if args.tracemalloc:
+        report["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+
+    for stage in ("intel", "behavior", "ports", "geo", "firewall", "total"):
+        values = sorted(timer.samples.get(stage, ()))
+        report["stages"][stage] = {
+            "count": len(values),
+            "p50_us": round(percentile(values, 50) * 1e6, 2),
+            "p99_us": round(percentile(values, 99) * 1e6, 2),
+            "mean_us": round(sum(values) / len(values) * 1e6, 2) if values else 0.0,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\nSource:   {report['source']}  (cache={'on' if report['cache'] else 'off'}, "
+          f"flows={'on' if report['flows'] else 'off'})")
+    print(f"Packets:  {report['packets']:,}  scored={report['scored']:,}  blocked={report['blocked_verdicts']:,}")
+    print(f"Elapsed:  {report['elapsed_s']:.3f}s  ->  {report['packets_per_sec']:,.0f} packets/sec")
+    if report.get("peak_rss_mb") is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+    if "tracemalloc_peak_mb" in report:
+        print(f"Peak Python heap: {report['tracemalloc_peak_mb']:.1f} MB")
+    print(f"\n{'stage':<10} {'count':>10} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<10} {s['count']:>10,} {s['p50_us']:>10.2f} {s['p99_us']:>10.2f} {s['mean_us']:>10.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay traffic through the AURA detection path.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--pcap", help="pcap/pcapng file to replay")
+    src.add_argument("--synthetic", nargs=2, type=int, metavar=("FLOWS", "PACKETS"),
+                     help="generate FLOWS flows x PACKETS packets each")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--feed", help="local DROP-style feed file to load into ThreatIntel")
+    ap.add_argument("--geo-db", default="GeoLite2-City.mmdb")
+    ap.add_argument("--no-cache", action="store_true", help="bypass the verdict cache")
+    ap.add_argument("--flows", action="store_true", help="aggregate packets into flows before scoring")
+    ap.add_argument("--tracemalloc", action="store_true", help="also report Python heap peak (slower)")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
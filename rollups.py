@@ -0,0 +1,214 @@
+# rollups.py
+import heapq
+import math
+import threading
+import time
+from itertools import chain
+
+# per-key aggregate layout: [count, blocked, max_score]
+_COUNT, _BLOCKED, _MAX = 0, 1, 2
+OTHER = "(other)"
+MAX_COUNTRIES = 500
+
+
+class _Bucket:
+    __slots__ = ("index", "countries", "cells", "ips", "total")
+
+    def __init__(self, index=-1):
+        self.index = index
+        self.countries = {}   # country -> [count, blocked, max_score]
+        self.cells = {}       # (row, col) -> [count, blocked, max_score]
+        self.ips = {}         # external_ip -> [count, blocked, max_score, country, lat, lon]
+        self.total = [0, 0, 0.0]
+
+
+def _add(table, key, blocked, score, cap, extra=()):
+    agg = table.get(key)
+    if agg is None:
+        if len(table) >= cap:
+            key = OTHER
+            agg = table.get(key)
+        if agg is None:
+            agg = table[key] = [0, 0, 0.0, *extra]
+    agg[_COUNT] += 1
+    agg[_BLOCKED] += blocked
+    if score > agg[_MAX]:
+        agg[_MAX] = score
+
+
+def _combined(a, b):
+    return [a[_COUNT] + b[_COUNT], a[_BLOCKED] + b[_BLOCKED], max(a[_MAX], b[_MAX]), *a[3:]]
+
+
+def _top(sealed, live, n, rank):
+    """Top n (key, aggregate) of sealed + live without copying the large sealed table."""
+    items = chain(((k, _combined(a, live[k]) if k in live else a) for k, a in sealed.items()),
+                  ((k, a) for k, a in live.items() if k not in sealed))
+    return heapq.nlargest(n, ((k, a) for k, a in items if k != OTHER), key=rank)
+
+
+def _empty():
+    return {"countries": {}, "cells": {}, "ips": {}, "total": [0, 0, 0.0], "series": []}
+
+
+def _merge(into, table):
+    for key, agg in table.items():
+        out = into.get(key)
+        if out is None:
+            into[key] = list(agg)
+        else:
+            out[_COUNT] += agg[_COUNT]
+            out[_BLOCKED] += agg[_BLOCKED]
+            out[_MAX] = max(out[_MAX], agg[_MAX])
+
+
+class RollupStore:
+    """
+    Rolling verdict aggregates for the dashboard map:
+    - time is cut into bucket_seconds buckets kept in a fixed ring of
+      n_buckets slots (default 60 x 10s = 10 minutes); a slot is reset when
+      the clock wraps onto it, so memory does not grow with uptime
+    - each bucket aggregates per country, per geo grid cell (grid_deg
+      degrees) and per external IP: count, blocked count, max score
+    - per-bucket cardinality is capped (max_cells / max_ips); overflow is
+      folded into an "(other)" entry so totals stay exact
+    - only the two newest buckets take writes (older verdicts are counted
+      as late and dropped); the sealed ones are merged once per window move
+      outside the lock, so snapshot() holds the lock only to read the two
+      live buckets
+    - snapshot() returns the top entries only, so the payload size and the
+      map's render cost are bounded no matter the packet rate; results are
+      reused for cache_seconds
+    """
+
+    def __init__(self, bucket_seconds=10, n_buckets=60, grid_deg=2.0, max_cells=1000,
+                 max_ips=2000, cache_seconds=1.0):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.grid_deg = grid_deg
+        self.max_cells = max_cells
+        self.max_ips = max_ips
+        self.cache_seconds = cache_seconds
+        self._ring = [_Bucket() for _ in range(n_buckets)]
+        self._lock = threading.Lock()
+        self._newest = -1
+        self._sealed = (None, None)        # ((first, last), merged aggregates) of sealed buckets
+        self._cached = (None, 0.0, None)   # (key, expires, result) of the last snapshot
+        self.recorded = 0
+        self.late = 0
+
+    # -------------------------------
+    # write path
+    # -------------------------------
+    def record(self, verdict, now=None):
+        """
+        Fold one verdict dict (as produced by DetectionEngine.analyze) into the
+        bucket for `now` (arrival time, not the packet timestamp: this is a
+        live view, and replayed or clock-skewed captures must not land
+        outside the window).
+        """
+        index = int((now or time.time()) // self.bucket_seconds)
+        blocked = 1 if verdict["blocked"] else 0
+        score = verdict["score"]
+        country = verdict.get("country") or "Unknown"
+        lat, lon = verdict.get("lat"), verdict.get("lon")
+        with self._lock:
+            if index < self._newest - 1:
+                self.late += 1  # bucket already sealed
+                return
+            bucket = self._ring[index % self.n_buckets]
+            if bucket.index != index:
+                bucket = self._ring[index % self.n_buckets] = _Bucket(index)
+                self._newest = max(self._newest, index)
+            self.recorded += 1
+            total = bucket.total
+            total[_COUNT] += 1
+            total[_BLOCKED] += blocked
+            if score > total[_MAX]:
+                total[_MAX] = score
+            _add(bucket.countries, country, blocked, score, MAX_COUNTRIES)
+            if lat is not None and lon is not None:
+                cell = (math.floor(lat / self.grid_deg), math.floor(lon / self.grid_deg))
+                _add(bucket.cells, cell, blocked, score, self.max_cells)
+            _add(bucket.ips, verdict["external_ip"], blocked, score, self.max_ips, (country, lat, lon))
+
+    # -------------------------------
+    # read path
+    # -------------------------------
+    def snapshot(self, seconds=None, top=200, now=None):
+        """
+        Aggregates over the last `seconds` (default: the whole ring):
+        totals, a per-bucket series, top countries, top grid cells as
+        [lat, lon, count, blocked, max_score] (cell centres) and the top
+        external IPs by max score, then count.
+        """
+        window = self.bucket_seconds * self.n_buckets
+        seconds = window if seconds is None else max(self.bucket_seconds, min(seconds, window))
+        now = now or time.time()
+        key = (seconds, top)
+        cached_key, expires, cached = self._cached
+        if cached_key == key and expires > now:
+            return cached
+
+        last = int(now // self.bucket_seconds)
+        first = last - int(math.ceil(seconds / self.bucket_seconds)) + 1
+        live = _empty()
+        with self._lock:
+            ring = list(self._ring)
+            seal = min(last, self._newest - 2)
+            for bucket in ring:
+                if seal < bucket.index and first <= bucket.index <= last:
+                    self._fold(live, bucket)
+        sealed = self._merge_sealed(ring, first, seal)
+
+        total = _combined(sealed["total"], live["total"])
+        series = sorted(sealed["series"] + live["series"])
+        by_count = lambda kv: kv[1][_COUNT]
+        countries = _top(sealed["countries"], live["countries"], top, by_count)
+        cells = _top(sealed["cells"], live["cells"], top, by_count)
+        ips = _top(sealed["ips"], live["ips"], top, lambda kv: (kv[1][_MAX], kv[1][_COUNT]))
+
+        half = self.grid_deg / 2
+        result = {
+            "generated": now,
+            "seconds": seconds,
+            "bucket_seconds": self.bucket_seconds,
+            "grid_deg": self.grid_deg,
+            "totals": {"count": total[_COUNT], "blocked": total[_BLOCKED], "max_score": total[_MAX]},
+            "series": series,
+            "countries": [{"country": c, "count": a[_COUNT], "blocked": a[_BLOCKED], "max_score": a[_MAX]}
+                          for c, a in countries],
+            "cells": [[round(r * self.grid_deg + half, 3), round(c * self.grid_deg + half, 3),
+                       a[_COUNT], a[_BLOCKED], a[_MAX]]
+                      for (r, c), a in cells],
+            "ips": [{"ip": ip, "country": a[3], "lat": a[4], "lon": a[5],
+                     "count": a[_COUNT], "blocked": a[_BLOCKED], "max_score": a[_MAX]}
+                    for ip, a in ips],
+        }
+        self._cached = (key, now + self.cache_seconds, result)
+        return result
+
+    def _fold(self, into, bucket):
+        _merge(into["countries"], bucket.countries)
+        _merge(into["cells"], bucket.cells)
+        _merge(into["ips"], bucket.ips)
+        into["total"] = _combined(into["total"], bucket.total)
+        into["series"].append([bucket.index * self.bucket_seconds, bucket.total[_COUNT],
+                               bucket.total[_BLOCKED]])
+
+    def _merge_sealed(self, ring, first, last):
+        """Merged aggregates of the sealed buckets in [first, last], rebuilt when the window moves."""
+        key, merged = self._sealed
+        if key != (first, last):
+            merged = _empty()
+            for bucket in ring:
+                if first <= bucket.index <= last:
+                    self._fold(merged, bucket)
+            self._sealed = ((first, last), merged)
+        return merged
+
+    def stats(self):
+        with self._lock:
+            live = [b for b in self._ring if b.index >= 0]
+            return {"recorded": self.recorded, "late": self.late, "buckets": len(live),
+                    "ips": sum(len(b.ips) for b in live), "cells": sum(len(b.cells) for b in live)}
@@ -0,0 +1,96 @@
+# sampling_profiler.py
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    On-demand statistical profiler for the running process:
+    - start() launches a thread that snapshots every thread's stack via
+      sys._current_frames() hz times a second; nothing is hooked into the
+      interpreter, so the overhead is the sampler thread alone
+    - stacks are aggregated as collapsed lines ("thread;mod:func;...") that
+      flamegraph.pl and speedscope read directly
+    - a run stops by itself after max_seconds so a forgotten toggle does not
+      keep sampling forever
+    """
+
+    def __init__(self):
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.hz = 0
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, hz=100, max_seconds=60):
+        if self.running:
+            return False
+        with self._lock:
+            self._stacks = Counter()
+            self.samples = 0
+        self.hz = max(1, min(int(hz), 1000))
+        self.started = time.time()
+        self.stopped = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(max_seconds,),
+                                        name="aura-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self, max_seconds):
+        interval = 1.0 / self.hz
+        deadline = time.monotonic() + max_seconds
+        own = threading.get_ident()
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                sampled.append(";".join(reversed(stack)))
+            with self._lock:
+                self._stacks.update(sampled)
+                self.samples += 1
+        self.stopped = time.time()
+
+    def collapsed(self):
+        """Collapsed-stack text, one "stack count" line per distinct stack."""
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def top(self, n=20):
+        """Leaf frames by sample count (where threads were actually running or waiting)."""
+        leaves = Counter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def status(self):
+        with self._lock:
+            samples, stacks = self.samples, len(self._stacks)
+        return {"running": self.running, "hz": self.hz, "samples": samples,
+                "started": self.started, "stopped": self.stopped,
+                "stacks": stacks, "top": self.top(10)}
@@ -0,0 +1,191 @@
+# startup.py
+import threading
+import time
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+class _Subsystem:
+    __slots__ = ("name", "factory", "deps", "close", "state", "value", "error",
+                 "started", "seconds", "done", "closed")
+
+    def __init__(self, name, factory, deps, close):
+        self.name = name
+        self.factory = factory
+        self.deps = tuple(deps)
+        self.close = close
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.started = None
+        self.seconds = None
+        self.done = threading.Event()
+        self.closed = False
+
+
+class Startup:
+    """
+    Concurrent subsystem initialisation for AURA:
+    - add(name, factory, deps) registers a subsystem; factory(*dep_values)
+      builds it (heavy imports belong inside the factory so they are
+      deferred to the subsystem's own thread)
+    - start() launches every subsystem on its own thread as soon as its
+      dependencies are ready; it does not block, so the web UI can serve
+      immediately
+    - status() reports per-subsystem state and timings for /status, and
+      unavailable(names) tells a route whether to wait (503) or give up (404)
+    - a failed subsystem fails its dependents but not unrelated ones
+    - close() tears ready subsystems down in reverse registration order,
+      waiting up to `timeout` for ones still starting; any that finish later
+      are closed by their own thread, and pending ones are not started
+    """
+
+    def __init__(self):
+        self._subsystems = {}
+        self._lock = threading.Lock()
+        self.started = None
+        self.finished = None
+        self._closing = False
+
+    def add(self, name, factory, deps=(), close=None):
+        for dep in deps:
+            if dep not in self._subsystems:
+                raise ValueError(f"{name} depends on unknown subsystem {dep}")
+        self._subsystems[name] = _Subsystem(name, factory, deps, close)
+
+    # -------------------------------
+    # lifecycle
+    # -------------------------------
+    def start(self):
+        self.started = time.perf_counter()
+        for sub in self._subsystems.values():
+            threading.Thread(target=self._run, args=(sub,), name=f"aura-init-{sub.name}",
+                             daemon=True).start()
+
+    def _run(self, sub):
+        deps = [self._subsystems[d] for d in sub.deps]
+        for dep in deps:
+            dep.done.wait()
+        failed = [d.name for d in deps if d.state != READY]
+        sub.started = time.perf_counter()
+        if failed:
+            sub.state = FAILED
+            sub.error = f"dependency failed: {', '.join(failed)}"
+        elif self._closing:
+            sub.state = FAILED
+            sub.error = "cancelled: shutting down"
+        else:
+            sub.state = STARTING
+            try:
+                value = sub.factory(*[d.value for d in deps])
+                with self._lock:
+                    sub.value = value
+                    sub.state = READY
+                    late = self._claim_close(sub)
+                if late:
+                    # close() already gave up waiting for this one
+                    self._close_one(sub)
+            except Exception as e:
+                sub.state = FAILED
+                sub.error = f"{type(e).__name__}: {e}"
+                print(f"[STARTUP] {sub.name} failed: {sub.error}")
+        sub.seconds = time.perf_counter() - sub.started
+        with self._lock:
+            sub.done.set()
+            if self.finished is not None or not all(s.done.is_set() for s in self._subsystems.values()):
+                return
+            self.finished = time.perf_counter()
+        print(f"[STARTUP] All subsystems done in {(self.finished - self.started) * 1000:.0f} ms: "
+              + ", ".join(f"{s.name} {s.seconds * 1000:.0f} ms" + ("" if s.state == READY else " (failed)")
+                          for s in self._subsystems.values()))
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            self._closing = True
+        deadline = time.monotonic() + timeout
+        for sub in reversed(list(self._subsystems.values())):
+            if sub.state == STARTING:
+                sub.done.wait(max(0.0, deadline - time.monotonic()))
+            with self._lock:
+                claimed = self._claim_close(sub)
+                starting = sub.state == STARTING
+            if claimed:
+                self._close_one(sub)
+            elif starting:
+                print(f"[STARTUP] {sub.name} is still starting; it will be closed once it is up.")
+
+    def _claim_close(self, sub):
+        """True if the caller should close sub now. Caller holds _lock."""
+        if not self._closing or sub.closed or sub.state != READY:
+            return False
+        sub.closed = True
+        return True
+
+    def _close_one(self, sub):
+        if sub.close is None:
+            return
+        try:
+            sub.close(sub.value)
+        except Exception as e:
+            print(f"[STARTUP] Closing {sub.name} failed: {e}")
+
+    # -------------------------------
+    # access
+    # -------------------------------
+    def __contains__(self, name):
+        return name in self._subsystems
+
+    def is_ready(self, name):
+        sub = self._subsystems.get(name)
+        return sub is not None and sub.state == READY
+
+    def unavailable(self, names):
+        """
+        (http_status, body) explaining why the named subsystems cannot serve a
+        request, or None if all are ready: 404 for ones that are not registered
+        in this mode or failed (they will not come up), 503 while any are
+        still pending or starting.
+        """
+        missing = [n for n in names if n not in self._subsystems]
+        if missing:
+            return 404, {"error": f"not enabled in this capture mode: {', '.join(missing)}"}
+        failed = [n for n in names if self._subsystems[n].state == FAILED]
+        if failed:
+            return 404, {"error": "failed to start: " + "; ".join(
+                f"{n} ({self._subsystems[n].error})" for n in failed)}
+        waiting = [n for n in names if self._subsystems[n].state != READY]
+        if waiting:
+            return 503, {"status": "starting", "waiting_for": waiting, "startup": self.status()}
+        return None
+
+    def wait(self, name, timeout=None):
+        """Block until name is done; returns its value (None if it failed or timed out)."""
+        sub = self._subsystems[name]
+        sub.done.wait(timeout)
+        return sub.value if sub.state == READY else None
+
+    def __getitem__(self, name):
+        sub = self._subsystems[name]
+        if sub.state != READY:
+            raise KeyError(f"{name} is not ready ({sub.state})")
+        return sub.value
+
+    def status(self):
+        now = time.perf_counter()
+        subsystems = {}
+        for sub in self._subsystems.values():
+            if sub.seconds is not None:
+                ms = round(sub.seconds * 1000, 1)
+            elif sub.started is not None:
+                ms = round((now - sub.started) * 1000, 1)
+            else:
+                ms = None
+            subsystems[sub.name] = {"state": sub.state, "ms": ms, "error": sub.error}
+        total = None
+        if self.started is not None:
+            total = round(((self.finished or now) - self.started) * 1000, 1)
+        return {"ready": all(s.state == READY for s in self._subsystems.values()),
+                "elapsed_ms": total, "subsystems": subsystems}
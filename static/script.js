@@ -22,7 +22,9 @@ document.addEventListener('DOMContentLoaded', function () {
         try {
             const res = await fetch('/status');
             const data = await res.json();
-            if (data.mode === 'Learning') {
+            if (data.mode === 'Starting') {
+                statusDisplay.innerHTML = `Status: <span class="learning">Starting...</span>`;
+            } else if (data.mode === 'Learning') {
                 statusDisplay.innerHTML = `Status: <span class="learning">Learning... (${data.time_remaining}s)</span>`;
             } else {
                 statusDisplay.innerHTML = `Status: <span class="monitoring">Monitoring</span>`;
@@ -32,71 +34,109 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
-    async function fetchTraffic() {
-        try {
-            const res = await fetch('/traffic');
-            const data = await res.json();
-            data.forEach(item => {
-                drawConnection(item);
-                addLogEntry(item);
-            });
-        } catch (err) {
-            console.error('Traffic fetch error:', err);
-        }
+    // Live events arrive over one Server-Sent Events stream; the browser
+    // reconnects on its own and resumes from the last event id it saw.
+    const blockedIps = new Set();
+
+    function renderBlocked() {
+        blockedContainer.innerHTML = '';
+        [...blockedIps].sort().forEach(ip => {
+            const div = document.createElement('div');
+            div.classList.add('log-entry', 'blocked-entry');
+            div.innerHTML = `<b>${ip}</b> has been blocked 🔒`;
+            blockedContainer.appendChild(div);
+        });
     }
 
-    async function fetchBlocked() {
-        try {
-            const res = await fetch('/blocked');
-            const blocked = await res.json();
-            blockedContainer.innerHTML = '';
-            blocked.forEach(ip => {
-                const div = document.createElement('div');
-                div.classList.add('log-entry', 'blocked-entry');
-                div.innerHTML = `<b>${ip}</b> has been blocked 🔒`;
-                blockedContainer.appendChild(div);
-            });
-        } catch (err) {
-            console.error('Blocked fetch error:', err);
+    function addIntegrityEntry(ev) {
+        const div = document.createElement('div');
+        div.classList.add('log-entry', 'integrity-entry');
+        // events carry only transitions; path lists are capped, counts are exact
+        const c = ev.counts;
+        const title = ev.source === 'accept' ? 'Accepted into baseline' : 'Integrity';
+        div.innerHTML = `<b>🛡 ${title}</b> ${ev.timestamp} — Modified: ${c.modified}, Added: ${c.added}, ` +
+                        `Removed: ${c.removed}, Resolved: ${c.resolved} (${ev.outstanding} outstanding)`;
+        const more = (list, n) => list.slice(0,5).join(', ') + (n > 5 ? ` … +${n - 5} more` : '') || 'None';
+        const lists = document.createElement('div');
+        lists.style.fontSize = '12px';
+        lists.innerHTML = `<div>Modified: ${more(ev.modified, c.modified)}</div>
+                           <div>Added: ${more(ev.added, c.added)}</div>
+                           <div>Removed: ${more(ev.removed, c.removed)}</div>`;
+        if (ev.truncated) {
+            lists.innerHTML += `<div>Full list: /integrity?since=${ev.seq - c.modified - c.added - c.removed}</div>`;
         }
+        div.appendChild(lists);
+        integrityContainer.prepend(div);
     }
 
-   
-
-// (inside your existing DOMContentLoaded)
+    function connectStream() {
+        const source = new EventSource('/stream');
 
+        // full blocklist on every (re)connect, then add/remove diffs in batches
+        source.addEventListener('blocked', e => {
+            blockedIps.clear();
+            JSON.parse(e.data).forEach(ip => blockedIps.add(ip));
+            renderBlocked();
+        });
 
-async function fetchIntegrity() {
-    try {
-        const res = await fetch('/integrity');
-        const events = await res.json();
-        events.forEach(ev => {
-            const div = document.createElement('div');
-            div.classList.add('log-entry', 'integrity-entry');
-            div.innerHTML = `<b>🛡 Integrity</b> ${ev.timestamp} — Modified: ${ev.modified.length}, Added: ${ev.added.length}, Removed: ${ev.removed.length}`;
-            // optionally add file lists (trimmed)
-            const lists = document.createElement('div');
-            lists.style.fontSize = '12px';
-            lists.innerHTML = `<div>Modified: ${ev.modified.slice(0,5).join(', ') || 'None'}</div>
-                               <div>Added: ${ev.added.slice(0,5).join(', ') || 'None'}</div>
-                               <div>Removed: ${ev.removed.slice(0,5).join(', ') || 'None'}</div>`;
-            div.appendChild(lists);
-            integrityContainer.prepend(div);
+        source.addEventListener('batch', e => {
+            const batch = JSON.parse(e.data);
+            batch.traffic.forEach(addLogEntry);
+            batch.integrity.forEach(addIntegrityEntry);
+            if (batch.blocked.length) {
+                batch.blocked.forEach(change => {
+                    change.added.forEach(ip => blockedIps.add(ip));
+                    change.removed.forEach(ip => blockedIps.delete(ip));
+                });
+                renderBlocked();
+            }
+            if (batch.dropped) console.warn(`Stream fell behind; ${batch.dropped} events skipped`);
         });
-    } catch (e) {
-        console.error("fetchIntegrity error", e);
-    }
-}
 
-setInterval(fetchIntegrity, 5000);
+        source.onerror = () => console.error('Event stream interrupted; reconnecting...');
+    }
 
+    // The map renders server-side rollups (/rollup) rather than one line per
+    // packet, so its cost is bounded by the rollup's top-N, not the packet rate.
+    const HOME = [12.9716, 77.5946];
+    const ROLLUP_MINUTES = 10;
+    const MAX_THREAT_LINES = 25;
+    const MAX_LOG_ENTRIES = 200;
+    const rollupLayer = L.layerGroup().addTo(map);
+
+    function riskColor(agg) {
+        if (agg.max_score >= 0.6) return '#ff4444';
+        if (agg.blocked) return '#ffaa00';
+        return '#00ff99';
+    }
 
+    async function fetchRollup() {
+        try {
+            const res = await fetch(`/rollup?minutes=${ROLLUP_MINUTES}&top=300`);
+            renderRollup(await res.json());
+        } catch {
+            console.error('Rollup fetch failed');
+        }
+    }
 
-    function drawConnection(connection) {
-        if (!connection.lat || !connection.lon) return;
-        const color = connection.score >= 0.6 ? '#ff4444' : '#00ff99';
-        const line = L.curve(['M', [12.9716, 77.5946], 'Q', [20, 40], [connection.lat, connection.lon]], { color, weight: 2, opacity: 0.7 }).addTo(map);
-        setTimeout(() => map.removeLayer(line), 2000);
+    function renderRollup(data) {
+        rollupLayer.clearLayers();
+        // cells: [lat, lon, count, blocked, max_score]
+        data.cells.forEach(([lat, lon, count, blocked, max_score]) => {
+            const agg = { count, blocked, max_score };
+            L.circleMarker([lat, lon], {
+                radius: Math.min(4 + 2 * Math.log2(1 + count), 22),
+                color: riskColor(agg), weight: 1, fillOpacity: 0.45
+            }).bindTooltip(`${count} verdicts, ${blocked} blocked, max score ${max_score.toFixed(2)}`)
+              .addTo(rollupLayer);
+        });
+        data.ips.filter(ip => ip.max_score >= 0.6 && ip.lat != null && ip.lon != null)
+            .slice(0, MAX_THREAT_LINES)
+            .forEach(ip => {
+                L.curve(['M', HOME, 'Q', [20, 40], [ip.lat, ip.lon]], { color: riskColor(ip), weight: 2, opacity: 0.7 })
+                    .bindTooltip(`${ip.ip} (${ip.country}): ${ip.count} verdicts, max score ${ip.max_score.toFixed(2)}`)
+                    .addTo(rollupLayer);
+            });
     }
 
     function addLogEntry(connection) {
@@ -105,13 +145,14 @@ setInterval(fetchIntegrity, 5000);
         div.classList.add('log-entry', risk);
         div.innerHTML = `<div>${connection.src_ip} → ${connection.dst_ip}</div>
                          <div>${connection.country} (${connection.external_ip}) <span class="log-score">${connection.score}</span></div>`;
-        if (risk === 'high-risk') alertsContainer.prepend(div);
-        else logsContainer.prepend(div);
+        const container = risk === 'high-risk' ? alertsContainer : logsContainer;
+        container.prepend(div);
+        while (container.childElementCount > MAX_LOG_ENTRIES) container.lastElementChild.remove();
     }
 
     // Timers
     setInterval(fetchStatus, 2000);
-    setInterval(fetchTraffic, 1500);
-    setInterval(fetchBlocked, 4000);
-    setInterval(fetchIntegrity, 5000); // 🧩 refresh every 5s
+    setInterval(fetchRollup, 3000);
+    fetchRollup();
+    connectStream();
 });
@@ -0,0 +1,232 @@
+# tests/test_abuse_resolver.py
+import threading
+
+import pytest
+
+import abuse_resolver
+from abuse_resolver import AbuseResolver, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=1000000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, score=0, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._score = score
+
+    def json(self):
+        return {"data": {"abuseConfidenceScore": self._score}}
+
+
+class FakeSession:
+    """Stands in for requests.Session: answers from a list, counts calls."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def get(self, url, params=None, timeout=None):
+        self.release.wait(5)
+        self.calls.append(params["ipAddress"])
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(abuse_resolver, "time", clock)
+    return clock
+
+
+def resolver(tmp_path, *responses, **kwargs):
+    kwargs.setdefault("cache_path", str(tmp_path / "abuse.db"))
+    r = AbuseResolver("key", workers=2, **kwargs)
+    r.session = FakeSession(*(responses or (FakeResponse(score=80),)))
+    return r
+
+
+def test_miss_then_cached_hit_and_callback(clock, tmp_path):
+    results = []
+    r = resolver(tmp_path, FakeResponse(score=80), on_result=lambda ip, s: results.append((ip, s)))
+    try:
+        assert r.get("45.33.32.1") is None
+        assert r.resolve("45.33.32.1").result(5) == 0.8
+        assert r.get("45.33.32.1") == 0.8
+        assert results == [("45.33.32.1", 0.8)]
+        assert r.stats()["hits"] == 1 and r.stats()["requests"] == 1
+    finally:
+        r.close()
+
+
+def test_concurrent_misses_share_one_request(clock, tmp_path):
+    r = resolver(tmp_path)
+    r.session.release.clear()
+    try:
+        first = r.resolve("45.33.32.1")
+        assert r.get("45.33.32.1") is None
+        assert r.resolve("45.33.32.1") is first
+        assert r.pending("45.33.32.1")
+        r.session.release.set()
+        assert first.result(5) == 0.8
+        assert r.session.calls == ["45.33.32.1"]
+        assert r.stats()["coalesced"] == 2
+    finally:
+        r.close()
+
+
+def test_results_persist_until_they_expire(clock, tmp_path):
+    r = resolver(tmp_path, ttl=100)
+    r.resolve("45.33.32.1").result(5)
+    r.close()
+
+    again = resolver(tmp_path, ttl=100)
+    try:
+        assert again.get("45.33.32.1") == 0.8
+        assert again.session.calls == []
+    finally:
+        again.close()
+
+    clock.advance(101)
+    expired = resolver(tmp_path, ttl=100)
+    try:
+        assert expired.stats()["cached"] == 0
+    finally:
+        expired.close()
+
+
+def test_429_pauses_lookups_for_retry_after(clock, tmp_path):
+    r = resolver(tmp_path, FakeResponse(429, headers={"Retry-After": "60"}), FakeResponse(score=10))
+    try:
+        assert r.resolve("45.33.32.1").result(5) is None
+        assert r.stats()["rate_limited"] == 1
+        assert r.get("45.33.32.2") is None
+        assert r.session.calls == ["45.33.32.1"]  # paused: nothing scheduled
+
+        clock.advance(61)
+        r.get("45.33.32.2")
+        assert r.resolve("45.33.32.2").result(5) == 0.1
+    finally:
+        r.close()
+
+
+def test_server_errors_back_off_exponentially_client_errors_do_not(clock, tmp_path):
+    r = resolver(tmp_path, FakeResponse(503), FakeResponse(503), FakeResponse(400))
+    try:
+        r.resolve("45.33.32.1").result(5)
+        assert r.stats()["paused_for"] == 5.0
+        clock.advance(6)
+        r.resolve("45.33.32.1").result(5)
+        assert r.stats()["paused_for"] == 10.0
+
+        clock.advance(11)
+        r.resolve("45.33.32.1").result(5)  # 400: counted, but no new pause
+        stats = r.stats()
+        assert stats["errors"] == 3 and stats["paused_for"] == 0.0
+    finally:
+        r.close()
+
+
+def test_client_errors_are_negative_cached(clock, tmp_path):
+    r = resolver(tmp_path, FakeResponse(400), FakeResponse(score=20), reject_ttl=60)
+    try:
+        assert r.resolve("45.33.32.1").result(5) is None
+        for _ in range(3):
+            assert r.get("45.33.32.1") is None
+        assert r.resolve("45.33.32.1").result(5) is None
+        assert r.session.calls == ["45.33.32.1"]
+        assert r.stats()["rejected"] == 1 and r.stats()["rejected_hits"] == 4
+
+        clock.advance(61)
+        assert r.resolve("45.33.32.1").result(5) == 0.2
+    finally:
+        r.close()
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_refused_key_stops_all_lookups(clock, tmp_path, status):
+    r = resolver(tmp_path, FakeResponse(status))
+    try:
+        assert r.resolve("45.33.32.1").result(5) is None
+        assert r.get("45.33.32.2") is None
+        assert r.resolve("45.33.32.3").result(5) is None
+        clock.advance(86400)
+        assert r.get("45.33.32.4") is None
+        assert r.session.calls == ["45.33.32.1"]
+        assert r.stats()["disabled"] == f"HTTP {status}"
+    finally:
+        r.close()
+
+
+def test_lookups_after_close_answer_from_the_cache(clock, tmp_path):
+    r = resolver(tmp_path)
+    r.resolve("45.33.32.1").result(5)
+    r.close()
+    assert r.get("45.33.32.1") == 0.8
+    assert r.get("45.33.32.2") is None
+    assert r.resolve("45.33.32.2").result(5) is None
+    assert r.session.calls == ["45.33.32.1"]
+
+
+def test_network_errors_back_off(clock, tmp_path):
+    r = resolver(tmp_path, ConnectionError("down"))
+    try:
+        assert r.resolve("45.33.32.1").result(5) is None
+        assert r.stats()["paused_for"] == 5.0
+        assert r.get("45.33.32.1") is None
+        assert len(r.session.calls) == 1
+    finally:
+        r.close()
+
+
+def test_budget_limits_background_lookups(clock, tmp_path):
+    r = resolver(tmp_path, daily_budget=2)
+    try:
+        for i in range(3):
+            r.get(f"45.33.32.{i}")
+        assert r.stats()["budget_skips"] == 1
+        # resolve() is an explicit request and bypasses the budget
+        assert r.resolve("45.33.32.2").result(5) == 0.8
+    finally:
+        r.close()
+
+
+def test_remaining_quota_header_shrinks_the_budget(clock, tmp_path):
+    r = resolver(tmp_path, FakeResponse(score=5, headers={"X-RateLimit-Remaining": "0"}))
+    try:
+        r.resolve("45.33.32.1").result(5)
+        assert r.get("45.33.32.2") is None
+        assert r.stats()["budget_skips"] == 1
+    finally:
+        r.close()
+
+
+def test_token_bucket_refills_and_clamps(clock):
+    bucket = TokenBucket(2, period=20.0)
+    assert bucket.take() and bucket.take()
+    assert not bucket.take()
+    clock.advance(10)
+    assert bucket.take()
+    clock.advance(100)
+    bucket.clamp(0)
+    assert not bucket.take()
@@ -0,0 +1,132 @@
+# tests/test_anomaly_detection.py
+import numpy as np
+
+from anomaly_detection_service import BehavioralAnomalyDetector
+
+
+def detector(**kwargs):
+    kwargs.setdefault("snapshot_interval", 0)
+    return BehavioralAnomalyDetector(**kwargs)
+
+
+def test_score_many_matches_sequential_calls():
+    ips = ["45.33.32.1", "45.33.32.2", "45.33.32.1", "45.33.32.1", "45.33.32.2"]
+    ts = [0.0, 0.5, 1.0, 1.01, 3.0]
+    one = detector()
+    expected = [one.calculate_threat_score(ip, t) for ip, t in zip(ips, ts)]
+    batch = detector().score_many(ips, ts)
+    assert np.allclose(batch, expected)
+
+
+def test_snapshot_round_trip_warm_starts_in_monitoring(tmp_path):
+    path = str(tmp_path / "model.npz")
+    first = detector()
+    for i in range(50):
+        first.calculate_threat_score("45.33.32.1", i * 2.0)
+    first.save_snapshot(path)
+
+    warm = detector(snapshot_path=path)
+    try:
+        assert not warm.learning_mode
+        slot = warm._slots["45.33.32.1"]
+        assert warm.count[slot] == 50
+        assert abs(warm.mean[slot] - first.mean[first._slots["45.33.32.1"]]) < 1e-9
+    finally:
+        warm._stop.set()
+
+
+def test_snapshot_is_rebased_onto_packet_time(tmp_path):
+    path = str(tmp_path / "model.npz")
+    first = detector()
+    for i in range(50):
+        first.calculate_threat_score("45.33.32.1", 1000.0 + i * 2.0)
+    first.calculate_threat_score("45.33.32.2", 1000.0 + 90.0)
+    first.save_snapshot(path)
+
+    # a replayed capture from long before the wall clock: the ages between
+    # IPs survive the load, nothing is scored against time.time()
+    warm = detector(snapshot_path=path)
+    try:
+        warm.calculate_threat_score("45.33.32.2", 5.0)
+        # the snapshot's newest packet (45.33.32.1 at 1098) lands on t=5
+        assert warm.last_seen[warm._slots["45.33.32.1"]] == 5.0
+        assert warm.last_seen[warm._slots["45.33.32.2"]] == 5.0
+        # the regular 2 s cadence continues without a huge or negative gap
+        assert warm.calculate_threat_score("45.33.32.1", 7.0) == 0.0
+    finally:
+        warm._stop.set()
+
+
+# -------------------------------
+# port features
+# -------------------------------
+def sequential(det, ips, ts, sports, dports, protos):
+    return [det.calculate_threat_score(ip, t) + det.port_score(ip, sp, dp, pr, t)
+            for ip, t, sp, dp, pr in zip(ips, ts, sports, dports, protos)]
+
+
+def test_port_fanout_ramps_with_distinct_ports():
+    det = detector()
+    scores = [det.port_score("45.33.32.1", 40000, port, 6, ts=port * 0.1) for port in range(1, 200)]
+    assert scores[0] == 0.0
+    assert scores[7] == 0.0  # up to FANOUT_MIN distinct ports looks normal
+    assert scores == sorted(scores)
+    assert scores[-1] == det.FANOUT_WEIGHT  # saturated well before 200 ports
+
+    # repeating the same service never adds to the fanout
+    det = detector()
+    repeated = [det.port_score("45.33.32.2", 40000 + i, 443, 6, ts=float(i)) for i in range(100)]
+    assert set(repeated) == {0.0}
+
+
+def test_port_fanout_resets_after_the_window():
+    det = detector()
+    for port in range(1, 100):
+        det.port_score("45.33.32.1", 40000, port, 6, ts=1.0)
+    late = 1.0 + det.FANOUT_WINDOW + 1
+    assert det.port_score("45.33.32.1", 40000, 100, 6, ts=late) == 0.0
+    assert det.fanout_count[det._slots["45.33.32.1"]] == 1
+
+
+def test_unusual_port_bonus_from_the_profile(tmp_path):
+    profile = tmp_path / "profile.json"
+    profile.write_text('{"normal_ports": [53, 443, 70000]}')
+    det = detector(profile_path=str(profile))
+    assert det.normal_ports == {53, 443}
+    assert not det.learning_mode
+    assert det.is_normal_port(443) and not det.is_normal_port(444)
+    assert det.port_score("45.33.32.1", 51000, 443, 6, ts=1.0) == 0.0
+    assert det.port_score("45.33.32.1", 51000, 8081, 6, ts=2.0) == det.UNUSUAL_PORT_BONUS
+    # the service side is the lower port, so an ephemeral source port is not "unusual"
+    assert det.service_port(51000, 53) == 53
+    assert det.port_score("45.33.32.1", 53, 51000, 17, ts=3.0) == 0.0
+
+
+def test_score_many_with_ports_matches_sequential_calls(tmp_path):
+    profile = tmp_path / "profile.json"
+    profile.write_text('{"normal_ports": [443]}')
+    # ICMP first (no ports), then a scan, interleaved with a second IP
+    ips = ["45.33.32.1"] * 10 + ["45.33.32.1"] * 10 + ["45.33.32.2"] * 5
+    ts = [i * 0.5 for i in range(10)] + [5.0 + i * 0.4 for i in range(10)] + [1.0 + i for i in range(5)]
+    sports = [0] * 10 + [40000] * 10 + [50000] * 5
+    dports = [0] * 10 + list(range(1, 11)) + [443] * 5
+    protos = [1] * 10 + [6] * 10 + [6] * 5
+
+    for kwargs in ({}, {"profile_path": str(profile)}):
+        one = detector(**kwargs)
+        expected = sequential(one, ips, ts, sports, dports, protos)
+        batch_det = detector(**kwargs)
+        batch = batch_det.score_many(ips, ts, sports, dports, protos)
+        assert np.allclose(batch, np.minimum(expected, 1.0))
+        a, b = one._slots["45.33.32.1"], batch_det._slots["45.33.32.1"]
+        assert one.fanout_count[a] == batch_det.fanout_count[b] == 10
+        assert (one.fanout_bits[a] == batch_det.fanout_bits[b]).all()
+
+
+def test_portless_packets_leave_the_sketch_untouched():
+    det = detector()
+    det.score_many(["45.33.32.1"] * 3, [1.0, 2.0, 3.0], [0, 0, 0], [0, 0, 0], [1, 1, 1])
+    slot = det._slots["45.33.32.1"]
+    assert det.fanout_count[slot] == 0
+    assert not det.fanout_bits[slot].any()
+    assert det.fanout_start[slot] == 0.0
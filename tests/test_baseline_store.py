@@ -0,0 +1,95 @@
+# tests/test_baseline_store.py
+import json
+import os
+
+import pytest
+
+from baseline_store import FileRecord, JsonBaselineStore, SQLiteBaselineStore, open_store
+
+
+def records(root, n=5):
+    return {os.path.join(root, f"d{i % 2}", f"f{i}"): FileRecord(i, i * 10, i + 100, bytes([i]) * 32)
+            for i in range(n)}
+
+
+def test_open_store_picks_the_format_from_the_extension(tmp_path):
+    assert open_store(str(tmp_path / "b.db")).kind == "sqlite"
+    assert open_store(str(tmp_path / "b.SQLITE")).kind == "sqlite"
+    assert open_store(str(tmp_path / "b.json")).kind == "json"
+
+
+def test_sqlite_round_trip_and_single_entry_updates(tmp_path):
+    store = SQLiteBaselineStore(str(tmp_path / "b.db"))
+    assert not store.exists()
+    data = records(str(tmp_path))
+    store.save_all(data)
+    assert store.load() == data
+
+    changed = dict(data)
+    path = next(iter(data))
+    changed[path] = data[path]._replace(hash=b"\xff" * 32)
+    removed = list(data)[-1]
+    del changed[removed]
+    added = os.path.join(str(tmp_path), "new", "file")
+    changed[added] = FileRecord(1, 2, 3, b"\x01" * 32)
+    store.update(changed, put=[path, added], delete=[removed])
+    store.close()
+
+    again = SQLiteBaselineStore(str(tmp_path / "b.db"))
+    assert again.load() == changed
+    again.close()
+
+
+def test_sqlite_empty_baseline_still_exists(tmp_path):
+    store = SQLiteBaselineStore(str(tmp_path / "b.db"))
+    store.save_all({})
+    assert store.exists()
+    assert store.load() == {}
+    store.close()
+
+
+def test_iter_records_streams_in_chunks(tmp_path):
+    store = SQLiteBaselineStore(str(tmp_path / "b.db"))
+    store.CHUNK = 3
+    data = records(str(tmp_path), n=10)
+    store.save_all(data)
+    assert dict(store.iter_records()) == data
+    store.close()
+
+
+def test_json_store_reads_legacy_hex_only_entries(tmp_path):
+    path = tmp_path / "b.json"
+    path.write_text(json.dumps({"/a": "ab" * 32}))
+    legacy = JsonBaselineStore(str(path)).load()
+    assert legacy[os.path.normcase("/a")] == FileRecord(None, None, None, b"\xab" * 32)
+
+    store = JsonBaselineStore(str(path))
+    data = records(str(tmp_path))
+    store.save_all(data)
+    assert store.load() == {os.path.normcase(k): v for k, v in data.items()}
+
+
+class FailingRecords(dict):
+    """items() breaks half-way, as a crash while streaming rows would."""
+
+    def items(self):
+        for i, item in enumerate(super().items()):
+            if i == 3:
+                raise OSError("disk gone")
+            yield item
+
+
+def test_failed_save_all_leaves_the_directory_map_consistent(tmp_path):
+    store = SQLiteBaselineStore(str(tmp_path / "b.db"))
+    data = records(str(tmp_path))
+    store.save_all(data)
+    other = {os.path.join(str(tmp_path), f"other{i}", "f"): r for i, r in enumerate(data.values())}
+    with pytest.raises(OSError):
+        store.save_all(FailingRecords(other))
+    assert store.load() == data  # rolled back
+
+    removed = next(iter(data))
+    remaining = {p: r for p, r in data.items() if p != removed}
+    store.update(remaining, delete=[removed])
+    assert store.load() == remaining
+    store.close()
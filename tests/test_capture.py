@@ -0,0 +1,96 @@
+# tests/test_capture.py
+import socket
+import struct
+
+import pytest
+
+from capture import build_bpf_filter, parse_cooked, parse_ethernet, parse_ipv4
+
+ETH_HEADER = b"\x00\x11\x22\x33\x44\x55" + b"\x66\x77\x88\x99\xaa\xbb"
+
+
+def ipv4(src="45.33.32.1", dst="10.0.0.1", proto=6, frag=0, ihl=5, l4=b"\x01\xbb\xc3\x50",
+         total_len=None):
+    options = b"\0" * ((ihl - 5) * 4) if ihl > 5 else b""
+    if total_len is None:
+        total_len = 20 + len(options) + len(l4)
+    header = struct.pack("!BBHHHBBH4s4s", 0x40 | ihl, 0, total_len, 1, frag, 64, proto, 0,
+                         socket.inet_aton(src), socket.inet_aton(dst))
+    return header + options + l4
+
+
+def vlan(tpid, vid=10):
+    return struct.pack("!HH", tpid, vid)
+
+
+def test_plain_ethernet_tcp():
+    meta = parse_ethernet(ETH_HEADER + b"\x08\x00" + ipv4(), 1.5)
+    assert (meta.src, meta.dst, meta.proto) == ("45.33.32.1", "10.0.0.1", 6)
+    assert (meta.sport, meta.dport, meta.length, meta.ts) == (443, 50000, 24, 1.5)
+
+
+@pytest.mark.parametrize("tags", [
+    vlan(0x8100),
+    vlan(0x88A8) + vlan(0x8100),           # QinQ
+    vlan(0x8100) + vlan(0x8100),
+])
+def test_vlan_tags_are_skipped(tags):
+    meta = parse_ethernet(ETH_HEADER + tags + b"\x08\x00" + ipv4(proto=17), 0.0)
+    assert (meta.src, meta.proto, meta.sport, meta.dport) == ("45.33.32.1", 17, 443, 50000)
+
+
+def test_non_ipv4_and_short_frames_are_ignored():
+    assert parse_ethernet(ETH_HEADER + b"\x86\xdd" + b"\x60" + b"\0" * 39, 0.0) is None
+    assert parse_ethernet(ETH_HEADER + b"\x08", 0.0) is None
+    assert parse_ethernet(ETH_HEADER + vlan(0x8100)[:3], 0.0) is None
+    assert parse_ethernet(ETH_HEADER + b"\x08\x00" + ipv4()[:19], 0.0) is None
+
+
+def test_non_first_fragments_carry_no_ports():
+    meta = parse_ipv4(ipv4(frag=185), 0, 0.0)
+    assert (meta.sport, meta.dport) == (0, 0)
+    first = parse_ipv4(ipv4(frag=0x2000), 0, 0.0)  # MF set, offset 0
+    assert (first.sport, first.dport) == (443, 50000)
+
+
+def test_options_move_the_transport_header():
+    meta = parse_ipv4(ipv4(ihl=7), 0, 0.0)
+    assert (meta.sport, meta.dport) == (443, 50000)
+
+
+def test_truncated_transport_header_keeps_the_addresses():
+    meta = parse_ipv4(ipv4(l4=b"\x01\xbb"), 0, 0.0)
+    assert meta.src == "45.33.32.1" and (meta.sport, meta.dport) == (0, 0)
+
+
+def test_ethernet_padding_is_not_read_as_ports():
+    # a 20-byte datagram padded to the Ethernet minimum
+    meta = parse_ipv4(ipv4(l4=b"", total_len=20) + b"\x01\xbb\xc3\x50" + b"\0" * 22, 0, 0.0)
+    assert (meta.sport, meta.dport) == (0, 0)
+
+
+@pytest.mark.parametrize("packet", [
+    ipv4(ihl=4),                       # header shorter than 20 bytes
+    ipv4(ihl=0),
+    ipv4(ihl=15, total_len=40),        # header longer than the datagram
+    b"\x60" + ipv4()[1:],              # version 6 nibble
+])
+def test_malformed_headers_are_rejected(packet):
+    assert parse_ipv4(packet, 0, 0.0) is None
+
+
+def test_cooked_frames():
+    sll = b"\0" * 14 + b"\x08\x00"
+    assert parse_cooked(sll + ipv4(), 0.0).dport == 50000
+    assert parse_cooked(b"\0" * 14 + b"\x86\xdd" + ipv4(), 0.0) is None
+    assert parse_cooked(sll[:15], 0.0) is None
+
+
+def test_bpf_filter_excludes_private_pairs_and_caps_blocked_hosts():
+    assert build_bpf_filter() == (
+        "ip and not ((src net 10.0.0.0/8 or src net 172.16.0.0/12 or src net 192.168.0.0/16) and "
+        "(dst net 10.0.0.0/8 or dst net 172.16.0.0/12 or dst net 192.168.0.0/16))")
+    expr = build_bpf_filter(["45.33.32.2", "2001:db8::1", "45.33.32.1", "45.33.32.3"],
+                            max_blocked=2)
+    assert expr.endswith(" and not (host 45.33.32.1 or host 45.33.32.2)")
+    assert "2001:db8::1" not in expr
@@ -0,0 +1,70 @@
+# tests/test_event_bus.py
+import threading
+
+from event_bus import EventBus
+
+
+def drain(sub):
+    return sub.get_batch(timeout=0)
+
+
+def test_every_subscriber_gets_every_matching_event():
+    bus = EventBus()
+    everything = bus.subscribe()
+    traffic = bus.subscribe(topics=["traffic"])
+    bus.publish("traffic", 1)
+    bus.topic("alerts").put(2)
+    assert drain(everything) == [(1, "traffic", 1), (2, "alerts", 2)]
+    assert drain(traffic) == [(1, "traffic", 1)]
+
+
+def test_resume_replays_only_what_was_missed():
+    bus = EventBus()
+    for i in range(5):
+        bus.publish("traffic" if i % 2 == 0 else "alerts", i)
+    sub = bus.subscribe(topics=["traffic"], last_seq=2)
+    assert [e[0] for e in drain(sub)] == [3, 5]
+    assert sub.dropped == 0
+
+    bus.publish("traffic", 5)
+    assert drain(sub) == [(6, "traffic", 5)]
+
+
+def test_resume_past_the_history_ring_counts_the_gap():
+    bus = EventBus(history=3)
+    for i in range(10):
+        bus.publish("traffic", i)
+    sub = bus.subscribe(last_seq=4)
+    assert [e[0] for e in drain(sub)] == [8, 9, 10]
+    assert sub.dropped == 3  # 5, 6 and 7 fell out of the ring
+
+
+def test_resume_without_a_gap_replays_nothing():
+    bus = EventBus()
+    bus.publish("traffic", 0)
+    sub = bus.subscribe(last_seq=1)
+    assert drain(sub) == []
+    assert sub.dropped == 0
+
+
+def test_slow_subscriber_drops_oldest():
+    bus = EventBus()
+    sub = bus.subscribe(maxlen=3)
+    for i in range(5):
+        bus.publish("traffic", i)
+    assert [e[2] for e in drain(sub)] == [2, 3, 4]
+    assert sub.dropped == 2
+    assert bus.stats()["subscribers"][0]["delivered"] == 3
+
+
+def test_get_batch_wakes_on_publish_and_close():
+    bus = EventBus()
+    sub = bus.subscribe()
+    timer = threading.Timer(0.05, bus.publish, args=("traffic", "x"))
+    timer.start()
+    assert sub.get_batch(timeout=5) == [(1, "traffic", "x")]
+
+    threading.Timer(0.05, sub.close).start()
+    assert sub.get_batch(timeout=5) == []
+    bus.publish("traffic", "after close")
+    assert bus.stats()["subscribers"] == []
@@ -0,0 +1,123 @@
+# tests/test_feed_manager.py
+import os
+
+import pytest
+
+from feed_manager import Feed, FeedManager, parse_drop
+
+URL = "https://example.test/drop.txt"
+BODY = "; Spamhaus DROP\n1.2.3.0/24 ; SBL1\n5.6.0.0/16 ; SBL2\n"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """Stands in for requests.Session: answers from a list, records request headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+def manager(tmp_path, *responses, **kwargs):
+    updates = []
+    m = FeedManager([URL], cache_dir=str(tmp_path / "cache"), on_update=updates.append, **kwargs)
+    m.session = FakeSession(*responses)
+    return m, updates
+
+
+def ok(text=BODY, etag='"v1"', modified="Mon, 01 Jan 2024 00:00:00 GMT"):
+    return FakeResponse(200, text, {"ETag": etag, "Last-Modified": modified})
+
+
+def test_parse_drop_skips_comments():
+    assert parse_drop(BODY + "# note\n\n9.9.9.9 # inline\n") == {"1.2.3.0/24", "5.6.0.0/16", "9.9.9.9"}
+
+
+def test_conditional_requests_and_304(tmp_path):
+    m, updates = manager(tmp_path, ok(), FakeResponse(304))
+    assert m.refresh()
+    assert updates == [{"1.2.3.0/24", "5.6.0.0/16"}]
+    assert m.session.requests[0] == {}
+
+    assert not m.refresh()
+    assert m.session.requests[1] == {"If-None-Match": '"v1"',
+                                     "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert len(updates) == 1 and m.stats()["updates"] == 1 and m.stats()["refreshes"] == 2
+
+
+def test_cache_is_replaced_atomically_and_reloaded(tmp_path):
+    m, _ = manager(tmp_path, ok(), ok("7.7.7.0/24\n", etag='"v2"'))
+    m.refresh()
+    m.refresh()
+    cache = tmp_path / "cache"
+    assert not [p for p in os.listdir(cache) if p.endswith(".tmp")]
+
+    again, updates = manager(tmp_path)
+    assert again.load_cached() == {"7.7.7.0/24"}
+    assert again.feeds[0].etag == '"v2"' and updates == []
+
+
+@pytest.mark.parametrize("bad", [
+    FakeResponse(200, "; nothing but comments\n"),
+    FakeResponse(500),
+    ConnectionError("down"),
+])
+def test_failed_or_empty_download_keeps_the_last_good_copy(tmp_path, bad):
+    m, updates = manager(tmp_path, ok(), bad)
+    m.refresh()
+    body_path, _ = m._paths(m.feeds[0])
+    before = open(body_path).read()
+
+    assert not m.refresh()
+    assert m.entries() == {"1.2.3.0/24", "5.6.0.0/16"}
+    assert m.feeds[0].error and m.feeds[0].etag == '"v1"'
+    assert open(body_path).read() == before
+    assert len(updates) == 1
+
+
+def test_damaged_cache_is_ignored(tmp_path):
+    m, _ = manager(tmp_path, ok())
+    m.refresh()
+    body_path, meta_path = m._paths(m.feeds[0])
+    with open(meta_path, "w") as f:
+        f.write("{not json")
+
+    again, _ = manager(tmp_path, ok(etag='"v3"'))
+    again.load_cached()
+    assert again.feeds[0].etag is None  # no validators: the next refresh downloads in full
+    assert again.refresh()
+    assert again.session.requests == [{}]
+
+
+def test_missing_cache_and_local_file_feeds(tmp_path):
+    local = tmp_path / "local.txt"
+    local.write_text("8.8.8.0/24\n")
+    updates = []
+    m = FeedManager([str(local), Feed(URL, name="drop")], cache_dir=str(tmp_path / "none"),
+                    on_update=updates.append)
+    assert m.load_cached() == {"8.8.8.0/24"}
+    m.session = FakeSession(ok())
+    assert m.refresh()  # the local file is unchanged; the URL is new
+    assert updates == [{"8.8.8.0/24", "1.2.3.0/24", "5.6.0.0/16"}]
+    m.stop()
+
+
+def test_default_names_do_not_collide():
+    assert Feed("https://a.test/drop.txt").name != Feed("https://b.test/drop.txt").name
+    assert Feed("https://a.test/drop.txt").name.startswith("drop-")
@@ -0,0 +1,211 @@
+# tests/test_firewall.py
+import json
+
+from firewall_backends import DryRunBackend, NetshBackend
+from firewall_manager import FirewallManager
+
+
+class FlakyBackend(DryRunBackend):
+    name = "flaky"
+
+    def __init__(self):
+        super().__init__()
+        self.fail = True
+
+    def apply(self, blocked, added, removed, expiry=None):
+        if self.fail:
+            raise RuntimeError("backend down")
+        return super().apply(blocked, added, removed, expiry)
+
+
+def manager(tmp_path, backend=None, **kwargs):
+    kwargs.setdefault("batch_window", 0.01)
+    return FirewallManager(record_file=str(tmp_path / "blocked.json"), verbose=False,
+                           backend=backend or DryRunBackend(), **kwargs)
+
+
+def journal(tmp_path):
+    path = tmp_path / "blocked.json.journal"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+# -------------------------------
+# FirewallManager
+# -------------------------------
+def test_blocks_are_batched_journaled_and_reloaded(tmp_path):
+    fw = manager(tmp_path)
+    changes = []
+    fw.on_change = lambda added, removed: changes.append((sorted(added), sorted(removed)))
+    fw.block_ip("45.33.32.1")
+    fw.block_ip("45.33.32.2", ttl=3600)
+    fw.block_ip("10.0.0.1")  # private: never blocked
+    fw.flush()
+    assert fw.list_blocked_ips() == ["45.33.32.1", "45.33.32.2"]
+    assert changes == [(["45.33.32.1", "45.33.32.2"], [])]
+    assert {e["ip"] for e in journal(tmp_path)} == {"45.33.32.1", "45.33.32.2"}
+
+    fw.unblock_ip("45.33.32.1")
+    fw.flush()
+    assert journal(tmp_path)[-1] == {"op": "remove", "ip": "45.33.32.1"}
+    fw.running = False  # reload without close(), as after a crash
+
+    again = manager(tmp_path)
+    try:
+        assert again.list_blocked_ips() == ["45.33.32.2"]
+        assert again.blocked_ips["45.33.32.2"] is not None  # TTL survives the reload
+    finally:
+        again.close()
+
+
+def test_journal_is_compacted_into_the_snapshot(tmp_path):
+    fw = manager(tmp_path, compact_every=3)
+    for i in range(3):
+        fw.block_ip(f"45.33.33.{i + 1}")
+    fw.flush()
+    assert journal(tmp_path) == []
+    with open(tmp_path / "blocked.json") as f:
+        assert sorted(json.load(f)) == ["45.33.33.1", "45.33.33.2", "45.33.33.3"]
+    assert fw.stats()["journal_entries"] == 0
+    fw.close()
+
+
+def test_close_writes_a_snapshot_with_expiries(tmp_path):
+    fw = manager(tmp_path)
+    fw.block_ip("45.33.32.5")
+    fw.block_ip("45.33.32.6", ttl=600)
+    fw.close()
+    with open(tmp_path / "blocked.json") as f:
+        records = json.load(f)
+    assert records[0] == "45.33.32.5"
+    assert records[1]["ip"] == "45.33.32.6" and records[1]["expires"] > 0
+    assert journal(tmp_path) == []
+
+
+def test_failed_batch_is_requeued_not_journaled(tmp_path):
+    backend = FlakyBackend()
+    fw = manager(tmp_path, backend=backend)
+    changes = []
+    fw.on_change = lambda added, removed: changes.append(list(added))
+    fw.block_ip("45.33.32.9")
+    fw.flush()
+    stats = fw.stats()
+    assert stats["batches_failed"] >= 1
+    assert stats["pending_add"] == 1
+    assert journal(tmp_path) == []
+    assert changes == []
+
+    backend.fail = False
+    fw.flush()
+    assert fw.stats()["pending_add"] == 0
+    assert journal(tmp_path) == [{"op": "add", "ip": "45.33.32.9", "expires": None}]
+    assert changes == [["45.33.32.9"]]
+    fw.close()
+
+
+def test_unblock_before_retry_cancels_the_failed_add(tmp_path):
+    backend = FlakyBackend()
+    fw = manager(tmp_path, backend=backend)
+    fw.block_ip("45.33.32.10")
+    fw.flush()
+    fw.unblock_ip("45.33.32.10")
+    stats = fw.stats()
+    assert (stats["pending_add"], stats["pending_remove"]) == (0, 0)
+    backend.fail = False
+    fw.close()
+    assert not any(b["added"] for b in backend.batches)
+
+
+# -------------------------------
+# NetshBackend
+# -------------------------------
+class NetshRunner:
+    """Fake netsh: records calls; rule sets named in `existing` can be deleted."""
+
+    def __init__(self, existing=(), fail_add=False):
+        self.existing = set(existing)
+        self.fail_add = fail_add
+        self.calls = []
+
+    def __call__(self, args):
+        self.calls.append(args)
+        verb, name = args[3], args[5]
+        if verb == "delete":
+            if name in self.existing:
+                self.existing.discard(name)
+                return 0
+            return 1
+        if verb == "add":
+            if self.fail_add:
+                return 1
+            self.existing.add(name)
+        return 0
+
+    def verbs(self, verb):
+        return [c[5] for c in self.calls if c[3] == verb]
+
+
+def test_netsh_first_sync_writes_chunks_and_clears_leftovers(monkeypatch):
+    monkeypatch.setattr(NetshBackend, "CHUNK_SIZE", 2)
+    runner = NetshRunner(existing={"name=AURA_Block_Set_2", "name=AURA_Block_Set_3",
+                                   "name=AURA_Block_45.33.32.1"})
+    backend = NetshBackend(runner=runner)
+    ips = ["45.33.32.1", "45.33.32.2", "45.33.32.3"]
+    backend.apply(ips, ips, [])
+    assert len(runner.verbs("add")) == 4  # two chunks, in + out each
+    assert runner.existing == {"name=AURA_Block_Set_0", "name=AURA_Block_Set_1"}
+
+    # the legacy per-IP cleanup is not repeated on later batches
+    runner.calls.clear()
+    backend.apply(ips[1:], [], ["45.33.32.1"])
+    assert runner.verbs("delete") == []
+
+
+def test_netsh_unblock_touches_only_its_own_slot(monkeypatch):
+    monkeypatch.setattr(NetshBackend, "CHUNK_SIZE", 2)
+    runner = NetshRunner()
+    backend = NetshBackend(runner=runner)
+    ips = ["45.33.32.1", "45.33.32.2", "45.33.32.3", "45.33.32.4", "45.33.32.5"]
+    backend.apply(ips, ips, [])
+
+    runner.calls.clear()
+    backend.apply(ips[1:], [], ["45.33.32.1"])
+    assert runner.calls == [["netsh", "advfirewall", "firewall", "set", "rule",
+                             "name=AURA_Block_Set_0", "new", "remoteip=45.33.32.2"]]
+
+    # a new IP fills the freed place instead of shifting later slots
+    runner.calls.clear()
+    backend.apply(ips[1:] + ["45.33.32.6"], ["45.33.32.6"], [])
+    assert [c[5] for c in runner.calls] == ["name=AURA_Block_Set_0"]
+    assert runner.calls[0][-1] == "remoteip=45.33.32.2,45.33.32.6"
+
+
+def test_netsh_emptied_slot_is_deleted():
+    runner = NetshRunner()
+    backend = NetshBackend(runner=runner)
+    backend.apply(["45.33.32.1"], ["45.33.32.1"], [])
+    backend.apply([], [], ["45.33.32.1"])
+    assert runner.existing == set()
+
+
+def test_netsh_cleanup_is_bounded_when_deletes_always_succeed():
+    calls = []
+    backend = NetshBackend(runner=lambda args: calls.append(args) or 0)
+    backend.apply(["45.33.32.1"], ["45.33.32.1"], [])
+    assert len(calls) < NetshBackend.MAX_STALE_SETS + 10
+
+
+def test_netsh_failed_add_is_requeued_by_the_manager(tmp_path):
+    runner = NetshRunner(fail_add=True)
+    fw = manager(tmp_path, backend=NetshBackend(runner=runner))
+    fw.block_ip("45.33.32.7")
+    fw.flush()
+    assert fw.stats()["batches_failed"] >= 1
+    assert journal(tmp_path) == []
+
+    runner.fail_add = False
+    fw.flush()
+    assert "name=AURA_Block_Set_0" in runner.existing
+    assert journal(tmp_path) == [{"op": "add", "ip": "45.33.32.7", "expires": None}]
+    fw.close()
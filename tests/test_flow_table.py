@@ -0,0 +1,65 @@
+# tests/test_flow_table.py
+from detection_engine import PacketMeta
+from flow_table import FlowTable
+
+
+def packet(ts, src="10.0.0.1", dst="8.8.8.8", sport=40000, dport=443, length=100, proto=6):
+    return PacketMeta(src, dst, proto, sport, dport, length, ts)
+
+
+def test_start_then_counted_and_both_directions_share_a_flow():
+    table = FlowTable()
+    rec, reason = table.observe(packet(0.0))
+    assert reason == "start"
+    reply, reason = table.observe(packet(0.1, src="8.8.8.8", dst="10.0.0.1", sport=443, dport=40000))
+    assert reason is None
+    assert reply is rec
+    assert (rec.packets, rec.bytes) == (2, 200)
+    assert table.stats()["active_flows"] == 1
+
+
+def test_packet_and_byte_thresholds():
+    table = FlowTable(packet_threshold=3, byte_threshold=10 ** 9, active_timeout=1000)
+    reasons = [table.observe(packet(i * 0.01))[1] for i in range(7)]
+    assert reasons == ["start", None, None, "threshold", None, None, "threshold"]
+
+    table = FlowTable(packet_threshold=10 ** 9, byte_threshold=250, active_timeout=1000)
+    reasons = [table.observe(packet(i * 0.01))[1] for i in range(5)]
+    assert reasons == ["start", None, None, "threshold", None]
+
+
+def test_active_timeout_emits_periodically():
+    table = FlowTable(active_timeout=10, idle_timeout=30)
+    assert table.observe(packet(0.0))[1] == "start"
+    assert table.observe(packet(9.0))[1] is None
+    assert table.observe(packet(10.5))[1] == "active"
+    assert table.observe(packet(15.0))[1] is None
+
+
+def test_idle_gap_starts_a_new_flow():
+    table = FlowTable(idle_timeout=30, sweep_interval=1000)
+    first, _ = table.observe(packet(0.0))
+    second, reason = table.observe(packet(31.0))
+    assert reason == "start"
+    assert second is not first
+    assert table.stats()["flows_expired"] == 1
+
+
+def test_sweep_drops_idle_flows():
+    table = FlowTable(idle_timeout=30, sweep_interval=5)
+    table.observe(packet(0.0, sport=1))
+    table.observe(packet(40.0, sport=2))
+    assert table.stats()["active_flows"] == 1
+
+
+def test_full_table_evicts_oldest():
+    table = FlowTable(max_flows=10, idle_timeout=1000, sweep_interval=1000)
+    for port in range(11):
+        table.observe(packet(float(port), sport=port + 1))
+    stats = table.stats()
+    assert stats["active_flows"] <= 10
+    assert stats["flows_evicted"] >= 1
+    # the newest flow survives, the oldest went first
+    keys = {rec.key for rec in table.flows.values()}
+    assert table.flow_key(packet(10.0, sport=11)) in keys
+    assert table.flow_key(packet(0.0, sport=1)) not in keys
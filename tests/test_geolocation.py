@@ -0,0 +1,130 @@
+# tests/test_geolocation.py
+import ipaddress
+import random
+from types import SimpleNamespace
+
+import geoip2.database
+import geoip2.errors
+import pytest
+
+from geolocation_service import GeoLocator, is_private_ip, parse_ip
+
+
+class FakeReader:
+    """Answers city() from {network: (city, country)}; unknown space raises with its block."""
+
+    def __init__(self, networks, not_found_prefix=16):
+        self.networks = {ipaddress.ip_network(n): v for n, v in networks.items()}
+        self.not_found_prefix = not_found_prefix
+        self.calls = []
+
+    def city(self, ip):
+        self.calls.append(ip)
+        addr = ipaddress.ip_address(ip)
+        for network, (city, country) in self.networks.items():
+            if addr in network:
+                return SimpleNamespace(city=SimpleNamespace(name=city),
+                                       country=SimpleNamespace(name=country),
+                                       location=SimpleNamespace(latitude=1.0, longitude=2.0),
+                                       traits=SimpleNamespace(network=network))
+        raise geoip2.errors.AddressNotFoundError("not found", ip, self.not_found_prefix)
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    opened = []
+
+    def reader(path, mode=None):
+        opened.append((path, mode))
+        return FakeReader({"45.33.32.0/24": ("Fremont", "United States"),
+                           "8.8.0.0/16": (None, "United States"),
+                           "2a00:1450::/32": ("Dublin", "Ireland")})
+
+    monkeypatch.setattr(geoip2.database, "Reader", reader)
+    return opened
+
+
+def test_database_is_memory_mapped(opened):
+    GeoLocator("City.mmdb")
+    assert opened == [("City.mmdb", geoip2.database.MODE_MMAP)]
+
+
+def test_one_lookup_serves_the_whole_block(opened):
+    geo = GeoLocator()
+    first = geo.get_location("45.33.32.1")
+    assert first == {"city": "Fremont", "country": "United States", "latitude": 1.0, "longitude": 2.0}
+    assert geo.get_location("45.33.32.254") is first
+    assert geo.get_location("8.8.4.4")["city"] == "Unknown"
+    assert geo.get_location("8.8.8.8")["country"] == "United States"
+    assert geo.get_location("2a00:1450:4001::1")["city"] == "Dublin"
+    assert geo.get_location("2a00:1450:ffff::1")["city"] == "Dublin"
+    assert geo.reader.calls == ["45.33.32.1", "8.8.4.4", "2a00:1450:4001::1"]
+    assert geo.stats() == {"blocks": 3, "hits": 3, "misses": 3, "hit_ratio": 0.5}
+
+
+def test_not_found_blocks_are_cached(opened):
+    geo = GeoLocator()
+    assert geo.get_location("45.34.0.1") is None
+    assert geo.get_location("45.34.255.1") is None  # same /16
+    assert geo.get_location("45.35.0.1") is None    # next block: new lookup
+    assert geo.reader.calls == ["45.34.0.1", "45.35.0.1"]
+    assert geo.stats()["blocks"] == 2
+
+
+def test_private_invalid_and_uncached(opened):
+    geo = GeoLocator(cache=False)
+    assert geo.get_location("10.1.2.3") is None
+    assert geo.get_location("fd00::1") is None
+    assert geo.get_location("not-an-ip") is None
+    geo.get_location("45.33.32.1")
+    geo.get_location("45.33.32.1")
+    assert geo.reader.calls == ["45.33.32.1", "45.33.32.1"]
+
+
+def test_block_cache_is_bounded(opened):
+    geo = GeoLocator(max_blocks=2)
+    for ip in ("45.34.0.1", "45.35.0.1", "45.36.0.1"):
+        geo.get_location(ip)
+    assert geo.stats()["blocks"] == 1
+    geo.get_location("45.34.0.2")
+    assert geo.reader.calls[-1] == "45.34.0.2"
+
+
+def test_missing_database_returns_none(monkeypatch):
+    def missing(path, mode=None):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(geoip2.database, "Reader", missing)
+    assert GeoLocator().get_location("45.33.32.1") is None
+
+
+@pytest.mark.parametrize("ip,private", [
+    ("9.255.255.255", False), ("10.0.0.0", True), ("10.255.255.255", True), ("11.0.0.0", False),
+    ("126.255.255.255", False), ("127.0.0.0", True), ("127.255.255.255", True),
+    ("128.0.0.0", False),
+    ("169.253.255.255", False), ("169.254.0.0", True), ("169.254.255.255", True),
+    ("169.255.0.0", False),
+    ("172.15.255.255", False), ("172.16.0.0", True), ("172.31.255.255", True),
+    ("172.32.0.0", False),
+    ("192.167.255.255", False), ("192.168.0.0", True), ("192.168.255.255", True),
+    ("192.169.0.0", False),
+    ("8.8.8.8", False), ("::1", True), ("fd00::1", True), ("2a00:1450::1", False),
+    ("bogus", False), ("", False),
+])
+def test_private_range_boundaries(ip, private):
+    assert is_private_ip(ip) is private
+    if private or parse_ip(ip) is not None:
+        assert ipaddress.ip_address(ip).is_private is private
+
+
+def test_private_check_matches_ipaddress_on_random_addresses():
+    rng = random.Random(1)
+    for _ in range(100000):
+        ip = str(ipaddress.IPv4Address(rng.getrandbits(32)))
+        assert is_private_ip(ip) == ipaddress.IPv4Address(ip).is_private, ip
+
+
+def test_parse_ip():
+    assert parse_ip("1.2.3.4") == (4, 0x01020304)
+    assert parse_ip("::2") == (6, 2)
+    assert parse_ip("1.2.3") is None
@@ -0,0 +1,87 @@
+# tests/test_history_store.py
+import time
+
+import pytest
+
+from history_store import HistoryStore
+
+DAY = 86400
+
+
+def verdict(ts, ip="45.33.32.1", country="NL", score=0.1, blocked=False):
+    return {"ts": ts, "external_ip": ip, "src_ip": ip, "dst_ip": "10.0.0.1", "country": country,
+            "score": score, "blocked": blocked, "lat": 52.3, "lon": 4.9, "packets": 1, "bytes": 60}
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = HistoryStore(directory=str(tmp_path / "history"), flush_interval=60, batch_size=10 ** 6)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def today():
+    return (time.time() // DAY) * DAY
+
+
+def test_rows_are_partitioned_per_day(history, today):
+    history.record(verdict(today - DAY + 10))
+    history.record(verdict(today + 10))
+    history.record(verdict(today + 20))
+    assert history.stats()["written"] == 0  # write-behind
+    assert history.flush()
+    assert history.stats()["written"] == 3
+    assert len(history.partitions()) == 2
+
+
+def test_query_filters_newest_first_across_partitions(history, today):
+    history.record(verdict(today - DAY + 10, score=0.9, blocked=True))
+    history.record(verdict(today + 10, ip="45.33.32.2", country="US", score=0.7))
+    history.record(verdict(today + 20))
+    history.flush()
+
+    rows = history.query()
+    assert [r["ts"] for r in rows] == [today + 20, today + 10, today - DAY + 10]
+    assert [r["ts"] for r in history.query(min_score=0.5)] == [today + 10, today - DAY + 10]
+    assert [r["external_ip"] for r in history.query(country="US")] == ["45.33.32.2"]
+    assert len(history.query(blocked=True)) == 1
+    assert [r["ts"] for r in history.query(start=today, end=today + 15)] == [today + 10]
+    assert len(history.query(limit=2)) == 2
+
+
+def test_count_groups_partial_and_whole_days(history, today):
+    for i in range(3):
+        history.record(verdict(today - DAY + i, country="NL", blocked=i == 0))
+    history.record(verdict(today + 5, country="US", score=0.8))
+    history.flush()
+    counts = history.count()
+    assert counts[0] == {"country": "NL", "count": 3, "blocked": 1, "max_score": 0.1}
+    assert history.count(start=today - DAY + 1, end=today + 6)[0]["count"] == 2
+    assert history.count(group_by="external_ip", min_score=0.5) == [
+        {"external_ip": "45.33.32.1", "count": 1, "blocked": 0, "max_score": 0.8}]
+    with pytest.raises(ValueError):
+        history.count(group_by="score")
+
+
+def test_retention_deletes_whole_partitions(history, today):
+    history.retention_days = 2
+    history.record(verdict(today - DAY))
+    history.record(verdict(today - 5 * DAY))  # already past retention
+    history.flush()
+    assert history.stats()["dropped"] == 1
+    assert history.apply_retention(now=today + 5 * DAY) == 1
+    assert history.partitions() == []
+
+
+def test_full_buffer_drops_oldest(tmp_path, today):
+    store = HistoryStore(directory=str(tmp_path / "h"), flush_interval=60, batch_size=10 ** 6,
+                         max_buffer=2)
+    try:
+        for i in range(3):
+            store.record(verdict(today + i))
+        assert store.stats()["dropped"] == 1
+        store.flush()
+        assert [r["ts"] for r in store.query()] == [today + 2, today + 1]
+    finally:
+        store.close()
@@ -0,0 +1,51 @@
+# tests/test_inotify_watcher.py
+import queue
+
+import pytest
+
+from inotify_watcher import InotifyWatcher
+
+pytestmark = pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify is Linux-only")
+
+
+@pytest.fixture
+def watched(tmp_path):
+    batches = queue.Queue()
+    watcher = InotifyWatcher([str(tmp_path)], on_changes=batches.put, debounce=0.05)
+    watcher.start()
+    yield tmp_path, watcher, batches
+    watcher.stop()
+
+
+def collect(batches, timeout=5.0):
+    seen = set(batches.get(timeout=timeout))
+    while True:
+        try:
+            seen |= batches.get(timeout=0.3)
+        except queue.Empty:
+            return seen
+
+
+def test_changes_are_collected_per_path(watched):
+    root, watcher, batches = watched
+    for i in range(5):
+        (root / "a.txt").write_text(str(i))
+    (root / "b.txt").write_text("b")
+    assert collect(batches) == {str(root / "a.txt"), str(root / "b.txt")}
+
+
+def test_new_directories_are_watched(watched):
+    root, watcher, batches = watched
+    (root / "sub").mkdir()
+    collect(batches)
+    (root / "sub" / "c.txt").write_text("c")
+    assert str(root / "sub" / "c.txt") in collect(batches)
+
+
+def test_deletes_are_reported(watched):
+    root, watcher, batches = watched
+    path = root / "gone.txt"
+    path.write_text("x")
+    collect(batches)
+    path.unlink()
+    assert str(path) in collect(batches)
@@ -0,0 +1,140 @@
+# tests/test_integrity_monitor.py
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from baseline_store import FileRecord
+from integrity_monitor import FileIntegrityMonitor, _unchanged
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "watched"
+    root.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (root / name).write_text(name)
+    return root
+
+
+def monitor(tmp_path, tree, suffix=".json", **kwargs):
+    kwargs.setdefault("hash_workers", 2)
+    fim = FileIntegrityMonitor(baseline_path=str(tmp_path / f"baseline{suffix}"),
+                               watch_dirs=[str(tree)], watch_mode="poll", **kwargs)
+    fim.create_baseline()
+    return fim
+
+
+def norm(path):
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+def touch(path, text):
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))  # coarse mtime clocks
+
+
+def test_drift_is_reported_once_then_resolved(tmp_path, tree):
+    fim = monitor(tmp_path, tree)
+    assert fim.force_scan() is None
+
+    touch(tree / "a.txt", "changed")
+    (tree / "b.txt").unlink()
+    (tree / "d.txt").write_text("new")
+    event = fim.force_scan()
+    assert event["modified"] == [norm(tree / "a.txt")]
+    assert event["removed"] == [norm(tree / "b.txt")]
+    assert event["added"] == [norm(tree / "d.txt")]
+    assert event["outstanding"] == 3
+
+    # nothing changed since: the drift stays outstanding but is not re-reported
+    assert fim.force_scan() is None
+    assert fim.outstanding()["modified"] == 1
+
+    touch(tree / "a.txt", "a.txt")
+    event = fim.force_scan()
+    assert event["resolved"] == [norm(tree / "a.txt")]
+    assert event["counts"]["modified"] == 0
+    assert event["outstanding"] == 2
+
+
+def test_changing_again_is_a_new_transition(tmp_path, tree):
+    fim = monitor(tmp_path, tree)
+    touch(tree / "a.txt", "one")
+    first = fim.force_scan()
+    touch(tree / "a.txt", "two")
+    second = fim.force_scan()
+    assert second["modified"] == [norm(tree / "a.txt")]
+    assert second["seq"] > first["seq"]
+
+
+def test_accept_folds_drift_into_the_baseline(tmp_path, tree):
+    fim = monitor(tmp_path, tree, suffix=".db")
+    touch(tree / "a.txt", "changed")
+    (tree / "c.txt").unlink()
+    fim.force_scan()
+    assert fim.accept(kind="modified") == 1
+    assert fim.outstanding()["modified"] == 0
+    assert fim.outstanding()["removed"] == 1
+
+    # the accepted entry survives a reload; the unaccepted removal is still drift
+    again = FileIntegrityMonitor(baseline_path=str(tmp_path / "baseline.db"),
+                                 watch_dirs=[str(tree)], watch_mode="poll", hash_workers=2)
+    event = again.force_scan()
+    assert event["modified"] == []
+    assert event["removed"] == [norm(tree / "c.txt")]
+
+
+def test_acknowledge_and_paged_changes(tmp_path, tree):
+    fim = monitor(tmp_path, tree, max_event_paths=2)
+    for i in range(5):
+        (tree / f"new{i}.txt").write_text(str(i))
+    event = fim.force_scan()
+    assert event["counts"]["added"] == 5
+    assert len(event["added"]) == 2 and event["truncated"]
+
+    page = fim.changes(offset=2, limit=2)
+    assert page["total"] == 5 and len(page["changes"]) == 2
+    assert fim.acknowledge() == 5
+    assert fim.changes(acknowledged=False)["total"] == 0
+    assert fim.changes(since=event["seq"])["total"] == 0
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path, tree):
+    fim = monitor(tmp_path, tree)
+    fim.force_scan()
+    assert fim.last_scan_stats["skipped"] == 3
+    assert fim.last_scan_stats["hashed"] == 0
+
+    touch(tree / "a.txt", "changed")
+    fim.force_scan()
+    assert fim.last_scan_stats["hashed"] == 1
+
+
+def test_paranoid_scan_rehashes_everything(tmp_path, tree):
+    fim = monitor(tmp_path, tree, paranoid_every=2)
+    fim.force_scan()
+    fim.force_scan()
+    assert fim.last_scan_stats["paranoid"]
+    assert fim.last_scan_stats["hashed"] == 3
+
+
+def test_detect_paths_checks_only_reported_paths(tmp_path, tree):
+    fim = monitor(tmp_path, tree)
+    touch(tree / "a.txt", "changed")
+    touch(tree / "b.txt", "changed")
+    event = fim.detect_paths([str(tree / "a.txt")])
+    assert event["source"] == "watch"
+    assert event["modified"] == [norm(tree / "a.txt")]
+
+    touch(tree / "a.txt", "a.txt")
+    event = fim.detect_paths([str(tree / "a.txt")])
+    assert event["resolved"] == [norm(tree / "a.txt")]
+
+
+def test_zero_inode_is_not_compared():
+    old = FileRecord(10, 5, 0, b"x")
+    assert _unchanged(old, SimpleNamespace(st_size=10, st_mtime_ns=5, st_ino=1234))
+    old = FileRecord(10, 5, 99, b"x")
+    assert not _unchanged(old, SimpleNamespace(st_size=10, st_mtime_ns=5, st_ino=1234))
@@ -0,0 +1,83 @@
+# tests/test_metrics.py
+import pytest
+
+import metrics
+from metrics import N_BUCKETS, PROM_BOUNDS_NS, LogLimiter, Registry, _bucket_bounds, _bucket_index
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_buckets_are_contiguous_and_contain_their_values():
+    for ns in [0, 1, 15, 16, 17, 1000, 123456, 10 ** 9, 2 ** 43]:
+        low, high = _bucket_bounds(_bucket_index(ns))
+        assert low <= ns < high
+        assert high - low == 1 or (high - low) * metrics.SUB <= low  # <= 1/16 relative width
+    for idx in range(1, N_BUCKETS):
+        assert _bucket_bounds(idx - 1)[1] == _bucket_bounds(idx)[0]
+    assert _bucket_index(2 ** 60) == N_BUCKETS - 1
+
+
+def test_prometheus_bounds_fall_on_bucket_edges():
+    for bound in PROM_BOUNDS_NS:
+        assert _bucket_bounds(_bucket_index(bound))[0] == bound
+
+
+def test_histogram_percentiles_are_within_a_few_percent():
+    registry = Registry()
+    hist = registry.histogram("stage_seconds", labelnames=("stage",))
+    child = hist.labels("intel")
+    for us in range(1, 1001):
+        child.observe(us / 1e6)
+    assert child.percentile(50) == pytest.approx(500e-6, rel=0.07)
+    assert child.percentile(99) == pytest.approx(990e-6, rel=0.07)
+    assert child.percentile(100) <= 1000e-6
+    summary = registry.summary()['aura_stage_seconds{stage="intel"}']
+    assert summary["count"] == 1000 and summary["max_us"] == 1000.0
+
+
+def test_render_is_cumulative_prometheus_text():
+    registry = Registry()
+    hist = registry.histogram("latency_seconds", "Stage latency", ("stage",))
+    hist.labels("geo").observe(0.002)
+    hist.labels("geo").observe(0.5)
+    registry.counter("packets_total").inc(3)
+    registry.collect("pipeline", lambda: {"queue": {"depth": 7}, "ready": True, "name": "x"})
+    registry.collect("broken", lambda: 1 / 0)
+    text = registry.render()
+    assert "# TYPE aura_latency_seconds histogram" in text
+    assert 'aura_latency_seconds_bucket{stage="geo",le="+Inf"} 2' in text
+    assert 'aura_latency_seconds_count{stage="geo"} 2' in text
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith("aura_latency_seconds_bucket")]
+    assert buckets == sorted(buckets)
+    assert "aura_packets_total 3" in text
+    assert "aura_pipeline_queue_depth 7" in text
+    assert "aura_pipeline_ready 1" in text
+    assert "aura_broken" not in text
+
+
+def test_labels_must_match():
+    hist = Registry().histogram("x_seconds", labelnames=("stage",))
+    with pytest.raises(ValueError):
+        hist.labels("a", "b")
+
+
+def test_log_limiter_suppresses_and_summarises(monkeypatch, capsys):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics, "time", clock)
+    limiter = LogLimiter(rate=2, per=1.0, tag="[T]")
+    for i in range(5):
+        limiter.log(f"line {i}")
+    clock.now += 1.5
+    limiter.log("after")
+    out = capsys.readouterr().out.splitlines()
+    assert out[:2] == ["line 0", "line 1"]
+    assert out[2].startswith("[T] ... 3 similar lines suppressed")
+    assert out[3] == "after"
+    assert limiter.total_suppressed == 3
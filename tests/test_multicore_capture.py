@@ -0,0 +1,152 @@
+# tests/test_multicore_capture.py
+import ipaddress
+import random
+import socket
+import struct
+
+import pytest
+
+from multicore_capture import (SKF_AD_OFF, SKF_AD_PROTOCOL, SKF_NET_OFF, MulticoreCapture,
+                               capture_filter_program, fanout_program, fanout_shard)
+
+ETH_P_IP, ETH_P_IPV6, ETH_P_ARP = 0x0800, 0x86DD, 0x0806
+PRIVATE = ["10.0.0.1", "10.255.255.254", "172.16.0.1", "172.31.255.254", "192.168.0.1",
+           "192.168.255.254"]
+PUBLIC = ["8.8.8.8", "45.33.32.1", "9.255.255.255", "11.0.0.0", "172.15.255.255",
+          "172.32.0.0", "192.167.255.255", "192.169.0.0", "255.255.255.255"]
+
+
+def run_bpf(prog, protocol, net):
+    """
+    Minimal classic-BPF interpreter for the opcodes these programs use.
+    `protocol` is skb->protocol, `net` the bytes from the network header on
+    (for VLAN frames the kernel has already untagged them). Absolute loads
+    outside SKF_NET_OFF / SKF_AD_OFF fail the test: they would read link-layer
+    bytes that differ between link types and directions.
+    """
+    a = x = pc = 0
+    for code, jt, jf, k in prog:
+        assert 0 <= jt <= 255 and 0 <= jf <= 255
+    while True:
+        assert 0 <= pc < len(prog), "fell off the program"
+        code, jt, jf, k = prog[pc]
+        pc += 1
+        if code in (0x20, 0x28):  # ld [k] / ldh [k]
+            size = 4 if code == 0x20 else 2
+            if k == SKF_AD_OFF + SKF_AD_PROTOCOL:
+                a = protocol
+            elif k >= SKF_NET_OFF and k < SKF_AD_OFF:
+                off = k - SKF_NET_OFF
+                if off + size > len(net):
+                    return 0  # out-of-bounds load aborts the program
+                a = int.from_bytes(net[off:off + size], "big")
+            else:
+                pytest.fail(f"absolute load at {k:#x}")
+        elif code == 0x15:  # jeq #k
+            pc += jt if a == k else jf
+        elif code == 0x05:  # ja
+            pc += k
+        elif code == 0x54:  # and #k
+            a &= k
+        elif code == 0x74:  # rsh #k
+            a >>= k
+        elif code == 0xAC:  # xor x
+            a ^= x
+        elif code == 0x94:  # mod #k
+            a %= k
+        elif code == 0x07:  # tax
+            x = a
+        elif code == 0x16:  # ret a
+            return a
+        elif code == 0x06:  # ret #k
+            return k
+        else:
+            pytest.fail(f"unexpected opcode {code:#x}")
+
+
+def ipv4(src, dst, frag=0, proto=6, payload=b""):
+    header = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(payload), 1, frag, 64, proto, 0,
+                         socket.inet_aton(src), socket.inet_aton(dst))
+    return header + payload
+
+
+def test_fanout_matches_the_python_shard_in_both_directions():
+    rng = random.Random(7)
+    externals = PUBLIC + [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(500)]
+    for workers in (1, 2, 3, 4, 7, 16):
+        prog = fanout_program(workers)
+        for ext in externals:
+            if ipaddress.ip_address(ext).is_private and ext not in PUBLIC:
+                continue
+            expected = fanout_shard(ext, workers)
+            for internal in PRIVATE[:2] + PRIVATE[4:5]:
+                assert run_bpf(prog, ETH_P_IP, ipv4(internal, ext)) == expected
+                assert run_bpf(prog, ETH_P_IP, ipv4(ext, internal)) == expected
+
+
+def test_fanout_keys_public_to_public_on_the_source():
+    prog = fanout_program(4)
+    assert run_bpf(prog, ETH_P_IP, ipv4("8.8.8.8", "45.33.32.1")) == fanout_shard("8.8.8.8", 4)
+
+
+def test_fanout_non_first_fragments_follow_their_addresses():
+    prog = fanout_program(5)
+    frag = ipv4("45.33.32.77", "10.0.0.1", frag=185, payload=b"\0" * 8)  # offset only, no L4 header
+    assert run_bpf(prog, ETH_P_IP, frag) == fanout_shard("45.33.32.77", 5)
+
+
+def test_fanout_non_ipv4_goes_to_worker_zero():
+    prog = fanout_program(8)
+    ipv6 = bytes([0x60]) + bytes(39)
+    assert run_bpf(prog, ETH_P_IPV6, ipv6) == 0
+    assert run_bpf(prog, ETH_P_ARP, bytes(28)) == 0
+
+
+def test_fanout_reads_relative_to_the_network_header():
+    # a VLAN-tagged frame: skb->protocol is the inner type and the network
+    # header already follows the tag, so the result matches the untagged one
+    prog = fanout_program(3)
+    packet = ipv4("10.0.0.2", "45.33.32.9")
+    assert run_bpf(prog, ETH_P_IP, packet) == fanout_shard("45.33.32.9", 3)
+
+
+@pytest.mark.parametrize("src,dst,kept", [
+    ("45.33.32.1", "10.0.0.1", True),
+    ("10.0.0.1", "45.33.32.1", True),
+    ("8.8.8.8", "45.33.32.1", True),
+    ("10.0.0.1", "192.168.1.1", False),
+    ("172.16.0.1", "172.31.0.1", False),
+    ("192.168.0.1", "172.32.0.1", True),   # 172.32/16 is outside 172.16/12
+    ("172.15.0.1", "10.0.0.1", True),
+])
+def test_capture_filter_keeps_traffic_with_an_external_side(src, dst, kept):
+    verdict = run_bpf(capture_filter_program(), ETH_P_IP, ipv4(src, dst))
+    assert (verdict > 0) == kept
+
+
+def test_capture_filter_drops_non_ipv4_and_blocked_hosts():
+    prog = capture_filter_program(["45.33.32.1", "2001:db8::1"])
+    assert run_bpf(prog, ETH_P_IPV6, bytes(40)) == 0
+    assert run_bpf(prog, ETH_P_IP, ipv4("45.33.32.1", "10.0.0.1")) == 0
+    assert run_bpf(prog, ETH_P_IP, ipv4("10.0.0.1", "45.33.32.1")) == 0
+    assert run_bpf(prog, ETH_P_IP, ipv4("10.0.0.1", "45.33.32.2")) == 0x40000
+
+
+def test_capture_filter_caps_blocked_hosts_and_keeps_jumps_in_range():
+    blocked = [str(ipaddress.IPv4Address(0x2D000000 + i)) for i in range(1000)]
+    prog = capture_filter_program(blocked, max_blocked=256)
+    assert all(jt <= 255 and jf <= 255 for _, jt, jf, _ in prog)
+    capped = sorted(blocked)[:256]
+    assert run_bpf(prog, ETH_P_IP, ipv4(capped[-1], "10.0.0.1")) == 0
+    assert run_bpf(prog, ETH_P_IP, ipv4(sorted(blocked)[256], "10.0.0.1")) > 0
+
+
+def test_capture_filter_truncated_header_is_dropped():
+    assert run_bpf(capture_filter_program(), ETH_P_IP, ipv4("45.33.32.1", "10.0.0.1")[:14]) == 0
+
+
+def test_update_intel_before_start_replaces_the_start_up_entries():
+    capture = MulticoreCapture(workers=2, iface=None, on_verdict=None, on_block=None,
+                               config={"intel_entries": ["1.2.3.0/24"]})
+    capture.update_intel({"5.6.7.0/24", "1.2.3.0/24"})
+    assert capture.config["intel_entries"] == ["1.2.3.0/24", "5.6.7.0/24"]
@@ -0,0 +1,62 @@
+# tests/test_nftables_backend.py
+import time
+
+import pytest
+
+from firewall_backends import NftablesBackend, RecordingRunner
+from firewall_manager import FirewallManager
+
+
+# -------------------------------
+# NftablesBackend
+# -------------------------------
+def test_nftables_first_apply_bootstraps_the_full_set():
+    runner = RecordingRunner()
+    backend = NftablesBackend(runner=runner)
+    backend.apply(["45.33.32.1", "2001:db8::1"], added=[], removed=[])
+    script = runner.scripts[0]
+    assert script.startswith("add table inet aura\n")
+    assert "flush set inet aura blocked_v4" in script
+    assert "add element inet aura blocked_v4 { 45.33.32.1 }" in script
+    assert "add element inet aura blocked_v6 { 2001:db8::1 }" in script
+
+
+def test_nftables_later_applies_are_deltas_with_timeouts():
+    runner = RecordingRunner()
+    backend = NftablesBackend(runner=runner)
+    backend.apply([], [], [])
+    now = time.time()
+    backend.apply(["45.33.32.2"], added=["45.33.32.2"], removed=["45.33.32.1"],
+                  expiry={"45.33.32.2": now + 120})
+    script = runner.scripts[-1]
+    assert "add table" not in script
+    lines = script.splitlines()
+    # removal is add-then-delete so an already expired element cannot fail the batch
+    assert lines[0] == "add element inet aura blocked_v4 { 45.33.32.1 }"
+    assert lines[1] == "delete element inet aura blocked_v4 { 45.33.32.1 }"
+    assert lines[2].startswith("add element inet aura blocked_v4 { 45.33.32.2 timeout 1")
+    assert lines[2].endswith("s }")
+
+
+def test_nftables_failure_raises_and_bootstraps_again():
+    runner = RecordingRunner(returncode=1)
+    backend = NftablesBackend(runner=runner)
+    with pytest.raises(RuntimeError):
+        backend.apply(["45.33.32.1"], [], [])
+    runner.returncode = 0
+    backend.apply(["45.33.32.1"], ["45.33.32.1"], [])
+    assert runner.scripts[-1].startswith("add table inet aura\n")
+    assert backend.apply(["45.33.32.1"], [], []) is True
+    assert len(runner.scripts) == 2  # nothing to do: no script
+
+
+def test_manager_drives_nftables_backend(tmp_path):
+    runner = RecordingRunner()
+    fw = FirewallManager(record_file=str(tmp_path / "blocked.json"), verbose=False,
+                         backend=NftablesBackend(runner=runner), batch_window=0.01)
+    fw.block_ip("45.33.32.20")
+    fw.flush()
+    fw.close()
+    joined = "".join(runner.scripts)
+    assert "add table inet aura" in joined
+    assert "45.33.32.20" in joined
@@ -0,0 +1,121 @@
+# tests/test_packet_pipeline.py
+import threading
+import zlib
+
+from detection_engine import PacketMeta
+from packet_pipeline import _STOP, PacketPipeline
+
+
+class StubEngine:
+    """Records which scoring thread saw each key and what got enforced."""
+
+    def __init__(self):
+        self.seen = {}
+        self.enforced = []
+        self.lock = threading.Lock()
+
+    def key(self, meta):
+        return None if meta.src.startswith("10.") else meta.src
+
+    def analyze(self, meta, key):
+        with self.lock:
+            self.seen.setdefault(key, set()).add(threading.current_thread().name)
+        return (key, meta.length)
+
+    def enforce(self, verdict):
+        self.enforced.append(verdict)
+
+
+def meta(src, length=60):
+    return PacketMeta(src, "10.0.0.1", 6, 443, 50000, length, 0.0)
+
+
+def pipeline(engine, **kwargs):
+    return PacketPipeline(engine.analyze, engine.enforce, engine.key, **kwargs)
+
+
+def test_same_ip_always_lands_on_the_same_worker():
+    engine = StubEngine()
+    p = pipeline(engine, workers=4)
+    p.start()
+    ips = [f"45.33.{i}.{j}" for i in range(4) for j in range(10)]
+    for _ in range(5):
+        for ip in ips:
+            p.submit(meta(ip))
+    p.stop()
+    for ip in ips:
+        assert engine.seen[ip] == {f"aura-score-{zlib.crc32(ip.encode()) % 4}"}
+    assert len(engine.enforced) == 5 * len(ips)
+
+
+def test_stop_drains_every_stage():
+    engine = StubEngine()
+    p = pipeline(engine, workers=3)
+    p.start()
+    for i in range(500):
+        p.submit(meta(f"45.33.32.{i % 250}", length=i))
+    p.submit(meta("10.0.0.5"))  # filtered by key()
+    p.stop()
+    assert sorted(length for _, length in engine.enforced) == list(range(500))
+    stats = p.stats()
+    assert not stats["running"] and p._threads == []
+    assert stats["dispatch"]["processed"] == 501 and stats["dispatch"]["filtered"] == 1
+    assert sum(s["processed"] for s in stats["scoring"]) == 500
+    assert stats["enforce"]["processed"] == 500 and stats["enforce"]["depth"] == 0
+
+
+def test_full_capture_buffer_drops_and_counts():
+    p = pipeline(StubEngine(), capture_size=3)
+    for i in range(5):
+        p.submit(meta("45.33.32.1"))
+    assert p.stats()["capture"] == {"accepted": 3, "dropped": 2, "processed": 0, "errors": 0,
+                                    "depth": 3}
+
+
+def test_full_worker_and_enforce_queues_drop_and_count():
+    engine = StubEngine()
+    p = pipeline(engine, workers=1, worker_queue_size=2, enforce_queue_size=1)
+    # no enforce thread, and dispatch runs inline, so the queue states are deterministic
+    for i in range(5):
+        p.submit(meta("45.33.32.1", length=i))
+    p.capture_buffer.put(_STOP)
+    p._dispatch_loop()
+    assert p.stats()["scoring"][0]["accepted"] == 2
+    assert p.stats()["scoring"][0]["dropped"] == 3
+
+    worker = threading.Thread(target=p._worker_loop, args=(0,))
+    worker.start()
+    p.worker_queues[0].put(_STOP)  # the queue is full: wait for the worker to make room
+    worker.join(5)
+    stats = p.stats()
+    assert stats["scoring"][0]["processed"] == 2
+    assert stats["enforce"]["accepted"] == 1 and stats["enforce"]["dropped"] == 1
+
+
+def test_stage_errors_are_counted_and_do_not_stop_the_stage():
+    def analyze(meta, key):
+        if meta.length == 0:
+            raise ValueError("boom")
+        return meta.length
+
+    def enforce(verdict):
+        if verdict == 1:
+            raise RuntimeError("boom")
+        enforced.append(verdict)
+
+    def key(meta):
+        if meta.length == 3:
+            raise KeyError("boom")
+        return meta.src
+
+    enforced = []
+    p = PacketPipeline(analyze, enforce, key, workers=2)
+    p.start()
+    for i in range(5):
+        p.submit(meta("45.33.32.1", length=i))
+    p.stop()
+    stats = p.stats()
+    assert enforced == [2, 4]
+    assert stats["dispatch"]["errors"] == 1
+    assert sum(s["errors"] for s in stats["scoring"]) == 1
+    assert stats["enforce"]["errors"] == 1
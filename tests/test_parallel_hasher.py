@@ -0,0 +1,60 @@
+# tests/test_parallel_hasher.py
+import hashlib
+import threading
+
+import pytest
+
+from parallel_hasher import ParallelHasher, walk_files
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = {}
+    for i in range(20):
+        sub = tmp_path / f"d{i % 3}"
+        sub.mkdir(exist_ok=True)
+        path = sub / f"f{i}.bin"
+        path.write_bytes(bytes([i]) * (i * 1000 + 1))
+        paths[str(path)] = hashlib.sha256(path.read_bytes()).digest()
+    return tmp_path, paths
+
+
+def test_walk_yields_every_file_with_its_stat(files):
+    root, paths = files
+    seen = dict(walk_files([str(root), str(root / "missing")]))
+    assert set(seen) == set(paths)
+    assert all(seen[p].st_size > 0 for p in seen)
+    assert len(list(walk_files([str(root)], max_files=5))) == 5
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_hash_all_matches_hashlib(files, workers):
+    root, paths = files
+    hasher = ParallelHasher(workers=workers, queue_size=2)
+    results, lock = {}, threading.Lock()
+
+    def on_result(key, digest):
+        with lock:
+            results[key] = digest
+
+    hasher.hash_all(((p, p, None) for p in paths), on_result)
+    assert results == paths
+
+
+def test_mmap_path_and_unreadable_files(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(b"x" * 5000)
+    hasher = ParallelHasher(workers=2, mmap_threshold=1024, chunk_size=999)
+    assert hasher.hash_file(str(big)) == hashlib.sha256(b"x" * 5000).digest()
+    assert hasher.hash_file(str(tmp_path / "gone")) is None
+
+
+def test_callback_errors_are_raised_after_draining(files):
+    root, paths = files
+    hasher = ParallelHasher(workers=3, queue_size=1)
+
+    def on_result(key, digest):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        hasher.hash_all(((p, p, None) for p in paths), on_result)
@@ -0,0 +1,48 @@
+# tests/test_prefix_index.py
+import ipaddress
+
+from prefix_index import PrefixIndex
+
+
+def test_cidr_boundaries():
+    index = PrefixIndex(["10.1.0.0/16"])
+    assert "10.1.0.0" in index
+    assert "10.1.255.255" in index
+    assert "10.0.255.255" not in index
+    assert "10.2.0.0" not in index
+
+
+def test_single_addresses_and_ipv6():
+    index = PrefixIndex(["192.0.2.7", "2001:db8::/32"])
+    assert index.contains("192.0.2.7")
+    assert not index.contains("192.0.2.8")
+    assert index.contains("2001:db8:1::1")
+    assert not index.contains("2001:db9::1")
+    assert index.contains(ipaddress.ip_address("2001:db8::"))
+
+
+def test_overlapping_and_adjacent_prefixes_merge():
+    index = PrefixIndex(["10.0.0.0/24", "10.0.1.0/24", "10.0.0.128/25", "10.0.5.0/24"])
+    assert len(index) == 4
+    assert index.interval_count() == 2
+    assert "10.0.1.200" in index
+    assert "10.0.2.0" not in index
+
+
+def test_invalid_entries_are_counted_not_raised():
+    index = PrefixIndex(["not-an-ip", "10.0.0.0/33", " 10.0.0.0/8 "])
+    assert index.invalid == 2
+    assert len(index) == 1
+    assert "10.200.0.1" in index
+
+
+def test_unparseable_lookup_is_a_miss():
+    index = PrefixIndex(["0.0.0.0/0"])
+    assert not index.contains("garbage")
+
+
+def test_empty_index():
+    index = PrefixIndex()
+    assert len(index) == 0
+    assert "1.2.3.4" not in index
+    assert not index.contains_int(1, 6)
@@ -0,0 +1,85 @@
+# tests/test_rollups.py
+from rollups import RollupStore
+
+
+def verdict(ip="45.33.32.1", score=0.2, blocked=False, country="NL", lat=52.3, lon=4.9):
+    return {"external_ip": ip, "score": score, "blocked": blocked,
+            "country": country, "lat": lat, "lon": lon}
+
+
+def store(**kwargs):
+    kwargs.setdefault("cache_seconds", 0)
+    return RollupStore(bucket_seconds=10, n_buckets=6, **kwargs)
+
+
+def test_totals_countries_cells_and_ips():
+    rollups = store(grid_deg=2.0)
+    rollups.record(verdict(score=0.9, blocked=True), now=1000.0)
+    rollups.record(verdict(), now=1001.0)
+    rollups.record(verdict(ip="45.33.32.2", country="US", lat=None, lon=None), now=1002.0)
+    snap = rollups.snapshot(now=1005.0)
+    assert snap["totals"] == {"count": 3, "blocked": 1, "max_score": 0.9}
+    assert snap["countries"][0] == {"country": "NL", "count": 2, "blocked": 1, "max_score": 0.9}
+    assert snap["cells"] == [[53.0, 5.0, 2, 1, 0.9]]  # 52.3 / 4.9 -> cell centre
+    assert [i["ip"] for i in snap["ips"]] == ["45.33.32.1", "45.33.32.2"]
+    assert snap["series"] == [[1000, 3, 1]]
+
+
+def test_late_verdicts_for_sealed_buckets_are_dropped():
+    rollups = store()
+    rollups.record(verdict(), now=1000.0)
+    rollups.record(verdict(), now=1020.0)
+    rollups.record(verdict(), now=1015.0)  # previous bucket: still live
+    rollups.record(verdict(), now=1005.0)  # two buckets back: sealed
+    stats = rollups.stats()
+    assert (stats["recorded"], stats["late"]) == (3, 1)
+    assert rollups.snapshot(now=1025.0)["totals"]["count"] == 3
+
+
+def test_sealed_and_live_buckets_are_combined():
+    rollups = store()
+    for t in (1000.0, 1010.0, 1020.0, 1030.0):
+        rollups.record(verdict(score=t / 10000), now=t)
+    rollups.record(verdict(ip="45.33.32.9", score=0.05), now=1031.0)
+    snap = rollups.snapshot(now=1035.0)
+    # 1000 and 1010 are sealed and merged once; 1020 and 1030 are live
+    assert snap["totals"]["count"] == 5
+    assert [s[0] for s in snap["series"]] == [1000, 1010, 1020, 1030]
+    top = snap["ips"][0]
+    assert (top["ip"], top["count"], top["max_score"]) == ("45.33.32.1", 4, 0.103)
+
+    # a later write to a live bucket shows up without rebuilding the sealed part
+    rollups.record(verdict(), now=1032.0)
+    assert rollups.snapshot(now=1035.0)["totals"]["count"] == 6
+
+
+def test_window_limits_and_ring_wrap():
+    rollups = store()
+    rollups.record(verdict(), now=1000.0)
+    rollups.record(verdict(), now=1050.0)
+    assert rollups.snapshot(seconds=10, now=1055.0)["totals"]["count"] == 1
+    assert rollups.snapshot(now=1055.0)["totals"]["count"] == 2
+    # 60 s later the 1000 slot is reused: the old bucket is gone
+    rollups.record(verdict(), now=1060.0)
+    snap = rollups.snapshot(now=1065.0)
+    assert snap["totals"]["count"] == 2
+    assert rollups.stats()["buckets"] == 2
+
+
+def test_overflow_is_folded_into_other():
+    rollups = store(max_ips=2)
+    for i in range(5):
+        rollups.record(verdict(ip=f"45.33.32.{i}"), now=1000.0)
+    snap = rollups.snapshot(now=1001.0)
+    assert snap["totals"]["count"] == 5
+    assert len(snap["ips"]) == 2  # "(other)" holds the rest but is never listed
+    assert rollups.stats()["ips"] == 3
+
+
+def test_snapshot_is_cached():
+    rollups = store(cache_seconds=5)
+    rollups.record(verdict(), now=1000.0)
+    first = rollups.snapshot(now=1001.0)
+    rollups.record(verdict(), now=1002.0)
+    assert rollups.snapshot(now=1003.0) is first
+    assert rollups.snapshot(now=1007.0)["totals"]["count"] == 2
@@ -0,0 +1,109 @@
+# tests/test_startup.py
+import threading
+import time
+
+import pytest
+
+from startup import FAILED, PENDING, READY, STARTING, Startup
+
+
+def boom():
+    raise RuntimeError("no device")
+
+
+def finished(boot, timeout=5):
+    for name in ("a", "b", "c", "d"):
+        if name in boot:
+            boot.wait(name, timeout)
+    return boot.status()
+
+
+def test_dependencies_receive_values_and_failures_propagate():
+    boot = Startup()
+    boot.add("a", lambda: 1)
+    boot.add("b", lambda a: a + 1, deps=("a",))
+    boot.add("c", boom)
+    boot.add("d", lambda b, c: b + c, deps=("b", "c"))
+    boot.start()
+    status = finished(boot)
+    assert boot["b"] == 2 and boot.wait("d", 5) is None
+    assert status["subsystems"]["c"]["state"] == FAILED
+    assert status["subsystems"]["c"]["error"] == "RuntimeError: no device"
+    assert status["subsystems"]["d"] == {"state": FAILED, "ms": status["subsystems"]["d"]["ms"],
+                                         "error": "dependency failed: c"}
+    assert not status["ready"] and boot.finished is not None
+    with pytest.raises(KeyError):
+        boot["d"]
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        Startup().add("b", lambda a: a, deps=("a",))
+
+
+def test_unavailable_is_503_while_starting_and_404_once_failed_or_disabled():
+    release = threading.Event()
+    boot = Startup()
+    boot.add("a", lambda: release.wait(5) and "up")
+    boot.add("b", lambda a: a, deps=("a",))
+    boot.add("c", boom)
+    assert boot.unavailable(["a"])[0] == 503  # pending: start() not called yet
+    boot.start()
+    boot.wait("c", 5)
+
+    code, body = boot.unavailable(["a", "b"])
+    assert code == 503 and body["waiting_for"] == ["a", "b"]
+    assert body["startup"]["subsystems"]["a"]["state"] in (PENDING, STARTING)
+    code, body = boot.unavailable(["a", "c"])
+    assert code == 404 and "c (RuntimeError: no device)" in body["error"]
+    code, body = boot.unavailable(["a", "geo"])
+    assert code == 404 and "geo" in body["error"]
+
+    release.set()
+    boot.wait("b", 5)
+    assert boot.unavailable(["a", "b"]) is None
+    assert boot.is_ready("b") and boot["b"] == "up"
+
+
+def test_close_runs_in_reverse_order_and_skips_failed():
+    closed = []
+    boot = Startup()
+    boot.add("a", lambda: "A", close=closed.append)
+    boot.add("b", lambda a: "B", deps=("a",), close=closed.append)
+    boot.add("c", boom, close=closed.append)
+    boot.start()
+    finished(boot)
+    boot.close()
+    boot.close()  # idempotent
+    assert closed == ["B", "A"]
+
+
+def test_subsystem_still_starting_at_shutdown_is_closed_when_it_comes_up():
+    closed = []
+    release = threading.Event()
+    boot = Startup()
+    boot.add("a", lambda: release.wait(5) and "A", close=closed.append)
+    boot.add("b", lambda a: "B", deps=("a",), close=closed.append)
+    boot.start()
+    while boot.status()["subsystems"]["a"]["state"] != STARTING:
+        time.sleep(0.001)
+    boot.close(timeout=0.05)
+    assert closed == []
+
+    release.set()
+    boot.wait("b", 5)
+    assert boot.wait("a", 5) == "A" and closed == ["A"]
+    # b was still pending at shutdown, so it is cancelled instead of started
+    assert boot.status()["subsystems"]["b"]["state"] == FAILED
+    assert boot.status()["subsystems"]["b"]["error"] == "cancelled: shutting down"
+
+
+def test_status_reports_timings():
+    boot = Startup()
+    boot.add("a", lambda: 1)
+    assert boot.status() == {"ready": False, "elapsed_ms": None,
+                             "subsystems": {"a": {"state": PENDING, "ms": None, "error": None}}}
+    boot.start()
+    status = finished(boot)
+    assert status["ready"] and status["subsystems"]["a"]["state"] == READY
+    assert status["subsystems"]["a"]["ms"] >= 0 and status["elapsed_ms"] >= 0
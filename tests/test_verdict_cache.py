@@ -0,0 +1,70 @@
+# tests/test_verdict_cache.py
+import pytest
+
+from verdict_cache import VerdictCache
+
+
+def test_hit_until_ttl_then_expired():
+    cache = VerdictCache(ttls={"intel": 10})
+    cache.put("1.2.3.4", "intel", 0.7, now=100.0)
+    assert cache.get("1.2.3.4", "intel", now=109.9) == 0.7
+    assert cache.get("1.2.3.4", "intel", now=110.0) is VerdictCache.MISS
+    counters = cache.stats()["components"]["intel"]
+    assert (counters["hits"], counters["misses"], counters["expired"]) == (1, 1, 1)
+
+
+def test_components_expire_independently():
+    cache = VerdictCache(ttls={"intel": 10, "geo": 1000})
+    cache.put("1.2.3.4", "intel", 0.1, now=0.0)
+    cache.put("1.2.3.4", "geo", {"country": "NL"}, now=0.0)
+    assert cache.get("1.2.3.4", "intel", now=50.0) is VerdictCache.MISS
+    assert cache.get("1.2.3.4", "geo", now=50.0) == {"country": "NL"}
+
+
+def test_least_recently_used_ip_is_evicted():
+    cache = VerdictCache(max_entries=2)
+    cache.put("a", "intel", 1, now=0.0)
+    cache.put("b", "intel", 2, now=0.0)
+    assert cache.get("a", "intel", now=1.0) == 1  # a is now most recent
+    cache.put("c", "intel", 3, now=1.0)
+    assert cache.get("b", "intel", now=1.0) is VerdictCache.MISS
+    assert cache.get("a", "intel", now=1.0) == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_ttl_disables_caching():
+    cache = VerdictCache(ttls={"geo": 0})
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute("1.2.3.4", "geo", lambda: calls.append(1) or "x")
+    assert len(calls) == 3
+    assert cache.stats()["entries"] == 0
+
+
+def test_behavior_detector_is_never_cached():
+    # the detector is stateful; only intel and geo may be cached
+    assert set(VerdictCache.DEFAULT_TTLS) == {"intel", "geo"}
+    with pytest.raises(KeyError):
+        VerdictCache().put("1.2.3.4", "behavior", 0.5)
+
+
+def test_invalidate_and_clear():
+    cache = VerdictCache()
+    cache.put("a", "intel", 1)
+    cache.put("b", "intel", 2)
+    cache.invalidate("a")
+    assert cache.get("a", "intel") is VerdictCache.MISS
+    assert cache.get("b", "intel") == 2
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_component_keeps_other_components():
+    cache = VerdictCache()
+    cache.put("a", "intel", 1)
+    cache.put("a", "geo", "NL")
+    cache.put("b", "intel", 2)
+    cache.invalidate_component("intel")
+    assert cache.get("a", "intel") is VerdictCache.MISS
+    assert cache.get("a", "geo") == "NL"
+    assert cache.stats()["entries"] == 1  # b had nothing else cached
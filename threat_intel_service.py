@@ -1,55 +1,99 @@
 # threat_intelligence_service.py
-import requests
 import ipaddress
+import threading
 import time
 import random
 
+from prefix_index import PrefixIndex
+from abuse_resolver import AbuseResolver
+from feed_manager import FeedManager
+
 class ThreatIntel:
     SPAMHAUS_URLS = [
         "https://www.spamhaus.org/drop/drop.txt",
         "https://www.spamhaus.org/drop/edrop.txt"
     ]
-    def __init__(self, abuse_key=""):
+    # heuristic scores stand in for AbuseIPDB while a lookup is pending; they
+    # stay below DetectionEngine.BLOCK_THRESHOLD (0.6) so a guess alone never blocks
+    PROVISIONAL_MAX = 0.5
+    def __init__(self, abuse_key="", fetch=True, resolver=None, feeds=(), feed_cache_dir="feed_cache",
+                 refresh_interval=6 * 3600):
+        """
+        fetch=True: load Spamhaus (+ extra `feeds`, URLs or local files) from
+        the on-disk cache right away and refresh them in the background.
+        on_update(entries), if set, is called after every index rebuild.
+        """
         self.abuse_key = (abuse_key or "").strip()
-        self.bad_entries = set()
-        self._fetch_spamhaus()
-        self._last_abuse_fail = 0
+        self.manual_entries = set()
+        self.feed_entries = set()
+        self.bad_index = PrefixIndex()
+        self._index_lock = threading.Lock()
+        self._index_summary = None
+        self.on_update = None
+        self.feeds = None
+        if fetch:
+            t0 = time.perf_counter()
+            self.feeds = FeedManager(list(self.SPAMHAUS_URLS) + list(feeds), cache_dir=feed_cache_dir,
+                                     refresh_interval=refresh_interval, on_update=self._on_feed_update)
+            self.feed_entries = self.feeds.load_cached()
+            self._rebuild_index()
+            print(f"[INTEL] Feeds ready from cache in {(time.perf_counter() - t0) * 1000:.1f} ms; "
+                  f"refreshing in the background.")
+            self.feeds.start()
+        # AbuseIPDB runs in the background; the packet path only reads its cache
+        self.abuse = resolver
+        if self.abuse is None and self.abuse_key:
+            self.abuse = AbuseResolver(self.abuse_key)
 
-    def _fetch_spamhaus(self):
-        try:
-            for url in self.SPAMHAUS_URLS:
-                r = requests.get(url, timeout=6)
-                if r.status_code == 200:
-                    for line in r.text.splitlines():
-                        line = line.strip()
-                        if not line or line.startswith(";"):
-                            continue
-                        cidr = line.split(";")[0].strip()
-                        self.bad_entries.add(cidr)
-        except Exception as e:
-            print("[INTEL] Spamhaus fetch error:", e)
+    @property
+    def bad_entries(self):
+        with self._index_lock:
+            return self.manual_entries | self.feed_entries
+
+    def _rebuild_index(self):
+        """Compile a fresh index and swap it in; lookups keep using the old one until then."""
+        with self._index_lock:
+            entries = self.manual_entries | self.feed_entries
+            index = PrefixIndex(entries)
+            self.bad_index = index
+            summary = (len(index), index.interval_count(), index.invalid)
+            changed, self._index_summary = summary != self._index_summary, summary
+        if changed:
+            print(f"[INTEL] Indexed {summary[0]} bad prefixes "
+                  f"({summary[1]} ranges, {summary[2]} invalid).")
+        if self.on_update is not None:
+            self.on_update(entries)
+
+    def _on_feed_update(self, entries):
+        # runs on the feed refresh thread
+        with self._index_lock:
+            self.feed_entries = entries
+        self._rebuild_index()
+
+    def load_entries(self, entries):
+        """Add CIDR/IP entries and recompile the lookup index once."""
+        entries = list(entries)  # consume any generator before taking the lock
+        with self._index_lock:
+            self.manual_entries.update(entries)
+        self._rebuild_index()
 
     def _abuse_lookup(self, ip):
-        if not self.abuse_key:
-            return None
-        if time.time() - self._last_abuse_fail < 5:
-            return None
-        try:
-            url = "https://api.abuseipdb.com/api/v2/check"
-            headers = {"Key": self.abuse_key, "Accept": "application/json"}
-            params = {"ipAddress": ip, "maxAgeInDays": "90"}
-            r = requests.get(url, headers=headers, params=params, timeout=6)
-            if r.status_code == 200:
-                data = r.json().get("data", {})
-                score = data.get("abuseConfidenceScore", 0)
-                return min(1.0, max(0.0, score/100.0))
-            else:
-                self._last_abuse_fail = time.time()
-                return None
-        except Exception as e:
-            self._last_abuse_fail = time.time()
-            print("[INTEL] AbuseIPDB lookup failed:", e)
+        """Cached AbuseIPDB score or None (never blocks; misses are resolved in the background)."""
+        if self.abuse is None:
             return None
+        return self.abuse.get(ip)
+
+    def stats(self):
+        index = self.bad_index
+        return {"prefixes": len(index), "ranges": index.interval_count(),
+                "feeds": self.feeds.stats() if self.feeds is not None else None,
+                "abuseipdb": self.abuse.stats() if self.abuse is not None else None}
+
+    def close(self):
+        if self.feeds is not None:
+            self.feeds.stop()
+        if self.abuse is not None:
+            self.abuse.close()
 
     def check_ip_reputation(self, ip):
         try:
@@ -58,23 +102,21 @@ class ThreatIntel:
                 return 0.0
         except Exception:
             return 0.0
-        # check spamhaus list (CIDR-aware)
-        for entry in list(self.bad_entries):
-            try:
-                if "/" in entry:
-                    if addr in ipaddress.ip_network(entry, strict=False):
-                        return 1.0
-                else:
-                    if ip == entry:
-                        return 1.0
-            except Exception:
-                if ip.startswith(entry.split("/")[0]):
-                    return 1.0
-        # AbuseIPDB
+        # check spamhaus list (CIDR-aware, compiled once at load)
+        if self.bad_index.contains_int(int(addr), addr.version):
+            return 1.0
+        # AbuseIPDB (cached result only)
         v = self._abuse_lookup(ip)
         if v is not None:
             return round(float(v), 2)
-        # heuristic: prefixes
+        score = self._prefix_heuristic(ip)
+        if self.abuse is not None:
+            # provisional until AbuseIPDB answers
+            score = min(score, self.PROVISIONAL_MAX)
+        return score
+
+    @staticmethod
+    def _prefix_heuristic(ip):
         high = ("45.","185.","103.","198.","156.")
         med = ("13.","20.","34.","52.","104.","40.","23.")
         for p in high:
@@ -0,0 +1,106 @@
+# verdict_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """
+    Bounded, thread-safe per-IP cache of subsystem verdicts.
+    - keyed on external IP, one entry holds every component's result
+    - each component (intel / geo) has its own TTL; the stateful behavior
+      detector is never cached
+    - least recently used IPs are evicted once max_entries is reached
+    - hit / miss / eviction counters exposed through stats()
+    """
+
+    DEFAULT_TTLS = {
+        "intel": 300.0,      # reputation feeds change slowly
+        "geo": 6 * 3600.0,   # geolocation practically never changes
+    }
+
+    MISS = object()
+
+    def __init__(self, max_entries=50000, ttls=None):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {c: {"hits": 0, "misses": 0, "expired": 0} for c in self.ttls}
+        self.evictions = 0
+
+    def get(self, ip, component, now=None):
+        """Return the cached value for (ip, component) or VerdictCache.MISS."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            counters = self._counters[component]
+            entry = self._entries.get(ip)
+            if entry is not None:
+                cached = entry.get(component)
+                if cached is not None:
+                    value, expires = cached
+                    if now < expires:
+                        self._entries.move_to_end(ip)
+                        counters["hits"] += 1
+                        return value
+                    del entry[component]
+                    counters["expired"] += 1
+            counters["misses"] += 1
+            return self.MISS
+
+    def put(self, ip, component, value, now=None):
+        """Store a component verdict for ip, evicting the LRU IP if full."""
+        ttl = self.ttls[component]
+        if ttl <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is None:
+                entry = self._entries[ip] = {}
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._entries.move_to_end(ip)
+            entry[component] = (value, now + ttl)
+
+    def get_or_compute(self, ip, component, compute):
+        """Return the cached value, or call compute() and cache its result."""
+        value = self.get(ip, component)
+        if value is self.MISS:
+            value = compute()
+            self.put(ip, component, value)
+        return value
+
+    def invalidate(self, ip):
+        with self._lock:
+            self._entries.pop(ip, None)
+
+    def invalidate_component(self, component):
+        """Drop one component's verdicts for every IP (e.g. intel after a feed update)."""
+        with self._lock:
+            for ip in [ip for ip, entry in self._entries.items()
+                       if entry.pop(component, None) is not None and not entry]:
+                del self._entries[ip]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return counters for the /cache endpoint."""
+        with self._lock:
+            components = {}
+            for name, c in self._counters.items():
+                total = c["hits"] + c["misses"]
+                components[name] = dict(c, ttl=self.ttls[name],
+                                        hit_ratio=round(c["hits"] / total, 4) if total else 0.0)
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "components": components,
+            }